@@ -0,0 +1,41 @@
+import random
+from sugardata.tasks.sentiment.generate_sync import SentimentGenerator
+from sugardata.tasks.sentiment.schemas import SentimentResponse
+from .common import SEED, generator_config, sentence
+
+
+def sentiment_rows(n_rows):
+    rng = random.Random(SEED)
+    return [
+        {
+            "index": index,
+            "concept": "coffee",
+            "aspect": sentence(rng, 2),
+            "writing_style": "informal",
+            "medium": "review",
+            "persona": "customer",
+            "intention": "complain",
+            "sentence_length": "2 sentences",
+            "generated_text": sentence(rng, 30),
+            "dimension": sentence(rng, 1),
+            "sentiment": rng.choice(["positive", "negative"]),
+        }
+        for index in range(n_rows)
+    ]
+
+
+class ConvertToOutput:
+    params = [["default", "dataframe", "hg", "pydantic"], [1_000, 100_000]]
+    param_names = ["export_type", "n_rows"]
+    number = 1
+    timeout = 600
+
+    def setup(self, export_type, n_rows):
+        self.generator = SentimentGenerator(generator_config(n_rows, export_type=export_type))
+        self.rows = sentiment_rows(n_rows)
+
+    def time_convert_to_output(self, export_type, n_rows):
+        self.generator._convert_to_output(self.rows, SentimentResponse)
+
+    def peakmem_convert_to_output(self, export_type, n_rows):
+        self.generator._convert_to_output(self.rows, SentimentResponse)
@@ -0,0 +1,43 @@
+from sugardata.tasks.sentiment.augment_sync import SentimentAugmenter
+from sugardata.tasks.sentiment.schemas import Text
+from sugardata.utility.join import JoinUtility
+from .common import augmenter_config
+
+
+class IndexJoin:
+    """Joining results back to their requests by index; should scale linearly with the number of rows."""
+    params = [10_000, 100_000, 1_000_000]
+    param_names = ["n_rows"]
+    number = 1
+    timeout = 600
+
+    def setup(self, n_rows):
+        self.requests = [{"index": i, "aspect": "Aspect: crema -> Sentiment: positive"} for i in range(n_rows)]
+        # Reversed, with a repeated and a hallucinated index, as LLM answers come back.
+        self.results = [{"index": i, "generated_text": "text"} for i in reversed(range(n_rows))]
+        self.results += [{"index": 0, "generated_text": "again"}, {"index": n_rows, "generated_text": "made up"}]
+
+    def time_join_by_index(self, n_rows):
+        JoinUtility.join_by_index(self.requests, self.results)
+
+    def peakmem_join_by_index(self, n_rows):
+        JoinUtility.join_by_index(self.requests, self.results)
+
+
+class AugmentParseSentences:
+    """`SentimentAugmenter._parse_sentences` end to end, which used to scan the batches for every sentence."""
+    params = [10_000, 100_000, 1_000_000]
+    param_names = ["n_rows"]
+    number = 1
+    timeout = 1200
+
+    def setup(self, n_rows):
+        self.augmenter = SentimentAugmenter(augmenter_config(aspect_based_generation=True))
+        self.batches = [
+            {"index": i, "concept": "coffee", "aspect": "Aspect: crema -> Sentiment: positive", "given_text": "text"}
+            for i in range(n_rows)
+        ]
+        self.sentences = [Text(index=i, generated_text="text") for i in reversed(range(n_rows))]
+
+    def time_parse_sentences(self, n_rows):
+        self.augmenter._parse_sentences(self.sentences, self.batches)
@@ -0,0 +1,38 @@
+import copy
+from sugardata.tasks.ner.local_sync import NERLocalizer
+from sugardata.utility.ner import NERExampleFormatter
+from .common import bio_corpus, ner_config, ner_corpus
+
+
+class NERLabeling:
+    """Token labelling of localized texts; the whitespace tokenizer keeps the timings on sugardata's own loops."""
+    params = [1_000, 10_000, 100_000]
+    param_names = ["n_examples"]
+    number = 1
+    timeout = 600
+
+    def setup(self, n_examples):
+        self.localizer = NERLocalizer(ner_config())
+        self.examples, self.localized = ner_corpus(n_examples)
+
+    def time_label_generated_text_tokens(self, n_examples):
+        # The records are updated in place, so every run labels a fresh copy.
+        self.localizer._label_generated_text_tokens(self.examples, copy.deepcopy(self.localized))
+
+    def peakmem_label_generated_text_tokens(self, n_examples):
+        self.localizer._label_generated_text_tokens(self.examples, copy.deepcopy(self.localized))
+
+
+class NERFormatting:
+    params = [1_000, 10_000, 100_000]
+    param_names = ["n_sequences"]
+
+    def setup(self, n_sequences):
+        self.formatter = NERExampleFormatter(full_to_short={"PER": "PERSON", "LOC": "LOCATION"})
+        self.token_seqs, self.tag_seqs = bio_corpus(n_sequences)
+
+    def time_build_from_bio(self, n_sequences):
+        self.formatter.build_from_bio(self.token_seqs, self.tag_seqs)
+
+    def peakmem_build_from_bio(self, n_sequences):
+        self.formatter.build_from_bio(self.token_seqs, self.tag_seqs)
@@ -0,0 +1,86 @@
+import asyncio
+from sugardata.tasks.sentiment.augment_sync import SentimentAugmenter
+from sugardata.tasks.sentiment.generate_async import SentimentGeneratorAsync
+from sugardata.tasks.sentiment.generate_sync import SentimentGenerator
+from sugardata.tasks.sentiment.schemas import Text
+from .common import augmenter_config, generator_config, structures
+
+
+class SentimentGeneration:
+    """End-to-end generation against the fake LLM."""
+    params = [100, 1_000, 10_000, 100_000]
+    param_names = ["n_sentence"]
+    number = 1
+    repeat = (1, 3, 60.0)
+    timeout = 1800
+
+    def setup(self, n_sentence):
+        self.config = generator_config(n_sentence, batch_size=100)
+
+    def time_generate(self, n_sentence):
+        SentimentGenerator(self.config).generate(concept="coffee")
+
+    def peakmem_generate(self, n_sentence):
+        SentimentGenerator(self.config).generate(concept="coffee")
+
+
+class SentimentGenerationAsync:
+    params = [100, 1_000, 10_000, 100_000]
+    param_names = ["n_sentence"]
+    number = 1
+    repeat = (1, 3, 60.0)
+    timeout = 1800
+
+    def setup(self, n_sentence):
+        self.config = generator_config(n_sentence, max_concurrency=256)
+
+    def time_generate(self, n_sentence):
+        asyncio.run(SentimentGeneratorAsync(self.config).generate(concept="coffee"))
+
+    def peakmem_generate(self, n_sentence):
+        asyncio.run(SentimentGeneratorAsync(self.config).generate(concept="coffee"))
+
+
+class ComposeBatches:
+    """Drawing the sentence requests of a generation run; the requests are rendered lazily, so this is the sampling alone."""
+    params = ([10_000, 1_000_000, 10_000_000], [1, 3])
+    param_names = ["n_sentence", "n_aspect"]
+    number = 1
+    timeout = 600
+
+    def setup(self, n_sentence, n_aspect):
+        self.generator = SentimentGenerator(generator_config(n_sentence, n_aspect=n_aspect, seed=0))
+        self.dimensions = [f"dimension {i}" for i in range(10)]
+        self.aspects = {dim: [f"{dim} aspect {j}" for j in range(20)] for dim in self.dimensions}
+
+    def time_compose_batches(self, n_sentence, n_aspect):
+        self.generator._compose_batches("coffee", self.dimensions, self.aspects)
+
+    def peakmem_compose_batches(self, n_sentence, n_aspect):
+        self.generator._compose_batches("coffee", self.dimensions, self.aspects)
+
+
+class AugmentBatches:
+    """Composing and joining back the requests of structures with many aspects (2**n_aspect label combinations each)."""
+    params = [2, 6, 10]
+    param_names = ["n_aspect"]
+    number = 1
+    timeout = 600
+
+    def setup(self, n_aspect):
+        self.augmenter = SentimentAugmenter(augmenter_config(aspect_based_generation=True))
+        self.structures = structures(n_structures=10, n_aspects=n_aspect)
+        self.batches = self.augmenter._compose_batches(self.structures)
+        self.sentences = [Text(index=batch["index"], generated_text="text") for batch in reversed(self.batches)]
+
+    def time_compose_batches(self, n_aspect):
+        self.augmenter._compose_batches(self.structures)
+
+    def peakmem_compose_batches(self, n_aspect):
+        self.augmenter._compose_batches(self.structures)
+
+    def time_parse_sentences(self, n_aspect):
+        self.augmenter._parse_sentences(self.sentences, self.batches)
+
+    def peakmem_parse_sentences(self, n_aspect):
+        self.augmenter._parse_sentences(self.sentences, self.batches)
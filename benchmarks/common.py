@@ -0,0 +1,121 @@
+"""
+Shared fixtures of the benchmark suite. Everything runs offline against the fake LLM,
+so the timings measure the orchestration overhead of sugardata itself.
+"""
+import random
+from typing import Any, Dict, List, Tuple
+from sugardata.components.fake_llm import NAMES, WORDS, FakeChatModel
+from sugardata.tasks.ner.schemas import NERLocalizerConfig
+from sugardata.tasks.sentiment.prompts import (
+    get_aspect_prompt, get_augment_sentence_prompt, get_dimension_prompt, get_sentence_prompt, get_structure_prompt
+)
+from sugardata.tasks.sentiment.schemas import SentimentConfig
+
+
+SEED = 0
+ENTITY_LABELS = {"PERSON": (1, 2), "LOCATION": (3, 4)}
+
+
+class WhitespaceTokenizer:
+    """Stand-in for a Hugging Face tokenizer, so that tokenization does not dominate the timings."""
+
+    def tokenize(self, text: str) -> List[str]:
+        return text.split()
+
+
+def fake_llm(**params: Any) -> FakeChatModel:
+    return FakeChatModel(seed=SEED, **params)
+
+
+def generator_config(n_sentence: int, **overrides: Any) -> SentimentConfig:
+    return SentimentConfig(
+        language="en",
+        dimension_prompt=get_dimension_prompt(language="en"),
+        aspect_prompt=get_aspect_prompt(language="en"),
+        sentence_prompt=get_sentence_prompt(language="en"),
+        llm=fake_llm(),
+        n_sentence=n_sentence,
+        **overrides
+    )
+
+
+def augmenter_config(**overrides: Any) -> SentimentConfig:
+    return SentimentConfig(
+        language="en",
+        sentence_prompt=get_augment_sentence_prompt(language="en"),
+        structure_prompt=get_structure_prompt(language="en"),
+        llm=fake_llm(),
+        **overrides
+    )
+
+
+def ner_config(**overrides: Any) -> NERLocalizerConfig:
+    return NERLocalizerConfig(
+        target_language="French",
+        tokenizer=WhitespaceTokenizer(),
+        entity_labels=ENTITY_LABELS,
+        llm=fake_llm(),
+        **overrides
+    )
+
+
+def sentence(rng: random.Random, n_words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n_words))
+
+
+def structures(n_structures: int, n_aspects: int) -> List[Dict[str, Any]]:
+    rng = random.Random(SEED)
+    return [
+        {
+            "concept": "coffee",
+            "aspects": [sentence(rng, 2) for _ in range(n_aspects)],
+            "writing_style": "informal",
+            "medium": "review",
+            "persona": "customer",
+            "intention": "complain",
+            "sentence_length": "2 sentences",
+            "given_text": sentence(rng, 20),
+        }
+        for _ in range(n_structures)
+    ]
+
+
+def ner_corpus(n_examples: int, n_words: int = 20) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """NER examples with a two-token person and a one-token location, plus their localized answers."""
+    rng = random.Random(SEED)
+    examples, localized = [], []
+    for index in range(n_examples):
+        words = sentence(rng, n_words).split()
+        person, place = " ".join(rng.sample(NAMES, 2)), rng.choice(NAMES)
+        local_person, local_place = " ".join(rng.sample(NAMES, 2)), rng.choice(NAMES)
+        examples.append({
+            "text": " ".join([person, *words[:n_words // 2], place, *words[n_words // 2:]]),
+            "ner_tags": [{person: "PERSON"}, {place: "LOCATION"}],
+        })
+        localized.append({
+            "index": index,
+            "localized_text": " ".join([local_person, *words[:n_words // 2], local_place, *words[n_words // 2:]]),
+            "localized_word_mappings": {person: local_person, place: local_place},
+        })
+    return examples, localized
+
+
+def bio_corpus(n_sequences: int, n_tokens: int = 24) -> Tuple[List[List[str]], List[List[str]]]:
+    rng = random.Random(SEED)
+    token_seqs, tag_seqs = [], []
+    for _ in range(n_sequences):
+        tokens, tags = [], []
+        while len(tokens) < n_tokens:
+            draw = rng.random()
+            if draw < 0.1:
+                tokens.extend(rng.sample(NAMES, 2))
+                tags.extend(["B-PER", "I-PER"])
+            elif draw < 0.15:
+                tokens.append(rng.choice(NAMES))
+                tags.append("B-LOC")
+            else:
+                tokens.append(rng.choice(WORDS + (".", ",", "'s")))
+                tags.append("O")
+        token_seqs.append(tokens)
+        tag_seqs.append(tags)
+    return token_seqs, tag_seqs
@@ -9,7 +9,7 @@ setup(
     name="sugardata",
     version="0.0.5",
     description="Generates synthetic datasets tailored for transformer-based models",
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*"]),
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/okanyenigun/sugardata",
@@ -1,6 +1,9 @@
 from .tasks.sentiment.service import (
     augment_sentiment_data, augment_sentiment_data_async, augment_sentiment_multi_vendor_async,
-    generate_sentiment_data, generate_sentiment_data_async, generate_sentiment_multi_vendor_async
+    augment_sentiment_data_stream, augment_sentiment_data_stream_async,
+    generate_sentiment_data, generate_sentiment_data_async, generate_sentiment_multi_vendor_async,
+    generate_sentiment_data_stream, generate_sentiment_data_stream_async,
+    submit_sentiment_batch_job, collect_sentiment_batch_job
 )
 from .tasks.ner.service import (
     localize_ner_data, localize_ner_data_async,localize_ner_data_multi_vendor_async
@@ -15,9 +18,15 @@ __all__ = [
     "augment_sentiment_data",
     "augment_sentiment_data_async",
     "augment_sentiment_multi_vendor_async",
+    "augment_sentiment_data_stream",
+    "augment_sentiment_data_stream_async",
     "generate_sentiment_data",
     "generate_sentiment_data_async",
     "generate_sentiment_multi_vendor_async",
+    "generate_sentiment_data_stream",
+    "generate_sentiment_data_stream_async",
+    "submit_sentiment_batch_job",
+    "collect_sentiment_batch_job",
     "localize_ner_data",
     "localize_ner_data_async",
     "localize_ner_data_multi_vendor_async"
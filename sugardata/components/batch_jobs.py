@@ -0,0 +1,324 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, List, Optional, Union
+from langchain_core.messages import convert_to_messages
+from langchain_core.output_parsers import BaseOutputParser
+from langchain_core.prompt_values import ChatPromptValue
+from .standard_chain_builder import BatchFailure, BatchResult
+from ..utility.files import atomic_write
+
+
+# Request parameters that are forwarded to the batch endpoint when the LLM object sets them.
+BATCH_BODY_PARAMS = ("temperature", "seed", "top_p", "max_tokens")
+MESSAGE_ROLES = {"human": "user", "ai": "assistant", "system": "system"}
+
+SUBMITTING = "submitting"
+PENDING = "pending"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+def render_batch_requests(chain: object, inputs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Renders the prompts of a `CustomChain` into chat-completion requests in the OpenAI batch format.
+    The position of each input is used as its `custom_id`.
+    """
+    identity = chain.identity or {"model": "unknown", "params": {}}
+    params = {name: identity["params"][name] for name in BATCH_BODY_PARAMS if identity["params"].get(name) is not None}
+    # Batch requests are plain chat completions, so they always carry the JSON schema in the prompt.
+    format_instructions = chain.format_instructions
+    if chain.structured_llm is not None:
+        format_instructions = chain.parser.get_format_instructions()
+    requests = []
+    for position, input in enumerate(inputs):
+        prompt_value = chain.prompt.invoke({"format_instructions": format_instructions, **input})
+        messages = [
+            {"role": MESSAGE_ROLES.get(message.type, message.type), "content": message.content}
+            for message in prompt_value.to_messages()
+        ]
+        requests.append({
+            "custom_id": str(position),
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {"model": identity["model"], "messages": messages, **params},
+        })
+    return requests
+
+
+def _read_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _write_jsonl(path: str, rows: List[Dict[str, Any]]) -> None:
+    with atomic_write(path) as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+class BatchBackend(ABC):
+    """Batch endpoint of a provider: JSONL requests in, one `{"custom_id", "content", "error"}` row per request out."""
+    name: str = "base"
+
+    @abstractmethod
+    def submit(self, requests_path: str, tag: str) -> str:
+        """Uploads the request file, starts the job tagged with `tag` and returns its id."""
+
+    def find(self, tag: str) -> Optional[str]:
+        """Id of a job submitted with `tag` that has not failed, if the backend can look one up."""
+        return None
+
+    @abstractmethod
+    def status(self, job_id: str) -> str:
+        """Returns "pending", "completed" or "failed"."""
+
+    @abstractmethod
+    def download(self, job_id: str, results_path: str) -> None:
+        """Writes the results of a completed job to `results_path`."""
+
+
+class LocalBatchBackend(BatchBackend):
+    """
+    File-based stand-in for a batch endpoint: a job is a folder under `directory` and completes once
+    `output.jsonl` appears in it, written by `llm` on the first poll or by another process.
+    """
+    name = "local"
+
+    def __init__(self, directory: str = ".sugardata_batches", llm: Optional[object] = None):
+        self.directory = directory
+        self.llm = llm
+
+    def submit(self, requests_path: str, tag: str) -> str:
+        job_id = uuid.uuid4().hex
+        os.makedirs(self._job_dir(job_id), exist_ok=True)
+        with open(os.path.join(self._job_dir(job_id), "tag"), "w", encoding="utf-8") as f:
+            f.write(tag)
+        shutil.copyfile(requests_path, os.path.join(self._job_dir(job_id), "input.jsonl"))
+        return job_id
+
+    def find(self, tag: str) -> Optional[str]:
+        if not os.path.isdir(self.directory):
+            return None
+        for job_id in os.listdir(self.directory):
+            tag_path = os.path.join(self._job_dir(job_id), "tag")
+            if not os.path.exists(tag_path) or self.status(job_id) == FAILED:
+                continue
+            with open(tag_path, encoding="utf-8") as f:
+                if f.read() == tag:
+                    return job_id
+        return None
+
+    def status(self, job_id: str) -> str:
+        if not os.path.exists(os.path.join(self._job_dir(job_id), "input.jsonl")):
+            return FAILED
+        if not os.path.exists(self._output_path(job_id)) and self.llm is not None:
+            self._process(job_id)
+        return COMPLETED if os.path.exists(self._output_path(job_id)) else PENDING
+
+    def download(self, job_id: str, results_path: str) -> None:
+        shutil.copyfile(self._output_path(job_id), results_path)
+
+    def _process(self, job_id: str) -> None:
+        results = []
+        for request in _read_jsonl(os.path.join(self._job_dir(job_id), "input.jsonl")):
+            try:
+                message = self.llm.invoke(ChatPromptValue(messages=convert_to_messages(request["body"]["messages"])))
+                results.append({"custom_id": request["custom_id"], "content": getattr(message, "content", message), "error": None})
+            except Exception as e:
+                results.append({"custom_id": request["custom_id"], "content": None, "error": f"{type(e).__name__}: {e}"})
+        _write_jsonl(self._output_path(job_id), results)
+
+    def _job_dir(self, job_id: str) -> str:
+        return os.path.join(self.directory, job_id)
+
+    def _output_path(self, job_id: str) -> str:
+        return os.path.join(self._job_dir(job_id), "output.jsonl")
+
+
+class OpenAIBatchBackend(BatchBackend):
+    """
+    OpenAI Batch API backend. Jobs complete within `completion_window` at a discounted price.
+    Expired or cancelled jobs still return the requests that finished before they stopped.
+    """
+    name = "openai"
+    # Key of the job metadata holding the tag of a submission.
+    TAG_KEY = "sugardata_request_hash"
+    # Most recent jobs searched for a tag.
+    FIND_LIMIT = 100
+
+    def __init__(self, client: Optional[object] = None, completion_window: str = "24h"):
+        if client is None:
+            try:
+                import openai
+            except ImportError:
+                raise ImportError("Please install `openai` package to use this feature.")
+            client = openai.OpenAI()
+        self.client = client
+        self.completion_window = completion_window
+
+    def submit(self, requests_path: str, tag: str) -> str:
+        with open(requests_path, "rb") as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+        job = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window=self.completion_window,
+            metadata={self.TAG_KEY: tag}
+        )
+        return job.id
+
+    def find(self, tag: str) -> Optional[str]:
+        for job in self.client.batches.list(limit=self.FIND_LIMIT).data:
+            if (job.metadata or {}).get(self.TAG_KEY) == tag and job.status not in ("failed", "cancelling", "cancelled"):
+                return job.id
+        return None
+
+    def status(self, job_id: str) -> str:
+        job = self.client.batches.retrieve(job_id)
+        if job.status == "completed":
+            return COMPLETED
+        if job.status in ("expired", "cancelled"):
+            return COMPLETED if (job.output_file_id or job.error_file_id) else FAILED
+        if job.status == "failed":
+            return FAILED
+        return PENDING
+
+    def download(self, job_id: str, results_path: str) -> None:
+        job = self.client.batches.retrieve(job_id)
+        results = []
+        for file_id in (job.output_file_id, job.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if line.strip():
+                    results.append(self._normalize(json.loads(line)))
+        _write_jsonl(results_path, results)
+
+    @staticmethod
+    def _normalize(row: Dict[str, Any]) -> Dict[str, Any]:
+        response = row.get("response") or {}
+        if row.get("error") or response.get("status_code") != 200:
+            error = row.get("error") or (response.get("body") or {}).get("error") or f"HTTP {response.get('status_code')}"
+            return {"custom_id": row.get("custom_id"), "content": None, "error": str(error)}
+        content = response["body"]["choices"][0]["message"]["content"]
+        return {"custom_id": row.get("custom_id"), "content": content, "error": None}
+
+
+BATCH_BACKENDS = {
+    "local": LocalBatchBackend,
+    "openai": OpenAIBatchBackend,
+}
+
+
+def resolve_batch_backend(backend: Union[str, BatchBackend]) -> BatchBackend:
+    if isinstance(backend, BatchBackend):
+        return backend
+    if backend not in BATCH_BACKENDS:
+        raise ValueError(f"Unsupported batch backend: {backend}. Supported backends are: {', '.join(BATCH_BACKENDS)}.")
+    return BATCH_BACKENDS[backend]()
+
+
+class BatchJob:
+    """
+    A batch job persisted in `job_dir` (inputs, `requests.jsonl`, `manifest.json`, `results.jsonl`),
+    so that it can be polled and collected from another process. A submission interrupted before
+    its job id was saved finds the job by the hash of `requests.jsonl` instead of submitting it again.
+    """
+
+    def __init__(self, job_dir: str, backend: Union[str, BatchBackend] = "openai"):
+        self.job_dir = job_dir
+        self.backend = resolve_batch_backend(backend)
+        self.manifest: Dict[str, Any] = {}
+        if os.path.exists(self._path("manifest.json")):
+            with open(self._path("manifest.json"), encoding="utf-8") as f:
+                self.manifest = json.load(f)
+
+    @property
+    def submitted(self) -> bool:
+        return "job_id" in self.manifest
+
+    @property
+    def inputs(self) -> List[Dict[str, Any]]:
+        with open(self._path("inputs.json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    def submit(self, chain: object, inputs: List[Dict[str, Any]]) -> "BatchJob":
+        if self.submitted:
+            return self
+        os.makedirs(self.job_dir, exist_ok=True)
+        with open(self._path("inputs.json"), "w", encoding="utf-8") as f:
+            json.dump(inputs, f, ensure_ascii=False)
+        _write_jsonl(self._path("requests.jsonl"), render_batch_requests(chain, inputs))
+        request_hash = self._hash(self._path("requests.jsonl"))
+        interrupted = self.manifest.get("status") == SUBMITTING
+        self._save_manifest(backend=self.backend.name, n_requests=len(inputs), request_hash=request_hash, status=SUBMITTING)
+        job_id = self.backend.find(request_hash) if interrupted else None
+        if job_id is None:
+            job_id = self.backend.submit(self._path("requests.jsonl"), request_hash)
+        self._save_manifest(job_id=job_id, status=PENDING)
+        return self
+
+    def poll(self) -> str:
+        if not self.submitted:
+            raise ValueError(f"No batch job has been submitted in {self.job_dir}.")
+        if self.manifest["status"] == PENDING:
+            self._save_manifest(status=self.backend.status(self.manifest["job_id"]))
+        return self.manifest["status"]
+
+    def wait(self, poll_interval: float = 60.0, timeout: Optional[float] = None) -> str:
+        """Polls until the job is no longer pending or `timeout` seconds have passed."""
+        started = time.monotonic()
+        while self.poll() == PENDING:
+            if timeout is not None and time.monotonic() - started >= timeout:
+                break
+            time.sleep(poll_interval)
+        return self.manifest["status"]
+
+    def collect(self, parser: BaseOutputParser) -> BatchResult:
+        """Parses the results of a completed job. Requests without a valid answer end up in `failures`."""
+        status = self.poll()
+        if status != COMPLETED:
+            raise ValueError(f"Batch job {self.manifest['job_id']} is {status}, results are not available.")
+        if not os.path.exists(self._path("results.jsonl")):
+            self.backend.download(self.manifest["job_id"], self._path("results.jsonl"))
+
+        inputs = self.inputs
+        answers = {str(row["custom_id"]): row for row in _read_jsonl(self._path("results.jsonl"))}
+        results, failures = [], []
+        for position, input in enumerate(inputs):
+            answer = answers.get(str(position))
+            try:
+                if answer is None:
+                    raise ValueError("No result returned for the request.")
+                if answer.get("error"):
+                    raise RuntimeError(answer["error"])
+                if hasattr(parser, "parse_with_context"):
+                    results.append(parser.parse_with_context(answer["content"], input))
+                else:
+                    results.append(parser.parse(answer["content"]))
+            except Exception as e:
+                failures.append(BatchFailure(position=position, index=input.get("index"), error=e, attempts=1))
+        return BatchResult(results, failures)
+
+    def _save_manifest(self, **fields) -> None:
+        self.manifest.update(fields)
+        with atomic_write(self._path("manifest.json")) as f:
+            json.dump(self.manifest, f, indent=2)
+
+    @staticmethod
+    def _hash(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.job_dir, name)
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Union
+from .factory import describe_llm
+
+
+def is_reproducible(params: Dict[str, Any]) -> bool:
+    """Whether an LLM with these sampling parameters is expected to answer the same prompt the same way."""
+    if params.get("seed") is not None:
+        return True
+    temperature = params.get("temperature")
+    return temperature is not None and float(temperature) == 0.0
+
+
+def request_key(prompt: str, identity: Dict[str, Any]) -> str:
+    """Hash of a rendered prompt and the identity (vendor, model, parameters) of the LLM it is sent to."""
+    payload = json.dumps({"prompt": prompt, **identity}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Persistent, content-addressed cache for raw LLM responses backed by SQLite.
+
+    Entries are keyed by a hash of the rendered prompt, the model identity and its
+    sampling parameters. When the stored payload grows beyond `max_size_bytes`, the
+    least recently used entries are evicted.
+
+    Sampled requests (temperature > 0) are not cached unless the LLM is seeded,
+    because their output is not expected to be reproducible. Set `cache_sampled=True`
+    to cache them anyway.
+    """
+
+    def __init__(
+            self,
+            path: str = ".sugardata_cache/responses.sqlite",
+            max_size_bytes: int = 512 * 1024 * 1024,
+            cache_sampled: bool = False
+        ):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_size_bytes = max_size_bytes
+        self.cache_sampled = cache_sampled
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.closed = False
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed_at ON responses (accessed_at)")
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def make_key(self, prompt: str, llm: object) -> Optional[str]:
+        """Returns the cache key of a request, or None if the request must bypass the cache."""
+        identity = describe_llm(llm)
+        if not self._is_cacheable(identity["params"]):
+            self.bypassed += 1
+            return None
+        return request_key(prompt, identity)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, size, time.time())
+            )
+            self._size += size - (previous[0] if previous else 0)
+            if self._size > self.max_size_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self._size = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+            self.closed = True
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "bypassed": self.bypassed, "size_bytes": self._size}
+
+    def _is_cacheable(self, params: Dict[str, Any]) -> bool:
+        return self.cache_sampled or is_reproducible(params)
+
+    def _evict(self) -> None:
+        # Evict down to 90% of the budget so that every insert does not trigger another eviction.
+        target = int(self.max_size_bytes * 0.9)
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at ASC")
+        evicted = []
+        for key, size in rows:
+            if self._size <= target:
+                break
+            evicted.append((key,))
+            self._size -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+
+
+_CACHES: Dict[str, ResponseCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def resolve_cache(cache: Optional[Union[str, ResponseCache]]) -> Optional[ResponseCache]:
+    """
+    Accepts a ResponseCache instance or a path to the SQLite file. Paths share one
+    ResponseCache (and one connection) per file for the whole process.
+    """
+    if cache is None or isinstance(cache, ResponseCache):
+        return cache
+    if isinstance(cache, str):
+        path = os.path.abspath(cache)
+        with _CACHES_LOCK:
+            resolved = _CACHES.get(path)
+            if resolved is None or resolved.closed:
+                resolved = _CACHES[path] = ResponseCache(path=path)
+            return resolved
+    raise ValueError(f"Unsupported cache: {cache!r}. Pass a ResponseCache instance or a file path.")
+
+
+def close_response_caches() -> None:
+    """Closes the caches opened from paths by `resolve_cache`."""
+    with _CACHES_LOCK:
+        caches = list(_CACHES.values())
+        _CACHES.clear()
+    for cache in caches:
+        if not cache.closed:
+            cache.close()
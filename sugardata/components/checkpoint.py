@@ -0,0 +1,112 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Type
+from pydantic import BaseModel
+from ..utility.files import atomic_write
+
+
+class RunCheckpoint:
+    """
+    Progress of a generation run in `run_dir`: `dimensions.json`, `aspects.json`, `plan.json` and
+    `results.jsonl`, an append-only log of completed results synced every `SYNC_INTERVAL` seconds.
+    A torn last line of the log is dropped on resume.
+    """
+
+    RESULTS = "results.jsonl"
+    SYNC_INTERVAL = 1.0
+
+    def __init__(self, run_dir: str, resume: bool = False):
+        self.run_dir = run_dir
+        self.resume = resume
+        self._results_file = None
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+        if not resume and os.path.exists(self._path("plan.json")):
+            raise ValueError(
+                f"{run_dir} already holds a run. Pass resume=True to continue it, or use another run_dir."
+            )
+        os.makedirs(run_dir, exist_ok=True)
+        if not resume:
+            for name in ("dimensions.json", "aspects.json", self.RESULTS):
+                if os.path.exists(self._path(name)):
+                    os.remove(self._path(name))
+        else:
+            self._drop_torn_line()
+
+    def load(self, name: str) -> Optional[Any]:
+        """Contents of `<name>.json`, or None when it has not been written yet."""
+        path = self._path(f"{name}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def save(self, name: str, value: Any) -> None:
+        with atomic_write(self._path(f"{name}.json")) as f:
+            json.dump(value, f, ensure_ascii=False)
+
+    def load_plan(self, settings: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """The saved plan, after checking that it was made with the same `settings`."""
+        plan = self.load("plan")
+        if plan is None:
+            return None
+        changed = [name for name, value in settings.items() if plan["settings"].get(name) != value]
+        if changed:
+            raise ValueError(f"Cannot resume the run in {self.run_dir}: {', '.join(changed)} changed since it was planned.")
+        return plan
+
+    def save_plan(self, seed: int, settings: Dict[str, Any], batches: List[Dict[str, Any]]) -> None:
+        self.save("plan", {"seed": seed, "settings": settings, "batches": batches})
+
+    def append_results(self, results: List[BaseModel]) -> None:
+        """Appends completed results to the log. Safe to call from several threads."""
+        if not results:
+            return
+        lines = "".join(result.model_dump_json() + "\n" for result in results)
+        with self._lock:
+            if self._results_file is None:
+                self._results_file = open(self._path(self.RESULTS), "a", encoding="utf-8")
+            self._results_file.write(lines)
+            self._results_file.flush()
+            if time.monotonic() - self._synced_at >= self.SYNC_INTERVAL:
+                os.fsync(self._results_file.fileno())
+                self._synced_at = time.monotonic()
+
+    def close(self) -> None:
+        """Syncs and closes the results log."""
+        with self._lock:
+            if self._results_file is not None:
+                self._results_file.flush()
+                os.fsync(self._results_file.fileno())
+                self._results_file.close()
+                self._results_file = None
+
+    def load_results(self, model: Type[BaseModel]) -> Dict[Any, BaseModel]:
+        """Completed results by index. The first result logged for an index wins."""
+        path = self._path(self.RESULTS)
+        results: Dict[Any, BaseModel] = {}
+        if not os.path.exists(path):
+            return results
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    result = model.model_validate_json(line)
+                except ValueError:
+                    continue
+                results.setdefault(getattr(result, "index", None), result)
+        return results
+
+    def _drop_torn_line(self) -> None:
+        # Cuts a partially written last line, so that the next append starts on a line of its own.
+        path = self._path(self.RESULTS)
+        if not os.path.exists(path):
+            return
+        with open(path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.run_dir, name)
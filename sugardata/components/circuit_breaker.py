@@ -0,0 +1,199 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Tuple
+from .scheduler import NON_RETRYABLE_STATUS_CODES
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+Transition = Optional[Tuple[str, str]]
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of sending a request while the circuit of its vendor/model is open."""
+    # Retrying is pointless until the circuit lets requests through again; see `is_retryable_error`.
+    retryable = False
+
+    def __init__(self, model: str, retry_after: float):
+        super().__init__(f"Circuit for {model} is open; requests fail fast for another {retry_after:.1f}s.")
+        self.model = model
+        self.retry_after = retry_after
+
+
+def is_circuit_failure(error: BaseException) -> bool:
+    """Server errors, timeouts, throttling and connection errors count; client errors do not."""
+    if not isinstance(error, Exception) or isinstance(error, CircuitOpenError):
+        return False
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status not in NON_RETRYABLE_STATUS_CODES
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker of one vendor/model.
+
+    The circuit opens after `failure_threshold` consecutive failures, or when at least
+    `failure_rate` of the last `window` requests failed. While it is open, requests fail fast
+    with `CircuitOpenError` (or go to `fallback_llm`). After `reset_timeout` seconds it turns
+    half-open and lets `half_open_max_calls` probe requests through; `success_threshold`
+    successful probes close it again, a failed probe opens it for another `reset_timeout`.
+    """
+
+    def __init__(
+            self,
+            failure_threshold: int = 5,
+            failure_rate: Optional[float] = None,
+            window: int = 20,
+            reset_timeout: float = 30.0,
+            half_open_max_calls: int = 1,
+            success_threshold: int = 1,
+            fallback_llm: Optional[object] = None,
+            is_failure: Callable[[BaseException], bool] = is_circuit_failure
+        ):
+        self.failure_threshold = failure_threshold
+        self.failure_rate = failure_rate
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.success_threshold = success_threshold
+        self.fallback_llm = fallback_llm
+        self.is_failure = is_failure
+        self.opened = 0
+        self.rejected = 0
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._consecutive_failures = 0
+        self._probes = 0
+        self._probe_successes = 0
+        self._outcomes: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._expire()
+            return self._state
+
+    def retry_after(self) -> float:
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def allow_request(self) -> Tuple[bool, Transition]:
+        """Whether a request may be sent now, and the state transition this caused, if any."""
+        with self._lock:
+            transition = self._expire()
+            if self._state == CLOSED:
+                return True, transition
+            if self._state == HALF_OPEN and self._probes < self.half_open_max_calls:
+                self._probes += 1
+                return True, transition
+            self.rejected += 1
+            return False, transition
+
+    def record_success(self) -> Transition:
+        with self._lock:
+            self._consecutive_failures = 0
+            self._outcomes.append(False)
+            if self._state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+                self._probe_successes += 1
+                if self._probe_successes >= self.success_threshold:
+                    return self._move(CLOSED)
+            return None
+
+    def record_failure(self, error: BaseException) -> Transition:
+        if not self.is_failure(error):
+            return self.record_success()
+        with self._lock:
+            self._consecutive_failures += 1
+            self._outcomes.append(True)
+            if self._state == HALF_OPEN:
+                return self._move(OPEN)
+            if self._state == CLOSED and self._should_open():
+                return self._move(OPEN)
+            return None
+
+    def release(self) -> None:
+        """Frees the probe slot of a request that ended without an outcome, e.g. a cancelled one."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            self._expire()
+            return {
+                "state": self._state,
+                "consecutive_failures": self._consecutive_failures,
+                "recent_failure_rate": round(sum(self._outcomes) / len(self._outcomes), 4) if self._outcomes else 0.0,
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
+
+    def _should_open(self) -> bool:
+        if self._consecutive_failures >= self.failure_threshold:
+            return True
+        if self.failure_rate is not None and len(self._outcomes) >= self.window:
+            return sum(self._outcomes) / len(self._outcomes) >= self.failure_rate
+        return False
+
+    def _expire(self) -> Transition:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            return self._move(HALF_OPEN)
+        return None
+
+    def _move(self, state: str) -> Transition:
+        previous, self._state = self._state, state
+        self._probes = 0
+        self._probe_successes = 0
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+            self.opened += 1
+        if state == CLOSED:
+            self._consecutive_failures = 0
+            self._outcomes.clear()
+        return previous, state
+
+
+_SETTINGS: Dict[Tuple[str, Optional[str]], Dict[str, Any]] = {}
+_BREAKERS: Dict[Tuple[str, str], CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def configure_circuit_breaker(vendor: str, model: Optional[str] = None, **settings: Any) -> None:
+    """
+    Enables circuit breaking for a vendor, or for a single model when `model` is given.
+    `settings` are the arguments of `CircuitBreaker`. Every model keeps its own circuit;
+    model-level settings take precedence over vendor-level settings.
+    """
+    with _BREAKERS_LOCK:
+        _SETTINGS[(vendor, model)] = settings
+        for key in [key for key in _BREAKERS if key[0] == vendor and (model is None or key[1] == model)]:
+            del _BREAKERS[key]
+
+
+def get_circuit_breaker(vendor: str, model: str) -> Optional[CircuitBreaker]:
+    with _BREAKERS_LOCK:
+        breaker = _BREAKERS.get((vendor, model))
+        if breaker is None:
+            settings = _SETTINGS.get((vendor, model), _SETTINGS.get((vendor, None)))
+            if settings is None:
+                return None
+            breaker = _BREAKERS[(vendor, model)] = CircuitBreaker(**settings)
+        return breaker
+
+
+def clear_circuit_breakers() -> None:
+    with _BREAKERS_LOCK:
+        _SETTINGS.clear()
+        _BREAKERS.clear()
+
+
+def circuit_report() -> Dict[str, Dict[str, Any]]:
+    """State, failures, openings and rejected requests per "vendor/model"."""
+    return {f"{vendor}/{model}": breaker.report() for (vendor, model), breaker in _BREAKERS.items()}
@@ -0,0 +1,124 @@
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from .rate_limit import is_rate_limit_error
+from ..utility.config import ADAPTIVE_CONCURRENCY_DEFAULTS
+
+
+def is_timeout_error(error: BaseException) -> bool:
+    return isinstance(error, TimeoutError) or "timeout" in type(error).__name__.lower()
+
+
+class AdaptiveConcurrencyController:
+    """
+    AIMD (additive increase, multiplicative decrease) concurrency limit for one vendor/model.
+
+    The limit grows by `increase_step` after each window of `limit` successful requests
+    whose latency stays within `latency_tolerance` times the baseline latency. It is
+    multiplied by `decrease_factor` on throttling (429), timeouts and latency spikes,
+    at most once per baseline latency so that one burst of failures counts as one signal.
+
+    The baseline follows successful requests with `smoothing` and spikes with the slower
+    `spike_smoothing`, so a lasting shift in latency (a slower model, longer prompts) becomes
+    the new baseline after a few cuts instead of counting as a spike forever.
+    """
+
+    def __init__(
+            self,
+            initial_limit: int = 4,
+            min_limit: int = 1,
+            max_limit: int = 64,
+            increase_step: float = 1.0,
+            decrease_factor: float = 0.5,
+            latency_tolerance: float = 2.0,
+            smoothing: float = 0.1,
+            spike_smoothing: float = 0.05
+        ):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.smoothing = smoothing
+        self.spike_smoothing = spike_smoothing
+        self.baseline_latency: Optional[float] = None
+        self.steady_state: float = float(initial_limit)
+        self.increases = 0
+        self.decreases = 0
+        self._successes = 0
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    def current_limit(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    def record(self, latency: float, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            if error is not None and (is_rate_limit_error(error) or is_timeout_error(error)):
+                self._decrease()
+            elif error is None:
+                if self.baseline_latency is not None and latency > self.baseline_latency * self.latency_tolerance:
+                    self._decrease()
+                    self._update_baseline(latency, self.spike_smoothing)
+                else:
+                    self._update_baseline(latency, self.smoothing)
+                    self._successes += 1
+                    if self._successes >= self.current_limit():
+                        self._successes = 0
+                        if self.limit < self.max_limit:
+                            self.limit = min(self.max_limit, self.limit + self.increase_step)
+                            self.increases += 1
+            self.steady_state += self.smoothing * (self.limit - self.steady_state)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "limit": self.current_limit(),
+            "steady_state": round(self.steady_state, 2),
+            "baseline_latency": round(self.baseline_latency, 4) if self.baseline_latency is not None else None,
+            "increases": self.increases,
+            "decreases": self.decreases,
+        }
+
+    def _decrease(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < (self.baseline_latency or 0.0):
+            return
+        self._last_decrease = now
+        self._successes = 0
+        self.limit = max(float(self.min_limit), self.limit * self.decrease_factor)
+        self.decreases += 1
+
+    def _update_baseline(self, latency: float, smoothing: float) -> None:
+        if self.baseline_latency is None:
+            self.baseline_latency = latency
+        else:
+            self.baseline_latency += smoothing * (latency - self.baseline_latency)
+
+
+_CONTROLLERS: Dict[Tuple[str, str, Optional[str]], AdaptiveConcurrencyController] = {}
+_CONTROLLERS_LOCK = threading.Lock()
+
+
+def get_concurrency_controller(vendor: str, model: str, stage: Optional[str] = None) -> AdaptiveConcurrencyController:
+    """
+    Returns the controller of a vendor/model for one pipeline stage, creating it with the vendor
+    defaults. Stages get their own controllers because their requests differ in size and latency.
+    """
+    with _CONTROLLERS_LOCK:
+        controller = _CONTROLLERS.get((vendor, model, stage))
+        if controller is None:
+            controller = AdaptiveConcurrencyController(**ADAPTIVE_CONCURRENCY_DEFAULTS.get(vendor, {}))
+            _CONTROLLERS[(vendor, model, stage)] = controller
+        return controller
+
+
+def concurrency_report() -> Dict[str, Dict[str, Any]]:
+    """
+    Discovered concurrency per "vendor/model", or "vendor/model@stage" for the controllers of a
+    stage. Pin `steady_state` as `max_concurrency` once it settles.
+    """
+    return {
+        f"{vendor}/{model}" + (f"@{stage}" if stage else ""): controller.report()
+        for (vendor, model, stage), controller in _CONTROLLERS.items()
+    }
@@ -1,7 +1,39 @@
+import atexit
 from langchain_openai import ChatOpenAI
+from typing import Any, Dict
+from .registry import LLMClientRegistry
 
 
-def create_llm_object(vendor: str, model: str, **kwargs) -> object:
+VENDOR_CLASSES = {
+    "ChatOpenAI": "openai",
+    "ChatOllama": "ollama",
+    "ChatGoogleGenerativeAI": "gemini",
+    "ChatGroq": "groq",
+    "ChatTogether": "together",
+    "FakeChatModel": "fake",
+}
+
+
+def create_llm_object(vendor: str, model: str, reuse_client: bool = True, **kwargs) -> object:
+    """
+    Returns an LLM object for the vendor and model.
+    Clients are memoized by the process-wide registry unless `reuse_client` is False.
+    """
+    if not reuse_client:
+        return build_llm_object(vendor, model, **kwargs)
+    return _REGISTRY.get(vendor, model, **kwargs)
+
+
+def get_llm_registry() -> LLMClientRegistry:
+    return _REGISTRY
+
+
+def close_llm_clients() -> None:
+    """Closes the pooled connections of the process-wide registry and drops its clients."""
+    _REGISTRY.close()
+
+
+def build_llm_object(vendor: str, model: str, **kwargs) -> object:
     """
     Supported vendors:
     - openai
@@ -9,6 +41,7 @@ def create_llm_object(vendor: str, model: str, **kwargs) -> object:
     - gemini [manual installation required]
     - groq [manual installation required]
     - together [manual installation required]
+    - fake [offline, schema-valid responses for tests and benchmarks]
     """
     if vendor is None:
         raise ValueError("Vendor must be specified. Supported vendors are: openai, ollama, gemini, groq.")
@@ -41,5 +74,35 @@ def create_llm_object(vendor: str, model: str, **kwargs) -> object:
         except ImportError:
             raise ImportError("Please install `langchain-together` package to use this feature.")
         return ChatTogether(model=model, **kwargs)
+    elif vendor == "fake":
+        from .fake_llm import FakeChatModel
+        return FakeChatModel(model=model, **kwargs)
     else:
-        raise ValueError(f"Unsupported vendor: {vendor}. Supported vendors are: openai, ollama, gemini, groq.")
+        raise ValueError(f"Unsupported vendor: {vendor}. Supported vendors are: openai, ollama, gemini, groq, together, fake.")
+
+
+
+def describe_llm(llm: object) -> Dict[str, Any]:
+    """
+    Returns the identity of an LLM object: vendor, model name and the parameters
+    that affect its output (temperature, seed, ...).
+    """
+    class_name = type(llm).__name__
+    vendor = VENDOR_CLASSES.get(class_name, class_name.lower())
+    model = getattr(llm, "model_name", None) or getattr(llm, "model", None) or "unknown"
+    try:
+        params = dict(getattr(llm, "_identifying_params", {}) or {})
+    except Exception:
+        params = {}
+    for name in ("temperature", "seed"):
+        if name not in params:
+            value = getattr(llm, name, None)
+            if value is None:
+                value = (getattr(llm, "model_kwargs", None) or {}).get(name)
+            if value is not None:
+                params[name] = value
+    return {"vendor": vendor, "model": str(model), "params": params}
+
+
+_REGISTRY = LLMClientRegistry(build_llm_object)
+atexit.register(_REGISTRY.close)
@@ -0,0 +1,314 @@
+import ast
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Type
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+from pydantic import BaseModel, ConfigDict, PrivateAttr
+
+
+SCHEMA_PATTERN = re.compile(r"output schema:\s*```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL)
+INDEX_PATTERN = re.compile(r"(?:Index|İndeks):\s*(\d+)")
+REQUESTS_PATTERN = re.compile(r"^\s*(\[\{.*\}\])\s*$", re.MULTILINE)
+NER_PATTERN = re.compile(r'Original Text: "(.*)"\s*\nReplacements: (.*)')
+
+LATENCY_DISTRIBUTIONS = ("constant", "uniform", "exponential", "lognormal")
+
+WORDS = (
+    "bright", "quiet", "bitter", "golden", "restless", "gentle", "rusty", "velvet", "hollow", "vivid",
+    "morning", "river", "engine", "promise", "harbor", "window", "signal", "garden", "market", "letter",
+    "drifts", "sparkles", "lingers", "stumbles", "hums", "glows", "fades", "echoes", "blooms", "waits",
+    "softly", "again", "somehow", "always", "barely", "wildly", "slowly", "never", "truly", "almost",
+)
+NAMES = (
+    "Aurelia", "Baptiste", "Corvin", "Delphine", "Emeric", "Fenella", "Gaspard", "Honorine", "Ivo", "Jolanda",
+    "Kestrel", "Lisandro", "Marisol", "Nerys", "Oswin", "Perrine", "Quillon", "Rosalind", "Severin", "Tamsin",
+)
+
+
+class FakeLLMError(RuntimeError):
+    """A failure injected by `FakeChatModel`."""
+
+
+class FakeRateLimitError(FakeLLMError):
+    """A throttling failure injected by `FakeChatModel`."""
+    status_code = 429
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Offline chat model that answers sugardata prompts with schema-valid JSON.
+
+    The response schema is read from the format instructions in the prompt (or taken from
+    `with_structured_output`), and the request's index, packed requests and NER replacements are
+    echoed back, so every pipeline runs end to end without network access or token costs.
+
+    Latency follows `latency_distribution` around a mean of `latency` seconds. `error_rate`,
+    `rate_limit_rate` and `malformed_rate` inject failures, HTTP 429s and truncated JSON.
+    Responses are a pure function of `seed`, the prompt and how often that prompt was asked
+    before, so runs are reproducible regardless of the order in which concurrent requests finish.
+    """
+    model: str = "fake"
+    temperature: float = 0.0
+    seed: Optional[int] = None
+    latency: float = 0.0
+    latency_distribution: str = "constant"
+    latency_sigma: float = 0.5
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    malformed_rate: float = 0.0
+    chunk_size: int = 16
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    _calls: Dict[str, int] = PrivateAttr(default_factory=dict)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model": self.model, "temperature": self.temperature, "seed": self.seed}
+
+    def _generate(
+            self,
+            messages: List[BaseMessage],
+            stop: Optional[List[str]] = None,
+            run_manager: Optional[CallbackManagerForLLMRun] = None,
+            **kwargs: Any
+        ) -> ChatResult:
+        text = _prompt_text(messages)
+        rng = self._rng(text)
+        time.sleep(self._sample_latency(rng))
+        return self._result(text, self._respond(text, rng))
+
+    async def _agenerate(
+            self,
+            messages: List[BaseMessage],
+            stop: Optional[List[str]] = None,
+            run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+            **kwargs: Any
+        ) -> ChatResult:
+        text = _prompt_text(messages)
+        rng = self._rng(text)
+        await asyncio.sleep(self._sample_latency(rng))
+        return self._result(text, self._respond(text, rng))
+
+    def _stream(
+            self,
+            messages: List[BaseMessage],
+            stop: Optional[List[str]] = None,
+            run_manager: Optional[CallbackManagerForLLMRun] = None,
+            **kwargs: Any
+        ) -> Iterator[ChatGenerationChunk]:
+        text = _prompt_text(messages)
+        rng = self._rng(text)
+        time.sleep(self._sample_latency(rng))
+        yield from self._chunks(text, self._respond(text, rng))
+
+    async def _astream(
+            self,
+            messages: List[BaseMessage],
+            stop: Optional[List[str]] = None,
+            run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+            **kwargs: Any
+        ) -> AsyncIterator[ChatGenerationChunk]:
+        text = _prompt_text(messages)
+        rng = self._rng(text)
+        await asyncio.sleep(self._sample_latency(rng))
+        for chunk in self._chunks(text, self._respond(text, rng)):
+            yield chunk
+
+    def with_structured_output(self, schema: Type[BaseModel], *, include_raw: bool = False, **kwargs: Any) -> RunnableLambda:
+        """Answers with instances of `schema`, like a vendor's native structured output."""
+
+        def _answer(content: str) -> Dict[str, Any]:
+            raw = AIMessage(content=content)
+            try:
+                parsed, error = schema.model_validate_json(content), None
+            except ValueError as e:
+                parsed, error = None, e
+            return {"raw": raw, "parsed": parsed, "parsing_error": error}
+
+        def _invoke(prompt: Any) -> Any:
+            text = _prompt_text(prompt)
+            rng = self._rng(text)
+            time.sleep(self._sample_latency(rng))
+            output = _answer(self._respond(text, rng, schema.model_json_schema()))
+            return output if include_raw else output["parsed"]
+
+        async def _ainvoke(prompt: Any) -> Any:
+            text = _prompt_text(prompt)
+            rng = self._rng(text)
+            await asyncio.sleep(self._sample_latency(rng))
+            output = _answer(self._respond(text, rng, schema.model_json_schema()))
+            return output if include_raw else output["parsed"]
+
+        return RunnableLambda(_invoke, afunc=_ainvoke)
+
+    def _rng(self, text: str) -> random.Random:
+        digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+        with self._lock:
+            attempt = self._calls.get(digest, 0)
+            self._calls[digest] = attempt + 1
+        return random.Random(f"{self.seed}:{digest}:{attempt}")
+
+    def _sample_latency(self, rng: random.Random) -> float:
+        if self.latency <= 0:
+            return 0.0
+        if self.latency_distribution == "constant":
+            return self.latency
+        if self.latency_distribution == "uniform":
+            return rng.uniform(0, 2 * self.latency)
+        if self.latency_distribution == "exponential":
+            return rng.expovariate(1 / self.latency)
+        if self.latency_distribution == "lognormal":
+            # Parameterized so that the mean stays at `latency` whatever the spread.
+            return self.latency * rng.lognormvariate(-self.latency_sigma ** 2 / 2, self.latency_sigma)
+        raise ValueError(f"Unsupported latency distribution: {self.latency_distribution}. Supported distributions are: {', '.join(LATENCY_DISTRIBUTIONS)}.")
+
+    def _respond(self, text: str, rng: random.Random, schema: Optional[Dict[str, Any]] = None) -> str:
+        draw = rng.random()
+        if draw < self.rate_limit_rate:
+            raise FakeRateLimitError("429 Too Many Requests (injected by the fake LLM)")
+        if draw < self.rate_limit_rate + self.error_rate:
+            raise FakeLLMError("Internal server error (injected by the fake LLM)")
+        if schema is None:
+            schema = _schema_from_prompt(text)
+        content = json.dumps(fake_instance(schema, text, rng), ensure_ascii=False)
+        if rng.random() < self.malformed_rate:
+            # Cut the response short, like a completion that ran into its token limit.
+            content = content[:rng.randint(1, max(1, len(content) - 1))]
+        return content
+
+    def _result(self, text: str, content: str) -> ChatResult:
+        message = AIMessage(content=content, usage_metadata=_usage(text, content))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _chunks(self, text: str, content: str) -> Iterator[ChatGenerationChunk]:
+        for start in range(0, len(content), self.chunk_size):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=content[start:start + self.chunk_size]))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=_usage(text, content)))
+
+
+def _prompt_text(prompt: Any) -> str:
+    if isinstance(prompt, list):
+        return "\n".join(str(message.content) for message in prompt)
+    if hasattr(prompt, "to_string"):
+        return prompt.to_string()
+    return str(prompt)
+
+
+def _usage(text: str, content: str) -> Dict[str, int]:
+    input_tokens, output_tokens = len(text) // 4, len(content) // 4
+    return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+
+@lru_cache(maxsize=64)
+def _parse_schema(schema_text: str) -> Dict[str, Any]:
+    return json.loads(schema_text)
+
+
+def _schema_from_prompt(text: str) -> Dict[str, Any]:
+    match = SCHEMA_PATTERN.search(text)
+    if match is None:
+        raise FakeLLMError("The prompt carries no output schema for the fake LLM to answer.")
+    return _parse_schema(match.group(1))
+
+
+def fake_instance(schema: Dict[str, Any], prompt_text: str, rng: random.Random) -> Any:
+    """
+    Builds a value that validates against the JSON schema. Indices, packed requests and
+    NER replacements found in the prompt are echoed back the way a well-behaved LLM would.
+    """
+    context = {"defs": schema.get("$defs", {}), "index": None, "requests": None}
+    match = INDEX_PATTERN.search(prompt_text)
+    if match:
+        context["index"] = int(match.group(1))
+    match = REQUESTS_PATTERN.search(prompt_text)
+    if match:
+        try:
+            context["requests"] = json.loads(match.group(1))
+        except ValueError:
+            pass
+    value = _fake_value(schema, context, rng)
+    if isinstance(value, dict) and "localized_text" in value and "localized_word_mappings" in value:
+        _localize(value, prompt_text, rng)
+    return value
+
+
+def _fake_value(schema: Dict[str, Any], context: Dict[str, Any], rng: random.Random, name: str = "") -> Any:
+    if "$ref" in schema:
+        return _fake_value(context["defs"][schema["$ref"].split("/")[-1]], context, rng, name)
+    if "anyOf" in schema:
+        options = [option for option in schema["anyOf"] if option.get("type") != "null"] or schema["anyOf"]
+        return _fake_value(options[0], context, rng, name)
+    kind = schema.get("type", "object")
+    if kind == "object":
+        if "properties" not in schema:
+            return {}
+        return {
+            field: _fake_value(field_schema, context, rng, field)
+            for field, field_schema in schema["properties"].items()
+        }
+    if kind == "array":
+        item_schema = schema.get("items", {})
+        if context["requests"] and _has_index(item_schema, context):
+            items = []
+            for request in context["requests"]:
+                item = _fake_value(item_schema, context, rng)
+                item["index"] = request.get("index", len(items))
+                items.append(item)
+            return items
+        return [_fake_value(item_schema, context, rng, name) for _ in range(rng.randint(2, 5))]
+    if kind == "integer":
+        if name == "index" and context["index"] is not None:
+            return context["index"]
+        return rng.randint(0, 100)
+    if kind == "number":
+        return round(rng.random(), 4)
+    if kind == "boolean":
+        return rng.random() < 0.5
+    if kind == "string" and "enum" in schema:
+        return rng.choice(schema["enum"])
+    n_words = rng.randint(12, 40) if "text" in name else rng.randint(1, 3)
+    return " ".join(rng.choice(WORDS) for _ in range(n_words))
+
+
+def _has_index(schema: Dict[str, Any], context: Dict[str, Any]) -> bool:
+    if "$ref" in schema:
+        schema = context["defs"][schema["$ref"].split("/")[-1]]
+    return "index" in schema.get("properties", {})
+
+
+def _localize(value: Dict[str, Any], prompt_text: str, rng: random.Random) -> None:
+    # Replace every entity of the original text with a made-up name, so that the localized
+    # text actually contains the localized entities the mapping points to.
+    match = NER_PATTERN.search(prompt_text)
+    if match is None:
+        return
+    text = match.group(1)
+    try:
+        replacements = ast.literal_eval(match.group(2))
+    except (ValueError, SyntaxError):
+        replacements = []
+    names = rng.sample(NAMES, len(NAMES))
+    mappings = {}
+    for tag in replacements:
+        for entity in tag:
+            localized = " ".join(names.pop() if names else rng.choice(WORDS).title() for _ in entity.split())
+            mappings[entity] = localized
+            text = text.replace(entity, localized)
+    value["localized_text"] = text
+    value["localized_word_mappings"] = mappings
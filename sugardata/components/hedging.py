@@ -0,0 +1,147 @@
+import asyncio
+import bisect
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+
+@dataclass
+class HedgingPolicy:
+    """
+    Opt-in hedging of slow requests (async path only).
+
+    Once a request has run longer than the `percentile` latency of the recent requests, a duplicate
+    is sent to `backup_llm` (or to the same LLM when it is None). The first valid response wins and
+    the other request is cancelled. Hedges are capped at `max_hedge_ratio` of all requests, so
+    hedging adds at most that share to the spend. No hedge is sent before `min_samples` latencies
+    have been observed. Latencies and budget are kept per vendor/model of the primary LLM, over
+    the last `window` requests (the window of the first policy used with that model).
+    """
+    percentile: float = 0.95
+    backup_llm: Optional[object] = None
+    max_hedge_ratio: float = 0.1
+    min_samples: int = 20
+    window: int = 500
+
+
+class HedgeTracker:
+    """
+    Latency history and hedge budget of one vendor/model, shared by every chain that calls it, so
+    a new chain hedges from its first request once the model has `min_samples` latencies.
+    The latencies are also kept sorted, so reading a percentile does not sort the window.
+    """
+
+    def __init__(self, window: int = 500):
+        self.latencies: deque = deque(maxlen=window)
+        self.requests = 0
+        self.hedges = 0
+        self.backup_wins = 0
+        self._sorted: List[float] = []
+        self._lock = threading.Lock()
+
+    def hedge_delay(self, policy: HedgingPolicy) -> Optional[float]:
+        with self._lock:
+            if len(self._sorted) < policy.min_samples:
+                return None
+            return self._sorted[min(len(self._sorted) - 1, int(policy.percentile * len(self._sorted)))]
+
+    def start_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def try_hedge(self, policy: HedgingPolicy) -> bool:
+        with self._lock:
+            if self.hedges + 1 > policy.max_hedge_ratio * self.requests:
+                return False
+            self.hedges += 1
+            return True
+
+    def record(self, latency: float, backup_won: bool = False) -> None:
+        with self._lock:
+            if len(self.latencies) == self.latencies.maxlen:
+                del self._sorted[bisect.bisect_left(self._sorted, self.latencies[0])]
+            self.latencies.append(latency)
+            bisect.insort(self._sorted, latency)
+            if backup_won:
+                self.backup_wins += 1
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "backup_wins": self.backup_wins,
+            "hedge_ratio": round(self.hedges / self.requests, 4) if self.requests else 0.0,
+        }
+
+
+async def run_hedged(
+        primary: Callable[[], Awaitable[Any]],
+        backup: Callable[[], Awaitable[Any]],
+        tracker: HedgeTracker,
+        policy: HedgingPolicy
+    ) -> Any:
+    """
+    Runs `primary` and, if it is still running after the hedge delay and the budget allows it,
+    `backup` as well. Returns the first successful result and cancels the other request.
+    Raises the last error when both fail.
+    """
+    tracker.start_request()
+    started = time.perf_counter()
+    first = asyncio.ensure_future(primary())
+    try:
+        delay = tracker.hedge_delay(policy)
+        if delay is not None:
+            done, _ = await asyncio.wait({first}, timeout=delay)
+            if not done and tracker.try_hedge(policy):
+                return await _race(first, asyncio.ensure_future(backup()), tracker, started)
+        result = await first
+    finally:
+        await _cancel({first})
+    tracker.record(time.perf_counter() - started)
+    return result
+
+
+async def _race(first: asyncio.Future, second: asyncio.Future, tracker: HedgeTracker, started: float) -> Any:
+    pending = {first, second}
+    error: Optional[BaseException] = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    tracker.record(time.perf_counter() - started, backup_won=task is second)
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        await _cancel(pending)
+
+
+async def _cancel(tasks: Set[asyncio.Future]) -> None:
+    # Waits for the cancelled requests to unwind, so that their bookkeeping is done before the result is returned.
+    pending = [task for task in tasks if not task.done()]
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+_TRACKERS: Dict[Tuple[str, str], HedgeTracker] = {}
+_TRACKERS_LOCK = threading.Lock()
+
+
+def get_hedge_tracker(vendor: str, model: str, window: int = 500) -> HedgeTracker:
+    """Returns the process-wide tracker of a vendor/model, creating it with `window` latencies."""
+    with _TRACKERS_LOCK:
+        tracker = _TRACKERS.get((vendor, model))
+        if tracker is None:
+            tracker = HedgeTracker(window)
+            _TRACKERS[(vendor, model)] = tracker
+        return tracker
+
+
+def hedging_report() -> Dict[str, Dict[str, Any]]:
+    """Requests, hedges sent and hedges that won per "vendor/model" of the primary LLM."""
+    return {f"{vendor}/{model}": tracker.report() for (vendor, model), tracker in _TRACKERS.items()}
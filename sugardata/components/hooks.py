@@ -0,0 +1,267 @@
+import contextvars
+import cProfile
+import io
+import pstats
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+
+# When the request currently being run entered its queue (set by `CustomChain.batch`/`abatch`).
+QUEUED_AT: contextvars.ContextVar = contextvars.ContextVar("sugardata_queued_at", default=None)
+
+PROFILE_MODES = ("cprofile", "tracemalloc")
+
+
+@dataclass
+class StageEvent:
+    """A pipeline stage. `items` and `failures` count the items the stage produced and lost; they are set when it ends."""
+    stage: str
+    started: float
+    duration: Optional[float] = None
+    items: Optional[int] = None
+    failures: int = 0
+    error: Optional[BaseException] = None
+
+
+@dataclass
+class QueueEvent:
+    """A change of the number of items of a batch that wait for a slot (including failed items waiting to be retried)."""
+    stage: Optional[str]
+    model: str
+    delta: int
+    depth: int
+
+
+@dataclass
+class CircuitEvent:
+    """
+    A circuit breaker changed state (`previous` is set), or it turned a request away
+    while open (`action` is "failed" or "rerouted" to the fallback LLM).
+    """
+    model: str
+    state: str
+    previous: Optional[str] = None
+    action: Optional[str] = None
+
+
+@dataclass
+class RequestEvent:
+    """
+    One LLM request. `queue_wait` is the time from entering the queue (or being re-queued after a
+    failure) until the LLM call started: waiting for a slot, rendering the prompt, the cache lookup
+    and the rate limiter. `service_time` is the LLM call itself, without parsing. `coalesced` requests
+    were not sent: they shared the response of an identical request that was already in flight.
+    """
+    stage: Optional[str]
+    model: str
+    queued: float
+    started: float
+    queue_wait: float
+    service_time: Optional[float] = None
+    cached: bool = False
+    coalesced: bool = False
+    response: Optional[object] = None
+    error: Optional[BaseException] = None
+
+
+class PipelineHooks:
+    """
+    Instrumentation callbacks of a task run. Subclass it and override the events you need;
+    every method is a no-op by default. Request callbacks of the sync tasks run on worker threads.
+    """
+
+    def on_run_start(self, task: object) -> None:
+        pass
+
+    def on_run_end(self, task: object) -> None:
+        pass
+
+    def on_stage_start(self, event: StageEvent) -> None:
+        pass
+
+    def on_stage_end(self, event: StageEvent) -> None:
+        pass
+
+    def on_request_start(self, event: RequestEvent) -> None:
+        pass
+
+    def on_request_end(self, event: RequestEvent) -> None:
+        pass
+
+    def on_queue_change(self, event: QueueEvent) -> None:
+        pass
+
+    def on_circuit_change(self, event: CircuitEvent) -> None:
+        pass
+
+
+class HookList(PipelineHooks):
+    """Forwards every event to several hooks, in order."""
+
+    def __init__(self, hooks: Sequence[PipelineHooks]):
+        self.hooks = list(hooks)
+
+    def on_run_start(self, task: object) -> None:
+        for hook in self.hooks:
+            hook.on_run_start(task)
+
+    def on_run_end(self, task: object) -> None:
+        # Reverse order, so that hooks wrapping the run (e.g. profilers) unwind like nested contexts.
+        for hook in reversed(self.hooks):
+            hook.on_run_end(task)
+
+    def on_stage_start(self, event: StageEvent) -> None:
+        for hook in self.hooks:
+            hook.on_stage_start(event)
+
+    def on_stage_end(self, event: StageEvent) -> None:
+        for hook in self.hooks:
+            hook.on_stage_end(event)
+
+    def on_request_start(self, event: RequestEvent) -> None:
+        for hook in self.hooks:
+            hook.on_request_start(event)
+
+    def on_request_end(self, event: RequestEvent) -> None:
+        for hook in self.hooks:
+            hook.on_request_end(event)
+
+    def on_queue_change(self, event: QueueEvent) -> None:
+        for hook in self.hooks:
+            hook.on_queue_change(event)
+
+    def on_circuit_change(self, event: CircuitEvent) -> None:
+        for hook in self.hooks:
+            hook.on_circuit_change(event)
+
+
+def resolve_hooks(hooks: Union[None, PipelineHooks, Sequence[PipelineHooks]]) -> Optional[PipelineHooks]:
+    if hooks is None or isinstance(hooks, PipelineHooks):
+        return hooks
+    hooks = [hook for hook in hooks if hook is not None]
+    if not hooks:
+        return None
+    return hooks[0] if len(hooks) == 1 else HookList(hooks)
+
+
+class BatchQueue:
+    """
+    Wraps the per-item function of a batch so that its requests know when they were queued (at the
+    start of the batch, or when their previous attempt failed) and reports how many items are waiting
+    for a slot. Items that failed count as queued again while the retry policy would retry them.
+    """
+
+    def __init__(
+            self,
+            size: int,
+            on_change: Optional[Callable[[int, int], None]] = None,
+            retry_policy: Optional[object] = None
+        ):
+        self.started = time.perf_counter()
+        self.depth = 0
+        self.on_change = on_change
+        self.retry_policy = retry_policy
+        self._requeued: Dict[int, float] = {}
+        self._attempts: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._change(size)
+
+    def wrap(self, fn: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        def _call(item: Any) -> Any:
+            token = self._dequeue(item)
+            try:
+                result = fn(item)
+            except Exception as e:
+                self._done(item, e)
+                raise
+            finally:
+                QUEUED_AT.reset(token)
+            self._done(item)
+            return result
+        return _call
+
+    def awrap(self, fn: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        async def _call(item: Any) -> Any:
+            token = self._dequeue(item)
+            try:
+                result = await fn(item)
+            except Exception as e:
+                self._done(item, e)
+                raise
+            finally:
+                QUEUED_AT.reset(token)
+            self._done(item)
+            return result
+        return _call
+
+    def close(self) -> None:
+        """Drops the items still counted as queued, e.g. when the batch is cancelled."""
+        self._change(-self.depth)
+
+    def _dequeue(self, item: Any) -> contextvars.Token:
+        self._change(-1)
+        with self._lock:
+            self._attempts[id(item)] = self._attempts.get(id(item), 0) + 1
+        return QUEUED_AT.set(self._requeued.get(id(item), self.started))
+
+    def _done(self, item: Any, error: Optional[BaseException] = None) -> None:
+        self._requeued[id(item)] = time.perf_counter()
+        if error is not None and self.retry_policy is not None and self.retry_policy.should_retry(error, self._attempts[id(item)]):
+            self._change(1)
+
+    def _change(self, delta: int) -> None:
+        with self._lock:
+            self.depth += delta
+            depth = self.depth
+        if self.on_change is not None:
+            self.on_change(delta, depth)
+
+
+class ProfilerHooks(PipelineHooks):
+    """
+    Wraps a run in cProfile or tracemalloc and dumps the results when it ends.
+
+    With "cprofile", the stats are written to `path` (open them with `pstats` or snakeviz) and
+    the `top` entries by cumulative time are kept in `summary`. cProfile only sees the thread the
+    run was started on, so the request threads of the sync tasks are not included.
+    With "tracemalloc", the peak traced memory and the `top` allocation sites are written to `path`
+    as text and kept in `summary`.
+    """
+
+    def __init__(self, mode: str = "cprofile", path: Optional[str] = None, top: int = 25):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unsupported profile mode: {mode}. Supported modes are: {', '.join(PROFILE_MODES)}.")
+        self.mode = mode
+        self.path = path
+        self.top = top
+        self.summary: Optional[str] = None
+        self._profiler: Optional[cProfile.Profile] = None
+
+    def on_run_start(self, task: object) -> None:
+        if self.mode == "cprofile":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            tracemalloc.start()
+
+    def on_run_end(self, task: object) -> None:
+        if self.mode == "cprofile":
+            self._profiler.disable()
+            stream = io.StringIO()
+            pstats.Stats(self._profiler, stream=stream).sort_stats("cumulative").print_stats(self.top)
+            self.summary = stream.getvalue()
+            if self.path:
+                self._profiler.dump_stats(self.path)
+            return
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        lines: List[str] = [f"Peak traced memory: {peak / 1024 / 1024:.1f} MiB"]
+        lines.extend(str(stat) for stat in snapshot.statistics("lineno")[:self.top])
+        self.summary = "\n".join(lines)
+        if self.path:
+            with open(self.path, "w", encoding="utf-8") as f:
+                f.write(self.summary + "\n")
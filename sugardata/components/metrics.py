@@ -0,0 +1,284 @@
+import asyncio
+import bisect
+import threading
+import time
+from abc import ABC, abstractmethod
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+from .circuit_breaker import CLOSED, HALF_OPEN, OPEN
+from .hooks import CircuitEvent, PipelineHooks, QueueEvent, RequestEvent, StageEvent
+from ..utility.files import atomic_write
+
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CIRCUIT_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Metric {self.name} expects the labels {list(self.labelnames)}, got {list(labels)}.")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        pass
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, value: float = 1.0, **labels: str) -> None:
+        if value < 0:
+            raise ValueError("Counters can only increase.")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + value
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def inc(self, value: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + value
+
+    def dec(self, value: float = 1.0, **labels: str) -> None:
+        self.inc(-value, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: non-cumulative bucket counts (the last one is +Inf), sum and count.
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, totals = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0, 0]))
+            counts[position] += 1
+            totals[0] += value
+            totals[1] += 1
+
+    def count(self, **labels: str) -> int:
+        values = self._values.get(self._key(labels))
+        return int(values[1][1]) if values else 0
+
+    def _samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            items = [(key, list(counts), list(totals)) for key, (counts, totals) in self._values.items()]
+        for key, counts, (total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                labels = _format_labels((*self.labelnames, "le"), (*key, _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {int(count)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Metrics in the Prometheus text format, exported with `write_textfile` or served with `serve`."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get(Gauge, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+    def write_textfile(self, path: str) -> None:
+        with atomic_write(path) as f:
+            f.write(self.render())
+
+    def serve(self, port: int = 9464, address: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Serves the metrics on http://address:port/metrics from a daemon thread. Call `shutdown()` on the result to stop."""
+        registry = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((address, port), _Handler)
+        threading.Thread(target=server.serve_forever, name="sugardata-metrics", daemon=True).start()
+        return server
+
+    def clear(self) -> None:
+        with self._lock:
+            self._metrics.clear()
+
+    def _get(self, cls: type, name: str, help: str, labelnames: Sequence[str], **kwargs) -> _Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, labelnames, **kwargs)
+            elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind} with the labels {list(metric.labelnames)}.")
+            return metric
+
+
+_REGISTRY = MetricsRegistry()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    return _REGISTRY
+
+
+def serve_metrics(port: int = 9464, address: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serves the process-wide metrics over HTTP, see `MetricsRegistry.serve`."""
+    return _REGISTRY.serve(port, address)
+
+
+class MetricsHooks(PipelineHooks):
+    """
+    Feeds the task and request events into a metrics registry (the process-wide one by default).
+    With `textfile`, the registry is written there after every run and at most every `interval` seconds.
+    """
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None, textfile: Optional[str] = None, interval: float = 15.0):
+        self.registry = registry or _REGISTRY
+        self.textfile = textfile
+        self.interval = interval
+        self._written = 0.0
+        self._write_lock = threading.Lock()
+        r = self.registry
+        self.requests = r.counter("sugardata_requests_total", "LLM requests by outcome (success, error, cached, coalesced or cancelled).", ("model", "stage", "outcome"))
+        self.tokens = r.counter("sugardata_tokens_total", "Tokens reported by the LLM responses.", ("model", "direction"))
+        self.items = r.counter("sugardata_stage_items_total", "Items produced by the pipeline stages.", ("task", "stage"))
+        self.failures = r.counter("sugardata_stage_failures_total", "Items that failed after every retry.", ("task", "stage"))
+        self.stage_seconds = r.counter("sugardata_stage_seconds_total", "Wall time spent in the pipeline stages.", ("task", "stage"))
+        self.runs = r.counter("sugardata_runs_total", "Finished task runs.", ("task",))
+        self.latency = r.histogram("sugardata_request_duration_seconds", "Service time of the LLM requests.", ("model", "stage"))
+        self.queue_wait = r.histogram("sugardata_request_queue_wait_seconds", "Time the LLM requests waited before being sent.", ("model", "stage"))
+        self.in_flight = r.gauge("sugardata_requests_in_flight", "LLM requests currently running.", ("model",))
+        self.queue_depth = r.gauge("sugardata_queue_depth", "Items waiting for a slot, including failed items waiting to be retried.", ("model",))
+        self.circuit_state = r.gauge("sugardata_circuit_state", "Circuit breaker state: 0 closed, 1 half-open, 2 open.", ("model",))
+        self.circuit_rejections = r.counter("sugardata_circuit_rejections_total", "Requests turned away by an open circuit (failed or rerouted).", ("model", "action"))
+        self._task = "unknown"
+
+    def on_run_start(self, task: object) -> None:
+        self._task = type(task).__name__
+
+    def on_run_end(self, task: object) -> None:
+        self.runs.inc(task=type(task).__name__)
+        self._write()
+
+    def on_stage_end(self, event: StageEvent) -> None:
+        self.stage_seconds.inc(event.duration or 0.0, task=self._task, stage=event.stage)
+        self.items.inc(event.items or 0, task=self._task, stage=event.stage)
+        self.failures.inc(event.failures, task=self._task, stage=event.stage)
+
+    def on_request_start(self, event: RequestEvent) -> None:
+        if not (event.cached or event.coalesced):
+            self.in_flight.inc(model=event.model)
+
+    def on_request_end(self, event: RequestEvent) -> None:
+        stage = event.stage or "other"
+        if event.cached or event.coalesced:
+            self.requests.inc(model=event.model, stage=stage, outcome="cached" if event.cached else "coalesced")
+            return
+        self.in_flight.dec(model=event.model)
+        if isinstance(event.error, asyncio.CancelledError):
+            self.requests.inc(model=event.model, stage=stage, outcome="cancelled")
+            return
+        self.requests.inc(model=event.model, stage=stage, outcome="error" if event.error is not None else "success")
+        self.latency.observe(event.service_time or 0.0, model=event.model, stage=stage)
+        self.queue_wait.observe(max(0.0, event.queue_wait), model=event.model, stage=stage)
+        usage = getattr(event.response, "usage_metadata", None) or {}
+        if usage:
+            self.tokens.inc(usage.get("input_tokens", 0), model=event.model, direction="input")
+            self.tokens.inc(usage.get("output_tokens", 0), model=event.model, direction="output")
+        if self.textfile and time.monotonic() - self._written >= self.interval:
+            self._write()
+
+    def on_queue_change(self, event: QueueEvent) -> None:
+        self.queue_depth.inc(event.delta, model=event.model)
+
+    def on_circuit_change(self, event: CircuitEvent) -> None:
+        self.circuit_state.set(CIRCUIT_STATE_VALUES.get(event.state, 0), model=event.model)
+        if event.action is not None:
+            self.circuit_rejections.inc(model=event.model, action=event.action)
+
+    def _write(self) -> None:
+        if self.textfile:
+            with self._write_lock:
+                self._written = time.monotonic()
+                self.registry.write_textfile(self.textfile)
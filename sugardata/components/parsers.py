@@ -0,0 +1,270 @@
+import json
+import re
+import threading
+from functools import lru_cache
+from langchain.output_parsers import PydanticOutputParser
+from langchain_core.exceptions import OutputParserException
+from langchain_core.output_parsers import BaseOutputParser
+from langchain_core.outputs import Generation
+from pydantic import BaseModel, ValidationError
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type, get_args
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+CODE_FENCE_PATTERN = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+
+
+def loads(text: str) -> Any:
+    """Decodes strict JSON with orjson when it is installed. Raises ValueError on invalid input."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def strip_code_fences(text: str) -> str:
+    match = CODE_FENCE_PATTERN.search(text)
+    return match.group(1) if match else text
+
+
+class JsonSpanScanner:
+    """
+    Incremental brace scanner. Text can be fed in chunks, e.g. as tokens arrive from a stream,
+    and `feed` returns the (start, end) spans of the {...} objects the chunk completed, innermost first.
+    Braces inside JSON strings are ignored.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._stack: List[int] = []
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: str) -> List[Tuple[int, int]]:
+        offset = len(self.text)
+        self.text += chunk
+        spans = []
+        for i, char in enumerate(chunk, start=offset):
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._stack.append(i)
+            elif char == "}" and self._stack:
+                spans.append((self._stack.pop(), i + 1))
+        return spans
+
+
+def iter_json_object_spans(text: str) -> Iterator[Tuple[int, int]]:
+    """
+    Yields the (start, end) spans of every balanced {...} object in the text, innermost first.
+    Braces inside JSON strings are ignored. Unterminated objects are not reported.
+    """
+    yield from JsonSpanScanner().feed(text)
+
+
+@lru_cache(maxsize=64)
+def _format_instructions(model: Type[BaseModel]) -> str:
+    return PydanticOutputParser(pydantic_object=model).get_format_instructions()
+
+
+def repair_json(text: str) -> str:
+    """
+    Best-effort repair of the JSON an LLM returned:
+    strips code fences and the text around the first JSON value, drops trailing commas
+    and closes brackets left open at the end. Unterminated strings are not completed,
+    since a truncated text is not a valid answer.
+    """
+    text = strip_code_fences(text)
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        return text
+    out: List[str] = []
+    closers: List[str] = []
+    in_string = False
+    escaped = False
+    for char in text[min(starts):]:
+        if in_string:
+            out.append(char)
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            closers.append("}" if char == "{" else "]")
+        elif char in "}]":
+            _drop_trailing_comma(out)
+            out.append(closers.pop())
+            if not closers:
+                break
+            continue
+        out.append(char)
+    if in_string:
+        return "".join(out)
+    _drop_trailing_comma(out)
+    if "".join(out).rstrip().endswith(":"):
+        out.append(" null")
+    out.extend(reversed(closers))
+    return "".join(out)
+
+
+def _drop_trailing_comma(out: List[str]) -> None:
+    i = len(out) - 1
+    while i >= 0 and out[i].isspace():
+        i -= 1
+    if i >= 0 and out[i] == ",":
+        del out[i]
+
+
+class ParseStats:
+    """How often responses of one schema parsed as is, parsed after a local repair, or had to be re-asked."""
+
+    def __init__(self):
+        self.parsed = 0
+        self.repaired = 0
+        self.reasked = 0
+        self._lock = threading.Lock()
+
+    def record(self, outcome: str) -> None:
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def report(self) -> Dict[str, int]:
+        return {"parsed": self.parsed, "repaired": self.repaired, "reasked": self.reasked}
+
+
+_PARSE_STATS: Dict[str, ParseStats] = {}
+
+
+def parse_report() -> Dict[str, Dict[str, int]]:
+    """Parsed / repaired / re-asked counts per output schema since the start of the process."""
+    return {name: stats.report() for name, stats in _PARSE_STATS.items()}
+
+
+class RepairingOutputParser(PydanticOutputParser):
+    """
+    Pydantic output parser that repairs malformed JSON locally before giving up.
+
+    Responses are decoded with a fast strict decoder first. Code fences, trailing commas,
+    surrounding prose and unclosed brackets are repaired without another LLM call, and an
+    `index` the model echoed literally (`"index": "index"`) is restored from the request.
+    Only responses that cannot be repaired raise, which makes the caller re-ask the LLM.
+    """
+
+    @property
+    def stats(self) -> ParseStats:
+        return _PARSE_STATS.setdefault(self.pydantic_object.__name__, ParseStats())
+
+    def parse_result(self, result: List[Generation], *, partial: bool = False) -> Any:
+        return self.parse(result[0].text)
+
+    def parse(self, text: str) -> BaseModel:
+        return self.parse_with_context(text)
+
+    def parse_with_context(self, text: str, inputs: Optional[Dict[str, Any]] = None) -> BaseModel:
+        outcome = "parsed"
+        try:
+            data = loads(text)
+        except ValueError:
+            outcome = "repaired"
+            try:
+                data = json.loads(repair_json(text), strict=False)
+            except ValueError as e:
+                self.stats.record("reasked")
+                raise OutputParserException(f"Invalid JSON that could not be repaired: {e}", llm_output=text)
+        if self._restore_index(data, inputs):
+            outcome = "repaired"
+        try:
+            result = self.pydantic_object.model_validate(data)
+        except ValidationError as e:
+            self.stats.record("reasked")
+            raise OutputParserException(f"Failed to parse {self.pydantic_object.__name__}: {e}", llm_output=text)
+        self.stats.record(outcome)
+        return result
+
+    @property
+    def _type(self) -> str:
+        return "repairing_output_parser"
+
+    def _restore_index(self, data: Any, inputs: Optional[Dict[str, Any]]) -> bool:
+        if not inputs or "index" not in inputs or not isinstance(data, dict):
+            return False
+        if "index" not in self.pydantic_object.model_fields:
+            return False
+        index = data.get("index")
+        if isinstance(index, int) or (isinstance(index, str) and index.strip().isdigit()):
+            return False
+        data["index"] = inputs["index"]
+        return True
+
+
+class PackedOutputParser(BaseOutputParser):
+    """
+    Parses a response that holds a list of items, e.g. {"texts": [{...}, {...}]}.
+
+    Every item is validated on its own, so one malformed or truncated item does not discard
+    the rest of the response. Only a response without any valid item raises.
+    """
+    container_model: Type[BaseModel]
+    list_field: str
+
+    @property
+    def item_model(self) -> Type[BaseModel]:
+        return get_args(self.container_model.model_fields[self.list_field].annotation)[0]
+
+    def parse(self, text: str) -> BaseModel:
+        valid = []
+        for item in self._extract_items(text):
+            try:
+                valid.append(self.item_model.model_validate(item))
+            except ValidationError:
+                continue
+        if not valid:
+            raise OutputParserException(f"No valid {self.list_field} found in the response.", llm_output=text)
+        return self.container_model(**{self.list_field: valid})
+
+    def get_format_instructions(self) -> str:
+        return _format_instructions(self.container_model)
+
+    @property
+    def _type(self) -> str:
+        return "packed_output_parser"
+
+    def _extract_items(self, text: str) -> List[Any]:
+        text = strip_code_fences(text).strip()
+        try:
+            data = loads(text)
+        except ValueError:
+            try:
+                data = json.loads(repair_json(text), strict=False)
+            except ValueError:
+                return self._salvage_items(text)
+        if isinstance(data, dict):
+            data = data.get(self.list_field, [])
+        return data if isinstance(data, list) else []
+
+    def _salvage_items(self, text: str) -> List[Any]:
+        # The response is not valid JSON as a whole (e.g. truncated); keep every item object that is.
+        items = []
+        for start, end in iter_json_object_spans(text):
+            try:
+                candidate = json.loads(text[start:end])
+            except json.JSONDecodeError:
+                continue
+            if isinstance(candidate, dict) and self.list_field not in candidate:
+                items.append(candidate)
+        return items
@@ -0,0 +1,145 @@
+import asyncio
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Best-effort detection of HTTP 429 / quota errors across vendor SDKs."""
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if status == 429:
+        return True
+    name = type(error).__name__.lower()
+    if "ratelimit" in name or "resourceexhausted" in name:
+        return True
+    message = str(error).lower()
+    return "429" in message or "rate limit" in message or "too many requests" in message
+
+
+class TokenBucket:
+    """
+    Token bucket that hands out reservations.
+    The level may go negative; the caller then waits until the bucket has refilled its share.
+    """
+
+    def __init__(self, per_minute: float, burst: Optional[float] = None):
+        if per_minute <= 0:
+            raise ValueError(f"Bucket rate must be positive, got {per_minute}.")
+        self.rate = per_minute / 60.0
+        self.capacity = burst if burst is not None else per_minute
+        self.level = self.capacity
+        self.updated_at = time.monotonic()
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Takes `amount` from the bucket and returns how many seconds the caller must wait."""
+        self._refill(now)
+        self.level -= amount
+        return max(0.0, -self.level / self.rate)
+
+    def refund(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level = min(self.capacity, self.level + amount)
+
+    def drain(self, now: float) -> None:
+        self._refill(now)
+        self.level = min(self.level, 0.0)
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute budget shared by every chain that uses
+    the same vendor/model. Safe to use from threads (sync batch) and from coroutines.
+
+    Token usage is estimated before the request from the prompt length and corrected
+    with the usage metadata of the response.
+    """
+
+    def __init__(
+            self,
+            requests_per_minute: Optional[float] = None,
+            tokens_per_minute: Optional[float] = None,
+            expected_output_tokens: int = 256
+        ):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.expected_output_tokens = expected_output_tokens
+        self._lock = threading.Lock()
+
+    def estimate_tokens(self, prompt: str) -> int:
+        # ~4 characters per token is the usual rule of thumb for English BPE tokenizers.
+        return len(prompt) // 4 + self.expected_output_tokens
+
+    def acquire(self, tokens: int = 0) -> None:
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, tokens: int = 0) -> None:
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def reconcile(self, estimated_tokens: int, response: object) -> None:
+        """Corrects the token bucket with the real usage reported in the response."""
+        if self.tokens is None:
+            return
+        usage = getattr(response, "usage_metadata", None) or {}
+        actual = usage.get("total_tokens")
+        if actual is None:
+            return
+        with self._lock:
+            self.tokens.refund(estimated_tokens - actual, time.monotonic())
+
+    def on_throttled(self) -> None:
+        """Empties the request bucket after a 429 so the other callers back off too."""
+        with self._lock:
+            now = time.monotonic()
+            if self.requests is not None:
+                self.requests.drain(now)
+            if self.tokens is not None:
+                self.tokens.drain(now)
+
+    def _reserve(self, tokens: int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            wait = 0.0
+            if self.requests is not None:
+                wait = max(wait, self.requests.reserve(1, now))
+            if self.tokens is not None and tokens:
+                wait = max(wait, self.tokens.reserve(tokens, now))
+            return wait
+
+
+_RATE_LIMITERS: Dict[Tuple[str, Optional[str]], RateLimiter] = {}
+_RATE_LIMITERS_LOCK = threading.Lock()
+
+
+def configure_rate_limit(
+        vendor: str,
+        model: Optional[str] = None,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        expected_output_tokens: int = 256
+    ) -> RateLimiter:
+    """
+    Sets the process-wide budget of a vendor, or of a single model when `model` is given.
+    Model-level limits take precedence over vendor-level limits.
+    """
+    limiter = RateLimiter(requests_per_minute, tokens_per_minute, expected_output_tokens)
+    with _RATE_LIMITERS_LOCK:
+        _RATE_LIMITERS[(vendor, model)] = limiter
+    return limiter
+
+
+def get_rate_limiter(vendor: str, model: Optional[str] = None) -> Optional[RateLimiter]:
+    with _RATE_LIMITERS_LOCK:
+        return _RATE_LIMITERS.get((vendor, model)) or _RATE_LIMITERS.get((vendor, None))
+
+
+def clear_rate_limits() -> None:
+    with _RATE_LIMITERS_LOCK:
+        _RATE_LIMITERS.clear()
@@ -0,0 +1,199 @@
+import asyncio
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+# Vendors whose LangChain integration accepts `http_client` / `http_async_client`.
+SHARED_TRANSPORT_VENDORS = {"openai", "groq", "together"}
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class LLMClientRegistry:
+    """
+    Memoizes LLM client objects by (vendor, model, frozen params) and shares a pooled
+    HTTP transport between the vendors that support it.
+
+    Clients created inside an event loop are only reused within that loop, because
+    async connection pools cannot outlive the loop they were opened on.
+    Call `close()` / `aclose()` to release the connection pools, or use the registry
+    as a (async) context manager.
+    """
+
+    def __init__(
+            self,
+            builder: Callable[..., object],
+            max_connections: int = 100,
+            max_keepalive_connections: int = 20,
+            keepalive_expiry: float = 30.0,
+            timeout: float = 60.0,
+            connect_timeout: float = 10.0
+        ):
+        self.builder = builder
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.hits = 0
+        self.misses = 0
+        self._clients: Dict[Tuple, object] = {}
+        self._loops: Dict[int, asyncio.AbstractEventLoop] = {}
+        self._http_client = None
+        self._http_async_clients: Dict[int, object] = {}
+        self._create_hooks: List[Callable[[str, str, object], None]] = []
+        self._close_hooks: List[Callable[[], None]] = []
+        self._lock = threading.RLock()
+
+    def get(self, vendor: str, model: str, **params) -> object:
+        loop = _running_loop()
+        with self._lock:
+            self._prune_closed_loops()
+            key = (vendor, model, _freeze(params), id(loop) if loop else None)
+            client = self._clients.get(key)
+            if client is not None:
+                self.hits += 1
+                return client
+
+            self.misses += 1
+            client = self.builder(vendor, model, **self._with_shared_transport(vendor, params, loop))
+            self._clients[key] = client
+            if loop is not None:
+                self._loops[id(loop)] = loop
+        for hook in self._create_hooks:
+            hook(vendor, model, client)
+        return client
+
+    def on_create(self, hook: Callable[[str, str, object], None]) -> None:
+        """Registers a callback called with (vendor, model, client) whenever a new client is built."""
+        self._create_hooks.append(hook)
+
+    def on_close(self, hook: Callable[[], None]) -> None:
+        """Registers a callback called when the registry is closed."""
+        self._close_hooks.append(hook)
+
+    def http_client(self) -> object:
+        import httpx
+        with self._lock:
+            if self._http_client is None:
+                self._http_client = httpx.Client(limits=self._limits(), timeout=self._timeout())
+            return self._http_client
+
+    def http_async_client(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> object:
+        import httpx
+        loop = loop or asyncio.get_running_loop()
+        with self._lock:
+            client = self._http_async_clients.get(id(loop))
+            if client is None:
+                client = httpx.AsyncClient(limits=self._limits(), timeout=self._timeout())
+                self._http_async_clients[id(loop)] = client
+                self._loops[id(loop)] = loop
+            return client
+
+    def close(self) -> None:
+        """
+        Drops every client and closes the connection pools: the sync pool, and the async pools
+        of event loops that can still run their `aclose()` (idle loops, or loops running in
+        another thread). Pools of a loop that is already closed cannot be closed any more; call
+        `aclose()` before such a loop ends.
+        """
+        with self._lock:
+            async_clients = [(self._loops.get(loop_id), client) for loop_id, client in self._http_async_clients.items()]
+            self._clients.clear()
+            self._http_async_clients.clear()
+            self._loops.clear()
+            http_client, self._http_client = self._http_client, None
+        if http_client is not None:
+            http_client.close()
+        for loop, client in async_clients:
+            self._close_async_client(loop, client)
+        for hook in self._close_hooks:
+            hook()
+
+    async def aclose(self) -> None:
+        """Awaits the `aclose()` of every async connection pool, then does everything `close()` does."""
+        running = asyncio.get_running_loop()
+        with self._lock:
+            async_clients = [(self._loops.get(loop_id), client) for loop_id, client in self._http_async_clients.items()]
+            self._http_async_clients.clear()
+        for loop, client in async_clients:
+            if loop is running:
+                await client.aclose()
+            elif loop is not None and loop.is_running():
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(client.aclose(), loop))
+            else:
+                self._close_async_client(loop, client)
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def __enter__(self) -> "LLMClientRegistry":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    async def __aenter__(self) -> "LLMClientRegistry":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    def _with_shared_transport(self, vendor: str, params: Dict[str, Any], loop: Optional[asyncio.AbstractEventLoop]) -> Dict[str, Any]:
+        if vendor not in SHARED_TRANSPORT_VENDORS:
+            return params
+        params = dict(params)
+        params.setdefault("http_client", self.http_client())
+        if loop is not None:
+            params.setdefault("http_async_client", self.http_async_client(loop))
+        return params
+
+    def _close_async_client(self, loop: Optional[asyncio.AbstractEventLoop], client: object) -> None:
+        # An async pool can only be closed on the loop it was opened on.
+        if loop is None or loop.is_closed():
+            return
+        if not loop.is_running():
+            loop.run_until_complete(client.aclose())
+        elif loop is _running_loop():
+            loop.create_task(client.aclose())
+        else:
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop).result(self.timeout)
+
+    def _prune_closed_loops(self) -> None:
+        closed = {loop_id for loop_id, loop in self._loops.items() if loop.is_closed()}
+        if not closed:
+            return
+        self._clients = {k: v for k, v in self._clients.items() if k[-1] not in closed}
+        for loop_id in closed:
+            self._http_async_clients.pop(loop_id, None)
+            self._loops.pop(loop_id, None)
+
+    def _limits(self) -> object:
+        import httpx
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry
+        )
+
+    def _timeout(self) -> object:
+        import httpx
+        return httpx.Timeout(self.timeout, connect=self.connect_timeout)
@@ -0,0 +1,212 @@
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+NON_RETRYABLE_STATUS_CODES = {400, 401, 403, 404, 422}
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """Client errors such as bad requests or authentication failures are not worth retrying."""
+    if not isinstance(error, Exception) or getattr(error, "retryable", True) is False:
+        return False
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status not in NON_RETRYABLE_STATUS_CODES
+
+
+class ResultCallbackError(Exception):
+    """
+    An `on_result` callback failed on the result of an item. The item is reported as failed, with
+    the callback's exception as the cause, but not retried: its request already succeeded.
+    """
+    retryable = False
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Per-item retry policy of a batch.
+    Failed items wait `base_delay * 2 ** (attempt - 1)` seconds (capped by `max_delay`,
+    with full jitter) and are then re-run on their own, without recomputing the rest of the batch.
+    """
+    max_attempts: int = 3
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+    jitter: bool = True
+    retry_on: Callable[[BaseException], bool] = is_retryable_error
+
+    def should_retry(self, error: BaseException, attempts: int) -> bool:
+        return attempts < self.max_attempts and self.retry_on(error)
+
+    def delay(self, attempts: int) -> float:
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        return random.uniform(0, delay) if self.jitter else delay
+
+
+class SlidingWindowScheduler:
+    """
+    Bounded-concurrency scheduler for a whole workload.
+
+    Keeps up to `max_concurrency` coroutines in flight and starts the next item as soon
+    as any running item finishes, instead of waiting for a fixed slice to drain.
+    Results are reported with the position of the input they belong to.
+
+    When a `controller` is given, its `current_limit()` is read every time a slot frees up,
+    so the window follows the controller while never exceeding `max_concurrency`.
+
+    With a `retry_policy`, failed items go to a delayed retry queue. They get a slot back once
+    their backoff has elapsed, and retries take precedence over items that have not started yet.
+    """
+
+    def __init__(
+            self,
+            max_concurrency: int,
+            controller: Optional[object] = None,
+            retry_policy: Optional[RetryPolicy] = None
+        ):
+        if max_concurrency is None or max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be a positive integer, got {max_concurrency}.")
+        self.max_concurrency = max_concurrency
+        self.controller = controller
+        self.retry_policy = retry_policy
+
+    def window(self) -> int:
+        if self.controller is None:
+            return self.max_concurrency
+        return max(1, min(self.max_concurrency, self.controller.current_limit()))
+
+    async def iterate(
+            self,
+            fn: Callable[[Any], Awaitable[Any]],
+            items: Sequence[Any]
+        ) -> AsyncIterator[Tuple[int, Any, int]]:
+        """
+        Yields (position, result, attempts) triples in completion order.
+        Exceptions raised by `fn` on the last attempt are yielded as results instead of being raised.
+        """
+        running: Dict[asyncio.Task, Tuple[int, Any, int]] = {}
+        queue = iter(enumerate(items))
+        retries: List[Tuple[float, int, int, Any, int]] = []
+        sequence = itertools.count()
+
+        def _fill():
+            while len(running) < self.window():
+                if retries and retries[0][0] <= time.monotonic():
+                    _, _, position, item, attempts = heapq.heappop(retries)
+                else:
+                    try:
+                        position, item = next(queue)
+                    except StopIteration:
+                        return
+                    attempts = 0
+                running[asyncio.ensure_future(fn(item))] = (position, item, attempts + 1)
+
+        _fill()
+        try:
+            while running or retries:
+                if not running:
+                    await asyncio.sleep(max(0.0, retries[0][0] - time.monotonic()))
+                    _fill()
+                    continue
+                timeout = max(0.0, retries[0][0] - time.monotonic()) if retries else None
+                done, _ = await asyncio.wait(running.keys(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    position, item, attempts = running.pop(task)
+                    if task.cancelled():
+                        yield position, asyncio.CancelledError(), attempts
+                        continue
+                    error = task.exception()
+                    if error is None:
+                        yield position, task.result(), attempts
+                    elif self.retry_policy and self.retry_policy.should_retry(error, attempts):
+                        ready_at = time.monotonic() + self.retry_policy.delay(attempts)
+                        heapq.heappush(retries, (ready_at, next(sequence), position, item, attempts))
+                    else:
+                        yield position, error, attempts
+                _fill()
+        finally:
+            for task in running:
+                task.cancel()
+
+    async def run(
+            self,
+            fn: Callable[[Any], Awaitable[Any]],
+            items: Sequence[Any],
+            on_progress: Optional[Callable[[int, int], None]] = None,
+            on_result: Optional[Callable[[int, Any], None]] = None
+        ) -> Tuple[List[Any], List[int]]:
+        """
+        Runs the workload and returns the results and the attempt counts in input order.
+        `on_result` gets the position and result of every item that succeeded, as it completes.
+        An exception raised by `on_result` fails that item with a `ResultCallbackError` instead of
+        aborting the run.
+        """
+        results: List[Any] = [None] * len(items)
+        attempts: List[int] = [0] * len(items)
+        completed = 0
+        async for position, result, tries in self.iterate(fn, items):
+            results[position] = _report_result(on_result, position, result)
+            attempts[position] = tries
+            completed += 1
+            if on_progress:
+                on_progress(completed, len(items))
+        return results, attempts
+
+
+def run_threaded(
+        fn: Callable[[Any], Any],
+        items: Sequence[Any],
+        max_concurrency: Optional[int] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        on_result: Optional[Callable[[int, Any], None]] = None
+    ) -> Tuple[List[Any], List[int]]:
+    """
+    Sync counterpart of `SlidingWindowScheduler.run` backed by a thread pool.
+    Exceptions raised by `fn` are returned in place of the result. Failed items are retried
+    in later rounds that only contain the failed items. `on_result` is called on the worker
+    thread with the position and result of every item that succeeded; its exceptions fail that
+    item as in `SlidingWindowScheduler.run`.
+    """
+    def _safe_call(position: int) -> Any:
+        try:
+            result = fn(items[position])
+        except Exception as e:
+            return e
+        return _report_result(on_result, position, result)
+
+    if not items:
+        return [], []
+    results: List[Any] = [None] * len(items)
+    attempts: List[int] = [0] * len(items)
+    pending = list(range(len(items)))
+    with ThreadPoolExecutor(max_workers=max_concurrency or min(32, len(items))) as executor:
+        while pending:
+            outcomes = list(executor.map(_safe_call, pending))
+            failed = []
+            for position, outcome in zip(pending, outcomes):
+                results[position] = outcome
+                attempts[position] += 1
+                if isinstance(outcome, Exception) and retry_policy and retry_policy.should_retry(outcome, attempts[position]):
+                    failed.append(position)
+            if failed:
+                time.sleep(max(retry_policy.delay(attempts[position]) for position in failed))
+            pending = failed
+    return results, attempts
+
+
+def _report_result(on_result: Optional[Callable[[int, Any], None]], position: int, result: Any) -> Any:
+    """Hands a successful result to `on_result`; returns the result, or the callback's failure in its place."""
+    if on_result is None or isinstance(result, BaseException):
+        return result
+    try:
+        on_result(position, result)
+    except Exception as e:
+        error = ResultCallbackError(f"on_result failed for item {position}: {e!r}")
+        error.__cause__ = e
+        return error
+    return result
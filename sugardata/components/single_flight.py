@@ -0,0 +1,126 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+class _Call:
+    """A request in flight on the sync path, shared by the threads that asked for the same key."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class _AsyncCall:
+    """A request in flight on the async path; it is cancelled once every waiter has been cancelled."""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+        self.abandoned = False
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical requests: the first caller of a key (the leader) runs the
+    request, callers that arrive while it is in flight wait for its result (or error) instead of
+    sending their own. Nothing is kept once the request finishes; that is the job of `ResponseCache`.
+
+    `requests` counts the requests that were sent and `coalesced` the callers that shared one,
+    per "vendor/model".
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.counts: Dict[str, Dict[str, int]] = {}
+        self._calls: Dict[str, _Call] = {}
+        self._async_calls: Dict[Tuple[int, str], _AsyncCall] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any], model: str = "unknown/unknown") -> Tuple[Any, bool]:
+        """Returns the result of `fn` (run by this thread or the leader) and whether this thread was the leader."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            self._count(model, leader)
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, False
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, True
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]], model: str = "unknown/unknown") -> Tuple[Any, bool]:
+        """Async counterpart of `do`. Calls are only shared within one event loop."""
+        loop_key = (id(asyncio.get_running_loop()), key)
+        with self._lock:
+            call = self._async_calls.get(loop_key)
+            leader = call is None or call.abandoned
+            if leader:
+                call = self._async_calls[loop_key] = _AsyncCall(asyncio.ensure_future(fn()))
+                call.task.add_done_callback(lambda _: self._forget(loop_key, call))
+            call.waiters += 1
+            self._count(model, leader)
+        try:
+            # Shielded, so that a cancelled caller (e.g. a hedge loser) does not cancel the request of the others.
+            return await asyncio.shield(call.task), leader
+        except asyncio.CancelledError:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.abandoned = True
+                call.task.cancel()
+                await asyncio.gather(call.task, return_exceptions=True)
+            raise
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            counts = {model: dict(c) for model, c in self.counts.items()}
+        for c in counts.values():
+            total = c["requests"] + c["coalesced"]
+            c["coalesced_ratio"] = round(c["coalesced"] / total, 4) if total else 0.0
+        return counts
+
+    def clear(self) -> None:
+        with self._lock:
+            self.counts.clear()
+
+    def _count(self, model: str, leader: bool) -> None:
+        counts = self.counts.setdefault(model, {"requests": 0, "coalesced": 0})
+        counts["requests" if leader else "coalesced"] += 1
+
+    def _forget(self, loop_key: Tuple[int, str], call: _AsyncCall) -> None:
+        with self._lock:
+            if self._async_calls.get(loop_key) is call:
+                del self._async_calls[loop_key]
+
+
+_SINGLE_FLIGHT = SingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+    return _SINGLE_FLIGHT
+
+
+def configure_single_flight(enabled: bool = True) -> None:
+    """
+    Turns request coalescing on or off for the whole process. It is on by default and only
+    applies to reproducible requests (temperature 0 or a seeded LLM).
+    """
+    _SINGLE_FLIGHT.enabled = enabled
+
+
+def single_flight_report() -> Dict[str, Dict[str, Any]]:
+    """Requests sent and duplicate requests that shared an in-flight one, per "vendor/model"."""
+    return _SINGLE_FLIGHT.report()
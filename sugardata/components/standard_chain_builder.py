@@ -1,9 +1,27 @@
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
 from langchain.output_parsers import PydanticOutputParser
+from langchain_core.output_parsers import BaseOutputParser
 from langchain_core.prompts import ChatPromptTemplate
+from dataclasses import dataclass, replace
 from pydantic import BaseModel
-from tenacity import retry, stop_after_attempt, wait_exponential, RetryCallState
-from typing import Dict, Any, Optional, Tuple, List
-from .factory import create_llm_object
+from tenacity import retry, retry_if_not_exception_type, stop_after_attempt, wait_exponential, RetryCallState
+from typing import AsyncIterator, Callable, Dict, Any, Iterator, Optional, Tuple, List, Type, Union
+from .cache import ResponseCache, is_reproducible, request_key, resolve_cache
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, get_circuit_breaker
+from .concurrency import AdaptiveConcurrencyController, get_concurrency_controller
+from .factory import create_llm_object, describe_llm
+from .hedging import HedgingPolicy, get_hedge_tracker, run_hedged
+from .hooks import QUEUED_AT, BatchQueue, CircuitEvent, PipelineHooks, QueueEvent, RequestEvent
+from .parsers import JsonSpanScanner, RepairingOutputParser, loads
+from .rate_limit import RateLimiter, get_rate_limiter, is_rate_limit_error
+from .scheduler import RetryPolicy, SlidingWindowScheduler, run_threaded
+from .single_flight import get_single_flight
+from .telemetry import RunReport
 from ..utility.dynamic import DynamicUtility
 
 
@@ -14,55 +32,675 @@ def log_before_sleep(retry_state: RetryCallState):
     )
 
 
+@dataclass
+class _Request:
+    prompt_text: str
+    key: Optional[str] = None
+    cached: Optional[str] = None
+    flight_key: Optional[str] = None
+    limiter: Optional[RateLimiter] = None
+    estimated_tokens: int = 0
+    queued: float = 0.0
+    started: float = 0.0
+
+
+@dataclass
+class BatchFailure:
+    position: int
+    index: Optional[Any]
+    error: BaseException
+    attempts: int
+
+
+class BatchResult(list):
+    """
+    Successful results of a batch, in input order.
+    Items that still failed after their last attempt are described in `failures`, and `attempts`
+    holds the number of attempts of every input, in input order.
+    """
+
+    def __init__(
+            self,
+            results: Optional[List[object]] = None,
+            failures: Optional[List[BatchFailure]] = None,
+            attempts: Optional[List[int]] = None
+        ):
+        super().__init__(results or [])
+        self.failures = failures or []
+        self.attempts = attempts or []
+
+    @classmethod
+    def concat(cls, parts: List["BatchResult"]) -> "BatchResult":
+        """Joins the results of consecutive slices of one input list, with positions relative to the whole list."""
+        combined, offset = cls(), 0
+        for part in parts:
+            combined.extend(part)
+            combined.failures.extend(replace(f, position=offset + f.position) for f in part.failures)
+            combined.attempts.extend(part.attempts)
+            offset += len(part) + len(part.failures)
+        return combined
+
+    @property
+    def failed_indices(self) -> List[Any]:
+        return [f.index if f.index is not None else f.position for f in self.failures]
+
+
 class CustomChain:
 
-    def __init__(self, chain: object, format_instructions: str):
+    def __init__(
+            self,
+            chain: object,
+            format_instructions: str,
+            prompt: Optional[object] = None,
+            llm: Optional[object] = None,
+            parser: Optional[object] = None,
+            cache: Optional[ResponseCache] = None,
+            retry_policy: Optional[RetryPolicy] = None,
+            hedging: Optional[HedgingPolicy] = None,
+            structured_llm: Optional[object] = None,
+            report: Optional[RunReport] = None,
+            hooks: Optional[PipelineHooks] = None
+        ):
         self.chain = chain
         self.format_instructions = format_instructions
+        self.prompt = prompt
+        self.llm = llm
+        self.parser = parser
+        self._decomposed = prompt is not None and llm is not None and parser is not None
+        # LLM bound to the native structured output of the vendor; `llm` stays the identity for caching.
+        self.structured_llm = structured_llm if self._decomposed else None
+        self.cache = cache if self._decomposed else None
+        self.identity = describe_llm(llm) if llm is not None else None
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.hedging = hedging if self._decomposed else None
+        self._hedge_tracker = None
+        if self.hedging:
+            identity = self.identity or {"vendor": "unknown", "model": "unknown"}
+            self._hedge_tracker = get_hedge_tracker(identity["vendor"], identity["model"], self.hedging.window)
+        # Chains that share the prompt and parser of this one with another LLM (hedging backup, circuit fallback).
+        self._alternates: Dict[int, "CustomChain"] = {}
+        self.report = report if self._decomposed else None
+        self.hooks = hooks if self._decomposed else None
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10), before_sleep=log_before_sleep)
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        retry=retry_if_not_exception_type(CircuitOpenError),
+        before_sleep=log_before_sleep
+    )
     def invoke(self, inputs: Dict[str, str]) -> object:
         inputs["format_instructions"] = self.format_instructions
-        return self.chain.invoke(inputs)
+        return self._invoke_one(inputs)
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10), before_sleep=log_before_sleep)
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        retry=retry_if_not_exception_type(CircuitOpenError),
+        before_sleep=log_before_sleep
+    )
     async def ainvoke(self, inputs: Dict[str, str]) -> object:
         inputs["format_instructions"] = self.format_instructions
-        return await self.chain.ainvoke(inputs)
+        return await self._ainvoke_one(inputs)
 
-    def batch(self, inputs: List[Dict[str, str]]) -> List[object]:
+    def batch(
+            self,
+            inputs: List[Dict[str, str]],
+            on_result: Optional[Callable[[int, object], None]] = None
+        ) -> BatchResult:
+        """
+        Failed items are retried on their own according to `retry_policy`. `on_result` is called
+        with the position and result of every successful item as soon as it completes, on the
+        worker thread that ran it.
+        """
         inputs = [{"format_instructions": self.format_instructions, **input} for input in inputs]
-        results = self.chain.batch(inputs, return_exceptions=True)
-        valid_results = []
-        error_count = 0
-        for i, r in enumerate(results):
-            if isinstance(r, Exception):
-                error_count += 1
-                if error_count == 1:
-                    error_msg = str(r)[:200]
-                    print(f"Error in batch item {i}: {type(r).__name__}: {error_msg}...")
-            else:
-                valid_results.append(r)
-        if error_count > 1:
-            print(f"Total errors: {error_count}")
-        return valid_results
+        queue = self._batch_queue(len(inputs))
+        fn = queue.wrap(self._invoke_one) if queue else self._invoke_one
+        try:
+            results, attempts = run_threaded(fn, inputs, retry_policy=self.retry_policy, on_result=on_result)
+        finally:
+            if queue:
+                queue.close()
+        return self._collect_valid_results(inputs, results, attempts)
     
-    async def abatch(self, inputs: List[Dict[str, str]]) -> List[object]:
+    async def abatch(
+            self,
+            inputs: List[Dict[str, str]],
+            max_concurrency: Optional[int] = None,
+            on_progress: Optional[Callable[[int, int], None]] = None,
+            adaptive: bool = False,
+            on_result: Optional[Callable[[int, object], None]] = None
+        ) -> BatchResult:
+        """
+        Runs the inputs with at most `max_concurrency` requests in flight.
+        Free slots are refilled as soon as any request finishes. Results keep the input order.
+        `on_result` is called with the position and result of every successful item as soon as it completes.
+
+        With `adaptive=True`, the number of requests in flight follows the AIMD controller
+        of the vendor/model for the current stage, capped by `max_concurrency`.
+
+        With a `hedging` policy, slow requests are duplicated to the backup LLM and the
+        first valid response is kept.
+
+        Failed items are re-queued with backoff according to `retry_policy`, so successful
+        items are never recomputed. Items that exhaust their attempts end up in `failures`.
+        """
+        if not inputs:
+            return BatchResult()
         inputs = [{"format_instructions": self.format_instructions, **input} for input in inputs]
-        results = await self.chain.abatch(inputs, return_exceptions=True)
+        fn = self._ainvoke_hedged if self.hedging else self._ainvoke_one
+        controller = None
+        if adaptive and self.identity is not None:
+            stage = self.report.current_stage if self.report is not None else None
+            controller = get_concurrency_controller(self.identity["vendor"], self.identity["model"], stage)
+            fn = self._measured(fn, controller)
+        queue = self._batch_queue(len(inputs))
+        if queue:
+            fn = queue.awrap(fn)
+        scheduler = SlidingWindowScheduler(
+            max_concurrency or len(inputs),
+            controller=controller,
+            retry_policy=self.retry_policy
+        )
+        try:
+            results, attempts = await scheduler.run(fn, inputs, on_progress=on_progress, on_result=on_result)
+        finally:
+            if queue:
+                queue.close()
+        return self._collect_valid_results(inputs, results, attempts)
+
+    @staticmethod
+    def _measured(fn: Callable, controller: AdaptiveConcurrencyController) -> Callable:
+        async def _call(inputs: Dict[str, str]) -> object:
+            started = time.perf_counter()
+            try:
+                result = await fn(inputs)
+            except Exception as e:
+                controller.record(time.perf_counter() - started, e)
+                raise
+            controller.record(time.perf_counter() - started)
+            return result
+        return _call
+
+    def stream_items(self, inputs: Dict[str, str]) -> Iterator[BaseModel]:
+        """
+        Streams the response and yields every validated object as soon as its closing brace arrives:
+        the items of a packed response one by one, or the single object of a regular response.
+        Falls back to parsing the whole response (with repair) when no object validated on the fly.
+        """
+        inputs = {"format_instructions": self.format_instructions, **inputs}
+        item_model = self._stream_item_model()
+        if self.structured_llm is not None:
+            # Native structured output arrives as one validated object, there is nothing to parse early.
+            yield from self._items_of(self._invoke_one(inputs))
+            return
+        prompt_value = self.prompt.invoke(inputs)
+        request = self._start_request(prompt_value)
+        if request.cached is not None:
+            self._record_cache_hit(request)
+            yield from self._items_of(self._parse(request.cached, inputs))
+            return
+        fallback = self._check_circuit()
+        if fallback is not None:
+            yield from fallback.stream_items(fallback._with_format_instructions(inputs))
+            return
+        if request.limiter:
+            request.limiter.acquire(request.estimated_tokens)
+        scanner = JsonSpanScanner()
+        message = None
+        emitted = 0
+        self._begin_request(request)
+        try:
+            for chunk in self.llm.stream(prompt_value):
+                message = chunk if message is None else message + chunk
+                for start, end in scanner.feed(chunk.content if isinstance(chunk.content, str) else ""):
+                    item = self._validate_streamed(item_model, scanner.text[start:end])
+                    if item is not None:
+                        emitted += 1
+                        yield item
+        except Exception as e:
+            self._fail_request(request, e)
+            raise
+        if message is None:
+            return
+        if emitted:
+            self._settle_stream(request, message)
+        else:
+            yield from self._items_of(self._finish_request(request, message, inputs))
+
+    async def astream_items(self, inputs: Dict[str, str]) -> AsyncIterator[BaseModel]:
+        """Async counterpart of `stream_items`."""
+        inputs = {"format_instructions": self.format_instructions, **inputs}
+        item_model = self._stream_item_model()
+        if self.structured_llm is not None:
+            for item in self._items_of(await self._ainvoke_one(inputs)):
+                yield item
+            return
+        prompt_value = await self.prompt.ainvoke(inputs)
+        request = self._start_request(prompt_value)
+        if request.cached is not None:
+            self._record_cache_hit(request)
+            for item in self._items_of(self._parse(request.cached, inputs)):
+                yield item
+            return
+        fallback = self._check_circuit()
+        if fallback is not None:
+            async for item in fallback.astream_items(fallback._with_format_instructions(inputs)):
+                yield item
+            return
+        if request.limiter:
+            await request.limiter.aacquire(request.estimated_tokens)
+        scanner = JsonSpanScanner()
+        message = None
+        emitted = 0
+        self._begin_request(request)
+        try:
+            async for chunk in self.llm.astream(prompt_value):
+                message = chunk if message is None else message + chunk
+                for start, end in scanner.feed(chunk.content if isinstance(chunk.content, str) else ""):
+                    item = self._validate_streamed(item_model, scanner.text[start:end])
+                    if item is not None:
+                        emitted += 1
+                        yield item
+        except Exception as e:
+            self._fail_request(request, e)
+            raise
+        if message is None:
+            return
+        if emitted:
+            self._settle_stream(request, message)
+        else:
+            for item in self._items_of(self._finish_request(request, message, inputs)):
+                yield item
+
+    def _stream_item_model(self) -> Type[BaseModel]:
+        if not self._decomposed:
+            raise ValueError("Streaming needs a chain built from a prompt, an LLM and a parser.")
+        item_model = getattr(self.parser, "item_model", None) or getattr(self.parser, "pydantic_object", None)
+        if item_model is None:
+            raise ValueError(f"Streaming is not supported for {type(self.parser).__name__}.")
+        return item_model
+
+    def _items_of(self, result: BaseModel) -> List[BaseModel]:
+        list_field = getattr(self.parser, "list_field", None)
+        return list(getattr(result, list_field)) if list_field else [result]
+
+    @staticmethod
+    def _validate_streamed(item_model: Type[BaseModel], text: str) -> Optional[BaseModel]:
+        try:
+            return item_model.model_validate(loads(text))
+        except ValueError:
+            return None
+
+    def _settle_stream(self, request: _Request, message: object) -> None:
+        self._record_request(request, message)
+        if request.limiter:
+            request.limiter.reconcile(request.estimated_tokens, message)
+        content = getattr(message, "content", message)
+        if request.key and isinstance(content, str):
+            self.cache.set(request.key, content)
+
+    def _invoke_one(self, inputs: Dict[str, str], coalesce: bool = True) -> object:
+        if not self._uses_item_path():
+            return self.chain.invoke(inputs)
+        prompt_value = self.prompt.invoke(inputs)
+        request = self._start_request(prompt_value, coalesce)
+        if request.cached is not None:
+            self._record_cache_hit(request)
+            return self._parse(request.cached, inputs)
+        if request.flight_key is None:
+            return self._send(request, prompt_value, inputs)
+        result, leader = get_single_flight().do(
+            request.flight_key, lambda: self._send(request, prompt_value, inputs), self._model_label()
+        )
+        return result if leader else self._record_coalesced(request, result)
+
+    def _send(self, request: _Request, prompt_value: object, inputs: Dict[str, str]) -> object:
+        fallback = self._check_circuit()
+        if fallback is not None:
+            return fallback._invoke_one(fallback._with_format_instructions(inputs))
+        if request.limiter:
+            request.limiter.acquire(request.estimated_tokens)
+        self._begin_request(request)
+        try:
+            message = (self.structured_llm or self.llm).invoke(prompt_value)
+        except Exception as e:
+            self._fail_request(request, e)
+            raise
+        return self._finish_request(request, message, inputs)
+
+    async def _ainvoke_one(self, inputs: Dict[str, str], coalesce: bool = True) -> object:
+        if not self._uses_item_path():
+            return await self.chain.ainvoke(inputs)
+        prompt_value = await self.prompt.ainvoke(inputs)
+        request = self._start_request(prompt_value, coalesce)
+        if request.cached is not None:
+            self._record_cache_hit(request)
+            return self._parse(request.cached, inputs)
+        if request.flight_key is None:
+            return await self._asend(request, prompt_value, inputs)
+        result, leader = await get_single_flight().ado(
+            request.flight_key, lambda: self._asend(request, prompt_value, inputs), self._model_label()
+        )
+        return result if leader else self._record_coalesced(request, result)
+
+    async def _asend(self, request: _Request, prompt_value: object, inputs: Dict[str, str]) -> object:
+        fallback = self._check_circuit()
+        if fallback is not None:
+            return await fallback._ainvoke_one(fallback._with_format_instructions(inputs))
+        if request.limiter:
+            await request.limiter.aacquire(request.estimated_tokens)
+        self._begin_request(request)
+        try:
+            message = await (self.structured_llm or self.llm).ainvoke(prompt_value)
+        except asyncio.CancelledError as e:
+            # The losing request of a hedge; it is not an error, but hooks still see it end.
+            breaker = self._circuit_breaker()
+            if breaker is not None:
+                breaker.release()
+            if self.hooks is not None:
+                self.hooks.on_request_end(self._request_event(request, service_time=time.perf_counter() - request.started, error=e))
+            raise
+        except Exception as e:
+            self._fail_request(request, e)
+            raise
+        return self._finish_request(request, message, inputs)
+
+    async def _ainvoke_hedged(self, inputs: Dict[str, str]) -> object:
+        backup = self._alternate_chain(self.hedging.backup_llm)
+        return await run_hedged(
+            lambda: self._ainvoke_one(inputs),
+            # The backup must not join the in-flight primary request it is meant to race.
+            lambda: backup._ainvoke_one(backup._with_format_instructions(inputs), coalesce=False),
+            self._hedge_tracker,
+            self.hedging
+        )
+
+    def _alternate_chain(self, llm: Optional[object]) -> "CustomChain":
+        """This chain with another LLM, sharing the prompt, parser, cache, report and hooks."""
+        if llm is None or llm is self.llm:
+            return self
+        if id(llm) not in self._alternates:
+            structured_llm = structure_llm(llm, self.parser) if self.structured_llm is not None else None
+            format_instructions = self.format_instructions
+            if self.structured_llm is not None and structured_llm is None:
+                format_instructions = self.parser.get_format_instructions()
+            self._alternates[id(llm)] = CustomChain(
+                compose_chain(self.prompt, llm, self.parser),
+                format_instructions,
+                prompt=self.prompt,
+                llm=llm,
+                parser=self.parser,
+                cache=self.cache,
+                retry_policy=self.retry_policy,
+                structured_llm=structured_llm,
+                report=self.report,
+                hooks=self.hooks
+            )
+        return self._alternates[id(llm)]
+
+    def _with_format_instructions(self, inputs: Dict[str, str]) -> Dict[str, str]:
+        return {**inputs, "format_instructions": self.format_instructions}
+
+    def _circuit_breaker(self) -> Optional[CircuitBreaker]:
+        if self.identity is None:
+            return None
+        return get_circuit_breaker(self.identity["vendor"], self.identity["model"])
+
+    def _check_circuit(self) -> Optional["CustomChain"]:
+        """
+        Returns None when the request may go to this chain's LLM, or the fallback chain to send it
+        to while the circuit is open. Raises `CircuitOpenError` when there is no fallback.
+        """
+        breaker = self._circuit_breaker()
+        if breaker is None:
+            return None
+        allowed, transition = breaker.allow_request()
+        self._circuit_changed(breaker, transition)
+        if allowed:
+            return None
+        fallback = self._alternate_chain(breaker.fallback_llm)
+        self._circuit_changed(breaker, action="failed" if fallback is self else "rerouted")
+        if fallback is self:
+            raise CircuitOpenError(self._model_label(), breaker.retry_after())
+        return fallback
+
+    def _circuit_changed(self, breaker: CircuitBreaker, transition: Optional[Tuple[str, str]] = None, action: Optional[str] = None) -> None:
+        if transition is None and action is None:
+            return
+        state = transition[1] if transition else breaker.state
+        if self.report is not None:
+            self.report.record_circuit(self._model_label(), state, rejected=action is not None)
+        if self.hooks is not None:
+            self.hooks.on_circuit_change(CircuitEvent(
+                model=self._model_label(),
+                state=state,
+                previous=transition[0] if transition else None,
+                action=action
+            ))
+
+    def _uses_item_path(self) -> bool:
+        """Whether requests must be split into prompt, LLM and parser steps instead of running the composed chain."""
+        return self._decomposed and (
+            self.cache is not None
+            or self._rate_limiter() is not None
+            or self.structured_llm is not None
+            or self.report is not None
+            or self.hooks is not None
+            or self._circuit_breaker() is not None
+            or self._coalesces()
+            or hasattr(self.parser, "parse_with_context")
+        )
+
+    def _rate_limiter(self) -> Optional[RateLimiter]:
+        if self.identity is None:
+            return None
+        return get_rate_limiter(self.identity["vendor"], self.identity["model"])
+
+    def _coalesces(self) -> bool:
+        """Identical in-flight requests are shared only when their answer is expected to be the same."""
+        return get_single_flight().enabled and self.identity is not None and is_reproducible(self.identity["params"])
+
+    def _start_request(self, prompt_value: object, coalesce: bool = False) -> _Request:
+        request = _Request(prompt_text=prompt_value.to_string(), queued=QUEUED_AT.get() or time.perf_counter())
+        if self.cache is not None:
+            request.key = self.cache.make_key(request.prompt_text, self.llm)
+            request.cached = self.cache.get(request.key) if request.key else None
+        if coalesce and request.cached is None and self._coalesces():
+            # Native structured output answers the same prompt in another shape than the text path.
+            request.flight_key = f"{request.key or request_key(request.prompt_text, self.identity)}:{self.structured_llm is not None}"
+        request.limiter = self._rate_limiter()
+        if request.limiter:
+            request.estimated_tokens = request.limiter.estimate_tokens(request.prompt_text)
+        return request
+
+    def _fail_request(self, request: _Request, error: Exception) -> None:
+        self._record_request(request, error=error)
+        if request.limiter and is_rate_limit_error(error):
+            request.limiter.on_throttled()
+
+    def _finish_request(self, request: _Request, message: object, inputs: Dict[str, str]) -> object:
+        if self.structured_llm is not None:
+            return self._finish_structured_request(request, message, inputs)
+        self._record_request(request, message)
+        if request.limiter:
+            request.limiter.reconcile(request.estimated_tokens, message)
+        # Only responses that parse are stored, so a malformed answer is requested again next time.
+        result = self._parse(message, inputs)
+        content = getattr(message, "content", message)
+        if request.key and isinstance(content, str):
+            self.cache.set(request.key, content)
+        return result
+
+    def _finish_structured_request(self, request: _Request, output: Dict[str, Any], inputs: Dict[str, str]) -> object:
+        raw = output.get("raw")
+        self._record_request(request, raw)
+        if request.limiter:
+            request.limiter.reconcile(request.estimated_tokens, raw)
+        result = output.get("parsed")
+        if result is None:
+            # The vendor returned arguments that do not validate; fall back to the (repairing) text parser.
+            tool_calls = getattr(raw, "tool_calls", None)
+            text = json.dumps(tool_calls[0]["args"]) if tool_calls else getattr(raw, "content", "")
+            result = self._parse(text, inputs)
+        if request.key:
+            self.cache.set(request.key, result.model_dump_json())
+        return result
+
+    def _parse(self, message: object, inputs: Dict[str, str]) -> object:
+        """Parses a response, letting parsers that can repair it use the request (e.g. its index)."""
+        content = getattr(message, "content", message)
+        try:
+            if isinstance(content, str) and hasattr(self.parser, "parse_with_context"):
+                return self.parser.parse_with_context(content, inputs)
+            return self.parser.invoke(message)
+        except Exception:
+            if self.report is not None:
+                self.report.record_error()
+            raise
+
+    def _batch_queue(self, size: int) -> Optional[BatchQueue]:
+        if self.hooks is None:
+            return None
+        stage = self.report.current_stage if self.report is not None else None
+
+        def _on_change(delta: int, depth: int) -> None:
+            if delta:
+                self.hooks.on_queue_change(QueueEvent(stage=stage, model=self._model_label(), delta=delta, depth=depth))
+
+        return BatchQueue(size, on_change=_on_change, retry_policy=self.retry_policy)
+
+    def _model_label(self) -> str:
+        identity = self.identity or {"vendor": "unknown", "model": "unknown"}
+        return f"{identity['vendor']}/{identity['model']}"
+
+    def _begin_request(self, request: _Request) -> None:
+        request.started = time.perf_counter()
+        if self.hooks is not None:
+            self.hooks.on_request_start(self._request_event(request))
+
+    def _record_request(self, request: _Request, response: Optional[object] = None, error: Optional[BaseException] = None) -> None:
+        service_time = time.perf_counter() - request.started
+        breaker = self._circuit_breaker()
+        if breaker is not None:
+            self._circuit_changed(breaker, breaker.record_failure(error) if error is not None else breaker.record_success())
+        if self.report is not None:
+            self.report.record_request(self.identity, service_time, response, error)
+        if self.hooks is not None:
+            self.hooks.on_request_end(self._request_event(request, service_time=service_time, response=response, error=error))
+
+    def _record_cache_hit(self, request: _Request) -> None:
+        if self.report is not None:
+            self.report.record_cache_hit()
+        if self.hooks is not None:
+            request.started = time.perf_counter()
+            event = self._request_event(request, service_time=0.0, cached=True)
+            self.hooks.on_request_start(event)
+            self.hooks.on_request_end(event)
+
+    def _record_coalesced(self, request: _Request, result: object) -> object:
+        """Accounts for a request that shared the in-flight request of another caller; returns its own copy of the result."""
+        if self.report is not None:
+            self.report.record_coalesced()
+        if self.hooks is not None:
+            request.started = time.perf_counter()
+            event = self._request_event(request, service_time=0.0, coalesced=True)
+            self.hooks.on_request_start(event)
+            self.hooks.on_request_end(event)
+        return result.model_copy(deep=True) if isinstance(result, BaseModel) else result
+
+    def _request_event(self, request: _Request, **fields: Any) -> RequestEvent:
+        return RequestEvent(
+            stage=self.report.current_stage if self.report is not None else None,
+            model=self._model_label(),
+            queued=request.queued,
+            started=request.started,
+            queue_wait=request.started - request.queued,
+            **fields
+        )
+
+    def _collect_valid_results(self, inputs: List[Dict[str, Any]], results: List[object], attempts: List[int]) -> BatchResult:
+        if self.report is not None:
+            self.report.record_retries(sum(a - 1 for a in attempts if a > 1))
         valid_results = []
-        error_count = 0
+        failures = []
         for i, r in enumerate(results):
-            if isinstance(r, Exception):
-                error_count += 1
-                if error_count == 1:
+            if isinstance(r, BaseException):
+                failures.append(BatchFailure(position=i, index=inputs[i].get("index"), error=r, attempts=attempts[i]))
+                if len(failures) == 1:
                     error_msg = str(r)[:200]
-                    print(f"Error in batch item {i}: {type(r).__name__}: {error_msg}...")
+                    print(f"Error in batch item {i} after {attempts[i]} attempt(s): {type(r).__name__}: {error_msg}...")
             else:
                 valid_results.append(r)
-        if error_count > 1:
-            print(f"Total errors: {error_count}")
-        return valid_results
+        if len(failures) > 1:
+            print(f"Total errors: {len(failures)}")
+        return BatchResult(valid_results, failures, attempts)
+
+# Compiled prompts, parsers and composed chains are shared by every builder in the process,
+# so repeated jobs and multi-vendor runs parse a template or render a schema only once.
+MAX_CACHED_CHAINS = 256
+_CHAINS: "OrderedDict[Tuple, Tuple[Tuple[object, ...], object]]" = OrderedDict()
+_CHAINS_LOCK = threading.Lock()
+
+# Replaces the JSON schema in the prompts when the vendor enforces the schema natively.
+STRUCTURED_FORMAT_INSTRUCTIONS = "Respond with the fields of the provided response schema."
+
+
+@lru_cache(maxsize=256)
+def compile_prompt(prompt_template: str) -> ChatPromptTemplate:
+    return ChatPromptTemplate.from_template(prompt_template)
+
+
+@lru_cache(maxsize=256)
+def compile_output_parser(data_model: Type[BaseModel]) -> Tuple[PydanticOutputParser, str]:
+    parser = RepairingOutputParser(pydantic_object=data_model)
+    return parser, parser.get_format_instructions()
+
+
+def _memoized(kind: str, objects: Tuple[object, ...], build: Callable[[], object]) -> object:
+    key = (kind,) + tuple(id(obj) for obj in objects)
+    with _CHAINS_LOCK:
+        entry = _CHAINS.get(key)
+        # The objects are kept in the entry, so their ids cannot be reused while it is cached.
+        if entry is not None and all(a is b for a, b in zip(entry[0], objects)):
+            _CHAINS.move_to_end(key)
+            return entry[1]
+    value = build()
+    with _CHAINS_LOCK:
+        _CHAINS[key] = (objects, value)
+        while len(_CHAINS) > MAX_CACHED_CHAINS:
+            _CHAINS.popitem(last=False)
+    return value
+
+
+def compose_chain(prompt: object, llm: object, parser: object) -> object:
+    """Returns `prompt | llm | parser`, reusing the sequence built earlier for the same three objects."""
+    return _memoized("chain", (prompt, llm, parser), lambda: prompt | llm | parser)
+
+
+def structure_llm(llm: object, parser: object) -> Optional[object]:
+    """
+    Binds the LLM to the vendor's native structured output (JSON schema or tool calling) for the
+    schema of the parser. Returns None when the LLM does not support it.
+    """
+    data_model = getattr(parser, "pydantic_object", None) or getattr(parser, "container_model", None)
+    if data_model is None or not hasattr(llm, "with_structured_output"):
+        return None
+
+    def _build() -> Optional[object]:
+        try:
+            return llm.with_structured_output(data_model, include_raw=True)
+        except (NotImplementedError, ValueError, TypeError):
+            return None
+
+    return _memoized("structured", (llm, data_model), _build)
+
+
+def clear_chain_cache() -> None:
+    compile_prompt.cache_clear()
+    compile_output_parser.cache_clear()
+    with _CHAINS_LOCK:
+        _CHAINS.clear()
+
 
 class StandardChainBuilder:
 
@@ -76,18 +714,44 @@ class StandardChainBuilder:
             entity_model: Optional[BaseModel] = None,
             entities: Optional[Dict[str, Any]] = None,
             data_model_name: Optional[str] = "ResultModel",
+            cache: Optional[Union[str, ResponseCache]] = None,
+            retry_policy: Optional[RetryPolicy] = None,
+            parser: Optional[BaseOutputParser] = None,
+            hedging: Optional[HedgingPolicy] = None,
+            structured_output: bool = False,
+            report: Optional[RunReport] = None,
+            hooks: Optional[PipelineHooks] = None,
             **kwargs
         ):
-        prompt = ChatPromptTemplate.from_template(prompt_template)
-        parser, format_instructions = self._create_output_parser(data_model_name, entity_model, entities)
+        prompt = compile_prompt(prompt_template)
+        if parser is not None:
+            format_instructions = parser.get_format_instructions()
+        else:
+            parser, format_instructions = self._create_output_parser(data_model_name, entity_model, entities)
         if not llm:
             llm = create_llm_object(
                 vendor=model_vendor,
                 model=model_name,
                 **(model_params or {})
             )
-        base_chain = prompt | llm | parser
-        self.chain = CustomChain(base_chain, format_instructions)
+        # Native structured output drops the JSON schema from the prompt; LLMs without it keep text parsing.
+        structured_llm = structure_llm(llm, parser) if structured_output else None
+        if structured_llm is not None:
+            format_instructions = STRUCTURED_FORMAT_INSTRUCTIONS
+        base_chain = compose_chain(prompt, llm, parser)
+        self.chain = CustomChain(
+            base_chain,
+            format_instructions,
+            prompt=prompt,
+            llm=llm,
+            parser=parser,
+            cache=resolve_cache(cache),
+            retry_policy=retry_policy,
+            hedging=hedging,
+            structured_llm=structured_llm,
+            report=report,
+            hooks=hooks
+        )
 
     def build_chain(self) -> CustomChain:
         return self.chain
@@ -102,6 +766,4 @@ class StandardChainBuilder:
         if not data_model:
             data_model = DynamicUtility.create_pydantic_base_model(title, entities)
 
-        parser = PydanticOutputParser(pydantic_object=data_model)
-        format_instructions = parser.get_format_instructions()
-        return parser, format_instructions
\ No newline at end of file
+        return compile_output_parser(data_model)
\ No newline at end of file
@@ -0,0 +1,222 @@
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from ..utility.config import MODEL_PRICES
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile, `q` in [0, 100]."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+@dataclass
+class ModelUsage:
+    requests: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+
+@dataclass
+class StageReport:
+    name: str
+    wall_time: float = 0.0
+    requests: int = 0
+    cache_hits: int = 0
+    coalesced: int = 0
+    errors: int = 0
+    retries: int = 0
+    rejected: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    latencies: List[float] = field(default_factory=list)
+    models: Dict[str, ModelUsage] = field(default_factory=dict)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "wall_time": round(self.wall_time, 4),
+            "requests": self.requests,
+            "cache_hits": self.cache_hits,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "retries": self.retries,
+            "rejected": self.rejected,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "latency_p50": _round(percentile(self.latencies, 50)),
+            "latency_p95": _round(percentile(self.latencies, 95)),
+            "latency_p99": _round(percentile(self.latencies, 99)),
+        }
+
+
+class RunReport:
+    """
+    Telemetry of one task run: wall time per stage, LLM requests with their latency and
+    token usage (from the response `usage_metadata`), cache hits, requests coalesced into an
+    identical one in flight, errors, retries, requests turned away by an open circuit, the last
+    circuit state per vendor/model, the estimated cost per vendor/model and the items that
+    failed after every retry (`failures`, per stage, with their index, error and attempts).
+
+    Requests are attributed to the stage that is open when they finish. Prices are USD per
+    1M (input, output) tokens; `prices` overrides or extends `MODEL_PRICES`.
+    """
+
+    def __init__(self, prices: Optional[Dict[Tuple[str, str], Tuple[float, float]]] = None):
+        self.prices = {**MODEL_PRICES, **(prices or {})}
+        self.stages: Dict[str, StageReport] = {}
+        self.current_stage: Optional[str] = None
+        self.circuits: Dict[str, str] = {}
+        self.failures: Dict[str, List[Any]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageReport]:
+        previous = self.current_stage
+        self.current_stage = name
+        report = self._stage(name)
+        started = time.perf_counter()
+        try:
+            yield report
+        finally:
+            report.wall_time += time.perf_counter() - started
+            self.current_stage = previous
+
+    def record_request(
+            self,
+            identity: Optional[Dict[str, Any]],
+            latency: float,
+            response: Optional[object] = None,
+            error: Optional[BaseException] = None
+        ) -> None:
+        usage = getattr(response, "usage_metadata", None) or {}
+        model = f"{identity['vendor']}/{identity['model']}" if identity else "unknown/unknown"
+        with self._lock:
+            report = self._stage(self.current_stage)
+            report.requests += 1
+            report.latencies.append(latency)
+            if error is not None:
+                report.errors += 1
+            report.input_tokens += usage.get("input_tokens", 0)
+            report.output_tokens += usage.get("output_tokens", 0)
+            model_usage = report.models.setdefault(model, ModelUsage())
+            model_usage.requests += 1
+            model_usage.input_tokens += usage.get("input_tokens", 0)
+            model_usage.output_tokens += usage.get("output_tokens", 0)
+
+    def record_error(self) -> None:
+        """Counts an error that happened after the request returned, e.g. an unparseable response."""
+        with self._lock:
+            self._stage(self.current_stage).errors += 1
+
+    def record_cache_hit(self) -> None:
+        with self._lock:
+            self._stage(self.current_stage).cache_hits += 1
+
+    def record_coalesced(self) -> None:
+        """Counts a request that shared the response of an identical request in flight."""
+        with self._lock:
+            self._stage(self.current_stage).coalesced += 1
+
+    def record_retries(self, count: int) -> None:
+        if count:
+            with self._lock:
+                self._stage(self.current_stage).retries += count
+
+    def record_circuit(self, model: str, state: str, rejected: bool = False) -> None:
+        """Keeps the circuit state of a "vendor/model"; `rejected` counts a request it turned away."""
+        with self._lock:
+            self.circuits[model] = state
+            if rejected:
+                self._stage(self.current_stage).rejected += 1
+
+    def record_failures(self, stage: str, failures: List[Any]) -> None:
+        """Keeps the `BatchFailure`s of items that failed permanently in `stage`."""
+        with self._lock:
+            self.failures.setdefault(stage, []).extend(failures)
+
+    @property
+    def wall_time(self) -> float:
+        return sum(stage.wall_time for stage in self.stages.values())
+
+    def latency_percentiles(self) -> Dict[str, Optional[float]]:
+        latencies = [latency for stage in self.stages.values() for latency in stage.latencies]
+        return {f"p{q}": _round(percentile(latencies, q)) for q in (50, 95, 99)}
+
+    def usage(self) -> Dict[str, ModelUsage]:
+        totals: Dict[str, ModelUsage] = {}
+        for stage in self.stages.values():
+            for model, usage in stage.models.items():
+                total = totals.setdefault(model, ModelUsage())
+                total.requests += usage.requests
+                total.input_tokens += usage.input_tokens
+                total.output_tokens += usage.output_tokens
+        return totals
+
+    def cost(self) -> Dict[str, Optional[float]]:
+        """Estimated USD cost per "vendor/model"; None when the model has no known price."""
+        costs = {}
+        for model, usage in self.usage().items():
+            vendor, name = model.split("/", 1)
+            price = self.prices.get((vendor, name)) or self.prices.get((vendor, "*"))
+            if price is None:
+                costs[model] = None
+                continue
+            costs[model] = round((usage.input_tokens * price[0] + usage.output_tokens * price[1]) / 1_000_000, 6)
+        return costs
+
+    def summary(self) -> Dict[str, Any]:
+        costs = self.cost()
+        return {
+            "wall_time": round(self.wall_time, 4),
+            "latency": self.latency_percentiles(),
+            "stages": {name: stage.summary() for name, stage in self.stages.items()},
+            "models": {
+                model: {**usage.__dict__, "cost": costs.get(model)}
+                for model, usage in self.usage().items()
+            },
+            "total_cost": round(sum(c for c in costs.values() if c is not None), 6),
+            "circuits": dict(self.circuits),
+            "failures": {
+                stage: [
+                    {"index": failure.index, "error": repr(failure.error), "attempts": failure.attempts}
+                    for failure in failures
+                ]
+                for stage, failures in self.failures.items()
+            },
+        }
+
+    def __str__(self) -> str:
+        lines = [f"{'stage':<14}{'wall(s)':>9}{'reqs':>7}{'hits':>6}{'dups':>6}{'errs':>6}{'retry':>7}{'rej':>5}{'in_tok':>10}{'out_tok':>10}{'p50':>8}{'p95':>8}{'p99':>8}"]
+        for name, stage in self.stages.items():
+            s = stage.summary()
+            lines.append(
+                f"{name:<14}{s['wall_time']:>9.2f}{s['requests']:>7}{s['cache_hits']:>6}{s['coalesced']:>6}{s['errors']:>6}{s['retries']:>7}{s['rejected']:>5}"
+                f"{s['input_tokens']:>10}{s['output_tokens']:>10}"
+                + "".join(f"{_fmt(s[key]):>8}" for key in ("latency_p50", "latency_p95", "latency_p99"))
+            )
+        for model, cost in self.cost().items():
+            lines.append(f"cost {model}: {'n/a' if cost is None else f'${cost:.4f}'}")
+        for model, state in self.circuits.items():
+            lines.append(f"circuit {model}: {state}")
+        for stage, failures in self.failures.items():
+            lines.append(f"failed {stage}: {len(failures)} item(s)")
+        return "\n".join(lines)
+
+    def _stage(self, name: Optional[str]) -> StageReport:
+        name = name or "other"
+        if name not in self.stages:
+            self.stages[name] = StageReport(name)
+        return self.stages[name]
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 4) if value is not None else None
+
+
+def _fmt(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.3f}"
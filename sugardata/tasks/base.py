@@ -1,18 +1,118 @@
+import time
 import pandas as pd
+from langchain_core.output_parsers import BaseOutputParser
 from pydantic import BaseModel
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from contextlib import contextmanager
+from typing import Iterator, List, Dict, Any, Optional, Type
+from ..components.checkpoint import RunCheckpoint
+from ..components.hooks import StageEvent, resolve_hooks
+from ..components.scheduler import RetryPolicy
+from ..components.standard_chain_builder import BatchFailure, CustomChain, StandardChainBuilder
+from ..components.telemetry import RunReport
+from ..utility.join import JoinStats
 
 
 class NlpTask(ABC):
 
     def __init__(self, config: BaseModel):
         self.config = config
+        self.report = RunReport()
+        # Items that failed after every retry, per pipeline stage. Shared with the report handed to `on_report`.
+        self.failures: Dict[str, List[BatchFailure]] = self.report.failures
+        self.hooks = resolve_hooks(getattr(config, "hooks", None))
 
     @abstractmethod
     def generate(self, *args, **kwargs) -> None:
         pass
 
+    def _build_chain(
+            self,
+            prompt_template: str,
+            entity_model: Type[BaseModel],
+            parser: Optional[BaseOutputParser] = None
+        ) -> CustomChain:
+        return StandardChainBuilder(
+            prompt_template=prompt_template,
+            llm=self.config.llm,
+            entity_model=entity_model,
+            parser=parser,
+            cache=getattr(self.config, "cache", None),
+            retry_policy=RetryPolicy(max_attempts=getattr(self.config, "max_attempts", 3)),
+            hedging=getattr(self.config, "hedging", None),
+            structured_output=getattr(self.config, "structured_output", False),
+            report=self.report,
+            hooks=self.hooks,
+        ).build_chain()
+
+    @contextmanager
+    def _run(self) -> Iterator[None]:
+        """Wraps a whole run: fires the run hooks and publishes the report once the run succeeded."""
+        if self.hooks:
+            self.hooks.on_run_start(self)
+        try:
+            yield
+        finally:
+            if self.hooks:
+                self.hooks.on_run_end(self)
+        self._publish_report()
+
+    @contextmanager
+    def _stage(self, name: str) -> Iterator[StageEvent]:
+        """Times a pipeline stage in the report and fires the stage hooks. Set `items` on the yielded event."""
+        event = StageEvent(stage=name, started=time.perf_counter())
+        if self.hooks:
+            self.hooks.on_stage_start(event)
+        with self.report.stage(name):
+            try:
+                yield event
+            except BaseException as e:
+                event.error = e
+                raise
+            finally:
+                event.duration = time.perf_counter() - event.started
+                event.failures = len(self.failures.get(name, []))
+                if self.hooks:
+                    self.hooks.on_stage_end(event)
+
+    def _checkpoint(self) -> Optional[RunCheckpoint]:
+        run_dir = getattr(self.config, "run_dir", None)
+        if not run_dir:
+            return None
+        return RunCheckpoint(run_dir, resume=getattr(self.config, "resume", False))
+
+    def _record_failures(self, stage: str, results: List[Any]) -> None:
+        failures = getattr(results, "failures", None)
+        if failures:
+            self.report.record_failures(stage, failures)
+            if self.config.verbose:
+                print(f"Warning: {len(failures)} item(s) failed permanently in stage '{stage}'.")
+
+    def _record_join(self, stage: str, stats: JoinStats) -> None:
+        """Reports the results a join dropped because of repeated or unknown indices."""
+        if stats and self.config.verbose:
+            print(f"Warning: stage '{stage}' dropped {stats.duplicates} result(s) with a repeated index and {stats.unknown} with an unknown index.")
+
+    def _publish_report(self) -> None:
+        on_report = getattr(self.config, "on_report", None)
+        if on_report:
+            on_report(self.report)
+        if self.config.verbose:
+            print(self.report)
+
+    def _max_concurrency(self) -> Optional[int]:
+        max_concurrency = getattr(self.config, "max_concurrency", None)
+        if max_concurrency:
+            return max_concurrency
+        # Adaptive runs are bounded by the controller, not by the batch size.
+        if getattr(self.config, "adaptive_concurrency", False):
+            return None
+        return self.config.batch_size
+
+    def _report_progress(self, completed: int, total: int) -> None:
+        if completed % (self.config.batch_size * 100) == 0 or completed == total:
+            print(f"Processed {completed}/{total} requests")
+
     def _convert_to_output(self, parsed_data: List[Dict[str, Any]], obj: BaseModel) -> Any:
         export_type = self.config.export_type
         if export_type == "dataframe":
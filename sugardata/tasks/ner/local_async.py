@@ -3,13 +3,12 @@ from transformers import AutoTokenizer
 from typing import List, Dict, Any, Optional, Tuple
 from .schemas import NERLocalizerConfig, NERLocalText, NERLocalResponse, NerOutput
 from ..base import NlpTask
-from ...components.standard_chain_builder import StandardChainBuilder
 
 
 class NERLocalizerAsync(NlpTask):
 
     def __init__(self, config: NERLocalizerConfig):
-        self.config = config
+        super().__init__(config)
         self.tokenizer = None
         self._tokenizer_loaded = False
 
@@ -17,10 +16,16 @@ class NERLocalizerAsync(NlpTask):
         # Ensure tokenizer is loaded before processing
         await self._ensure_tokenizer_loaded()
         
-        batches = await self._compose_batches(examples)
-        generated_text_results = await self._generate_text(batches)
-        generated_text_results = await self._label_generated_text_tokens(examples, generated_text_results)
-        return await self._convert_to_output_async(generated_text_results, NERLocalResponse)
+        with self._run():
+            with self._stage("localization") as stage:
+                batches = await self._compose_batches(examples)
+                generated_text_results = await self._generate_text(batches)
+                stage.items = len(generated_text_results)
+            with self._stage("export") as stage:
+                generated_text_results = await self._label_generated_text_tokens(examples, generated_text_results)
+                output = await self._convert_to_output_async(generated_text_results, NERLocalResponse)
+                stage.items = len(generated_text_results)
+        return output
     
     async def _ensure_tokenizer_loaded(self):
         """Ensure tokenizer is loaded before use."""
@@ -58,11 +63,7 @@ class NERLocalizerAsync(NlpTask):
         return batches
     
     async def _generate_text(self, batches: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
-        chain = StandardChainBuilder(
-            prompt_template=self.config.prompt,
-            llm=self.config.llm,
-            entity_model=NERLocalText,
-        ).build_chain()
+        chain = self._build_chain(prompt_template=self.config.prompt, entity_model=NERLocalText)
 
         results = []
         total_batches = len(batches)
@@ -71,6 +72,7 @@ class NERLocalizerAsync(NlpTask):
         
         for i, batch in enumerate(batches, 1):
             responses = await chain.abatch(batch)
+            self._record_failures("localization", responses)
             responses = [x.model_dump() for x in responses]
             results.extend(responses)
             if self.config.verbose:
@@ -3,23 +3,28 @@ from transformers import AutoTokenizer
 from typing import List, Dict, Any, Optional, Tuple
 from .schemas import NERLocalizerConfig, NERLocalText, NERLocalResponse, NerOutput
 from ..base import NlpTask
-from ...components.standard_chain_builder import StandardChainBuilder
 
 
 class NERLocalizer(NlpTask):
 
     def __init__(self, config: NERLocalizerConfig):
-        self.config = config
+        super().__init__(config)
         if isinstance(self.config.tokenizer, str):
             self.tokenizer = AutoTokenizer.from_pretrained(self.config.tokenizer)
         else:
             self.tokenizer = self.config.tokenizer
 
     def generate(self, examples: List[Dict[str, Any]]) -> NerOutput:
-        batches = self._compose_batches(examples)
-        generated_text_results = self._generate_text(batches)
-        generated_text_results = self._label_generated_text_tokens(examples, generated_text_results)
-        return self._convert_to_output(generated_text_results, NERLocalResponse)
+        with self._run():
+            with self._stage("localization") as stage:
+                batches = self._compose_batches(examples)
+                generated_text_results = self._generate_text(batches)
+                stage.items = len(generated_text_results)
+            with self._stage("export") as stage:
+                generated_text_results = self._label_generated_text_tokens(examples, generated_text_results)
+                output = self._convert_to_output(generated_text_results, NERLocalResponse)
+                stage.items = len(generated_text_results)
+        return output
 
     def _compose_batches(self, examples: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
         rows = []
@@ -38,17 +43,14 @@ class NERLocalizer(NlpTask):
         return batches
     
     def _generate_text(self, batches: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
-        chain = StandardChainBuilder(
-            prompt_template=self.config.prompt,
-            llm=self.config.llm,
-            entity_model=NERLocalText,
-        ).build_chain()
+        chain = self._build_chain(prompt_template=self.config.prompt, entity_model=NERLocalText)
 
         results = []
         desc = f"Generating with {str(self.config.model)}"
         iterator = tqdm(batches, desc=desc, disable=not self.config.verbose)
         for batch in iterator:
             responses = chain.batch(batch)
+            self._record_failures("localization", responses)
             responses = [x.model_dump() for x in responses]
             results.extend(responses)
         return results
@@ -16,6 +16,11 @@ class NERLocalizerConfig(BaseModel):
     model: Optional[str] = Field(default=None, description="Model name or identifier for the LLM being used", examples=["gpt-3.5-turbo", "gemma3:12b"])
     export_type: str = Field(default="default", description="Output format of the generated data, e.g., 'dataframe' or 'dataset'")
     verbose: bool = Field(default=False, description="Flag to enable verbose logging during processing")
+    cache: Optional[object] = Field(default=None, description="Optional ResponseCache used to skip LLM calls for prompts that were already answered")
+    max_attempts: int = Field(default=3, description="Maximum number of attempts per item before it is reported as failed")
+    structured_output: bool = Field(default=False, description="Whether to use the vendor's native structured output instead of embedding the JSON schema in the prompt")
+    on_report: Optional[object] = Field(default=None, description="Optional callback that receives the RunReport of the run once it finishes")
+    hooks: Optional[object] = Field(default=None, description="Optional PipelineHooks (or a list of them) called at the start and end of the run, of every stage and of every LLM request")
 
     def model_post_init(self, __context):
         """Automatically assign model name from llm object after initialization."""
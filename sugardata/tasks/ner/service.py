@@ -1,11 +1,14 @@
 import asyncio
-from typing import Any, Dict, Optional, Union, Tuple, List
+from typing import Any, Callable, Dict, Optional, Union, Tuple, List
 from .local_sync import NERLocalizer
 from .local_async import NERLocalizerAsync
 from .schemas import NERLocalizerConfig
 from .helpers import assign_entity_labels, validate_localize_ner_input_examples, validate_entity_labels
 from .errors import NERValidationError
+from ...components.cache import ResponseCache, resolve_cache
 from ...components.factory import create_llm_object
+from ...components.hooks import PipelineHooks
+from ...components.telemetry import RunReport
 from ...utility.config import DEFAULT_VENDORS
 
 
@@ -22,6 +25,10 @@ def localize_ner_data(
         entity_labels: Optional[Dict[str, Tuple[int, int]]] = None,
         export_type: str = "default",
         verbose: bool = False,
+        cache: Optional[Union[str, ResponseCache]] = None,
+        structured_output: bool = False,
+        on_report: Optional[Callable[[RunReport], None]] = None,
+        hooks: Optional[Union[PipelineHooks, List[PipelineHooks]]] = None,
         **kwargs
         ):
     
@@ -53,6 +60,10 @@ def localize_ner_data(
         llm=llm,
         export_type=export_type,
         verbose=verbose,
+        cache=resolve_cache(cache),
+        structured_output=structured_output,
+        on_report=on_report,
+        hooks=hooks,
     )
 
     service = NERLocalizer(config=config)
@@ -74,6 +85,10 @@ async def localize_ner_data_async(
         entity_labels: Optional[Dict[str, Tuple[int, int]]] = None,
         export_type: str = "default",
         verbose: bool = False,
+        cache: Optional[Union[str, ResponseCache]] = None,
+        structured_output: bool = False,
+        on_report: Optional[Callable[[RunReport], None]] = None,
+        hooks: Optional[Union[PipelineHooks, List[PipelineHooks]]] = None,
         **kwargs
         ):
     
@@ -105,6 +120,10 @@ async def localize_ner_data_async(
         llm=llm,
         export_type=export_type,
         verbose=verbose,
+        cache=resolve_cache(cache),
+        structured_output=structured_output,
+        on_report=on_report,
+        hooks=hooks,
     )
 
     service = NERLocalizerAsync(config=config)
@@ -1,46 +1,77 @@
 from itertools import product
-from typing import Dict, Any, List
-from .schemas import Text, SentimentResponse, SentimentStructure, SentimentConfig, SentimentOutput
+from typing import Callable, Dict, Any, AsyncIterator, List, Optional, Set
+from .schemas import Text, Texts, SentimentResponse, SentimentStructure, SentimentConfig, SentimentOutput
+from .packing import arun_packed, collect_sentences, resolve_pack_size, stream_chunks
 from ..base import NlpTask
-from ...components.standard_chain_builder import StandardChainBuilder
+from ...components.parsers import PackedOutputParser
+from ...components.standard_chain_builder import BatchResult
+from ...utility.join import JoinUtility
 
 
 class SentimentAugmenterAsync(NlpTask):
 
     def __init__(self, config: SentimentConfig):
-        self.config = config
+        super().__init__(config)
 
     async def generate(self, examples: List[str]) -> SentimentOutput:
-        structure_list = await self._extract_structures(examples=examples)
-        batches = await self._compose_batches(structure_list)
-        sentences = await self._generate_sentences(batches)
-        parsed_rows = await self._parse_sentences(sentences, batches)
-        return await self._convert_to_output_async(parsed_rows, SentimentResponse)
+        with self._run():
+            with self._stage("structures") as stage:
+                structure_list = await self._extract_structures(examples=examples)
+                stage.items = len(structure_list)
+            with self._stage("sentences") as stage:
+                batches = await self._compose_batches(structure_list)
+                sentences = await self._generate_sentences(batches)
+                stage.items = len(sentences)
+            with self._stage("export") as stage:
+                parsed_rows = await self._parse_sentences(sentences, batches)
+                output = await self._convert_to_output_async(parsed_rows, SentimentResponse)
+                stage.items = len(parsed_rows)
+        return output
+
+    async def generate_stream(self, examples: List[str], chunk_size: Optional[int] = None) -> AsyncIterator[SentimentOutput]:
+        """
+        Same as `generate`, but yields the output in chunks, each as soon as the `abatch` of its
+        sentences completes. A chunk covers `chunk_size` sentence requests (the concurrency limit
+        by default) and has the type of the configured export. Duplicates are dropped across chunks.
+        """
+        with self._run():
+            with self._stage("structures") as stage:
+                structure_list = await self._extract_structures(examples=examples)
+                stage.items = len(structure_list)
+            with self._stage("sentences") as stage:
+                batches = await self._compose_batches(structure_list)
+                stage.items = 0
+                seen: Set[str] = set()
+                for chunk in self._stream_chunks(batches, chunk_size):
+                    sentences = await self._generate_sentences(chunk)
+                    stage.items += len(sentences)
+                    parsed_rows = await self._parse_sentences(sentences, chunk, seen)
+                    yield await self._convert_to_output_async(parsed_rows, SentimentResponse)
+
+    def _stream_chunks(self, batches: List[Dict[str, Any]], chunk_size: Optional[int]) -> List[List[Dict[str, Any]]]:
+        pack_size = self.config.pack_size if self.config.packed_sentence_prompt else None
+        chunk_size = chunk_size or self._max_concurrency() or self.config.batch_size
+        return stream_chunks(batches, chunk_size, pack_size, self.config.pack_token_budget)
     
     async def _extract_structures(self, examples: List[str]) -> List[Dict[str, Any]]:
-        chain = StandardChainBuilder(
-            prompt_template=self.config.structure_prompt,
-            llm=self.config.llm,
-            entity_model=SentimentStructure,   
-        ).build_chain()
+        chain = self._build_chain(prompt_template=self.config.structure_prompt, entity_model=SentimentStructure)
 
         batches = [{"text": example} for example in examples]
 
-        results = []
-        for i in range(0, len(batches), self.config.batch_size):
-            batch = batches[i:i + self.config.batch_size]
-            try:
-                responses = await chain.abatch(batch)
-            except Exception as e:
-                if self.config.verbose:
-                    print(f"Warning: Error processing batch {i//self.config.batch_size}: {e}. Continuing with next batch.")
-                continue
-            if not responses:
-                raise ValueError("No responses received from the chain. Please check your configuration and input data.")
-            for response in responses:
-                response_dict = response.model_dump()
-                results.append(response_dict)
-        return results
+        try:
+            responses = await chain.abatch(
+                batches,
+                max_concurrency=self._max_concurrency(),
+                adaptive=self.config.adaptive_concurrency
+            )
+            self._record_failures("structures", responses)
+        except Exception as e:
+            if self.config.verbose:
+                print(f"Warning: Error extracting structures: {e}.")
+            responses = []
+        if not responses:
+            raise ValueError("No responses received from the chain. Please check your configuration and input data.")
+        return [response.model_dump() for response in responses]
     
     async def _combine_aspects_for_structure(self, structure: Dict[str, Any]) -> List[str]:
         aspects = structure.get("aspects", [])
@@ -82,36 +113,58 @@ class SentimentAugmenterAsync(NlpTask):
         return batches
     
     async def _generate_sentences(self, batches: List[Dict[str, Any]]) -> List[Text]:
-        chain = StandardChainBuilder(
-            prompt_template=self.config.sentence_prompt,
-            llm=self.config.llm,
-            entity_model=Text
-        ).build_chain()
-
-        results = []
-        for i in range(0, len(batches), self.config.batch_size):
-            batch = batches[i:i + self.config.batch_size]
-            try:
-                responses = await chain.abatch(batch)
-                if self.config.verbose and i % (self.config.batch_size * 100) == 0:
-                    print(f"Processing batch {i // self.config.batch_size + 1}/{len(batches) // self.config.batch_size + 1}")
-            except Exception as e:
-                if self.config.verbose:
-                    print(f"Warning: Error processing batch {i//self.config.batch_size}: {e}. Continuing with next batch.")
-                continue
-            results.extend(responses)
-
-        return results
+        if self.config.pack_size and self.config.packed_sentence_prompt:
+            return await self._generate_sentences_packed(batches)
+
+        chain = self._build_chain(prompt_template=self.config.sentence_prompt, entity_model=Text)
+
+        sentences = []
+        try:
+            responses = await chain.abatch(
+                batches,
+                max_concurrency=self._max_concurrency(),
+                on_progress=self._report_progress if self.config.verbose else None,
+                adaptive=self.config.adaptive_concurrency,
+                on_result=collect_sentences(batches, sentences)
+            )
+            self._record_failures("sentences", responses)
+            return sentences
+        except Exception as e:
+            if self.config.verbose:
+                print(f"Warning: Error generating sentences: {e}.")
+            return []
     
-    async def _parse_sentences(self, sentences: List[Text], batches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    async def _generate_sentences_packed(self, batches: List[Dict[str, Any]]) -> List[Text]:
+        chain = self._build_chain(
+            prompt_template=self.config.packed_sentence_prompt,
+            entity_model=Texts,
+            parser=PackedOutputParser(container_model=Texts, list_field="texts")
+        )
+        pack_size = resolve_pack_size(self.config.pack_size, batches, self.config.pack_token_budget)
+
+        async def _run(packs: List[Dict[str, str]], on_result: Callable[[int, Texts], None]) -> BatchResult:
+            return await chain.abatch(
+                packs,
+                max_concurrency=self._max_concurrency(),
+                adaptive=self.config.adaptive_concurrency,
+                on_result=on_result
+            )
+
+        texts = await arun_packed(_run, batches, pack_size, self.config.max_attempts)
+        self._record_failures("sentences", texts)
+        return texts
+    
+    async def _parse_sentences(
+            self,
+            sentences: List[Text],
+            batches: List[Dict[str, Any]],
+            seen: Optional[Set[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """`seen` carries the rows already returned across calls, so duplicates are dropped over a whole stream."""
         results = []
-        for sentence in sentences:
-            sentence_dict = sentence.model_dump()
-            index = sentence_dict.get("index")
-            batch = next((b for b in batches if b["index"] == index), None)
-            if not batch:
-                continue
-            
+        pairs, stats = JoinUtility.join_by_index(batches, (sentence.model_dump() for sentence in sentences))
+        self._record_join("export", stats)
+        for batch, sentence_dict in pairs:
             aspect_list = batch["aspect"].split(" | ")
             aspect_list = [x.strip() for x in aspect_list if x.strip()]
 
@@ -128,7 +181,7 @@ class SentimentAugmenterAsync(NlpTask):
                 results.append(row)
 
         if not self.config.aspect_based_generation:
-            seen = set()
+            seen = set() if seen is None else seen
             unique_results = []
 
             for row in results:
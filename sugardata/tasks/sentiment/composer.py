@@ -0,0 +1,130 @@
+from collections.abc import Sequence
+from typing import Any, Dict, List, Optional, Union
+import numpy as np
+from ...utility.draw import STYLE_OPTIONS, DrawUtility
+from ...utility.rng import RowRNG
+
+
+# Probabilities of the aspects are scaled to integer weights, so that excluding drawn aspects is exact.
+WEIGHT_SCALE = 2 ** 40
+
+
+class BatchPlan(Sequence):
+    """
+    The sentence requests of a generation run, kept as integer codes and rendered into request
+    dicts only when they are accessed. Row `i` is the request with index `start + i`; slicing
+    returns a list of dicts, so a plan can stand in wherever a list of requests is expected.
+    `seed` is the seed the plan was drawn with.
+    """
+
+    def __init__(
+            self,
+            concept: str,
+            fragments: List[str],
+            fragment_codes: np.ndarray,
+            style_codes: np.ndarray,
+            single_aspect: bool,
+            seed: int,
+            start: int = 0
+        ):
+        self.concept = concept
+        self.fragments = fragments
+        self.fragment_codes = fragment_codes
+        self.style_codes = style_codes
+        self.single_aspect = single_aspect
+        self.seed = seed
+        self.start = start
+        self._styles = [(field, options) for field, options in STYLE_OPTIONS.items()]
+
+    @property
+    def indices(self) -> range:
+        return range(self.start, self.start + len(self))
+
+    def __len__(self) -> int:
+        return len(self.fragment_codes)
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        if isinstance(i, slice):
+            return [self._render(j) for j in range(*i.indices(len(self)))]
+        return self._render(range(len(self))[i])
+
+    def _render(self, i: int) -> Dict[str, Any]:
+        fragments = [self.fragments[code] for code in self.fragment_codes[i].tolist()]
+        # A single aspect keeps the trailing separator its prompt has always had.
+        aspect = f"{fragments[0]} |" if self.single_aspect else " | ".join(fragments)
+        batch = {"index": self.start + i, "concept": self.concept, "aspect": aspect}
+        for (field, options), code in zip(self._styles, self.style_codes[i].tolist()):
+            batch[field] = options[code]
+        return batch
+
+
+def compose_batch_plan(
+        concept: str,
+        dimensions: List[str],
+        aspects: Dict[str, List[str]],
+        n_sentence: int,
+        n_aspect: int,
+        label_options: List[str],
+        seed: Optional[int] = None,
+        start: int = 0
+    ) -> BatchPlan:
+    """
+    Draws the dimension, aspect, label and style of every request at once. The `n_aspect`
+    aspects of a request are distinct and drawn without replacement: the first one takes a
+    dimension uniformly at random and one of its aspects, and every next one is drawn the same
+    way from the aspects the request does not have yet. Once every distinct aspect has been
+    drawn, the next ones are drawn from all of them again, so `n_aspect` may exceed their number.
+
+    Every draw of a request comes from the `RowRNG` streams of its index, so the plan of rows
+    `start` to `start + n_sentence` is the same slice of the plan of a larger run with the same
+    seed. Without a seed, a fresh one is drawn and kept on the plan.
+    """
+    dims = [dim for dim in dimensions if aspects.get(dim)]
+    if not dims:
+        raise ValueError("None of the dimensions has aspects to compose sentence requests from.")
+    rng = RowRNG(seed)
+    rows = np.arange(start, start + n_sentence, dtype=np.uint64)
+
+    # Every (dimension, aspect) pair gets a code and an integer weight proportional to its probability.
+    pairs = [(dim, asp) for dim in dims for asp in aspects[dim]]
+    weights = np.array(
+        [max(1, WEIGHT_SCALE // (len(dims) * len(aspects[dim]))) for dim in dims for _ in aspects[dim]],
+        dtype=np.int64
+    )
+    ends = np.cumsum(weights)
+    starts = ends - weights
+    # The same aspect under two dimensions is still a repeat: drawing one pair excludes every pair of its aspect.
+    aspect_ids = np.unique([asp for _, asp in pairs], return_inverse=True)[1].reshape(-1)
+    n_distinct = int(aspect_ids.max()) + 1
+    group_size = int(np.bincount(aspect_ids).max())
+    # Pair codes of every aspect, padded with -1.
+    groups = np.full((n_distinct, group_size), -1, dtype=np.int64)
+    for code, aspect_id in enumerate(aspect_ids):
+        groups[aspect_id, np.flatnonzero(groups[aspect_id] < 0)[0]] = code
+    # Padding excludes nothing: it starts past every draw and weighs nothing.
+    pad_starts = np.append(starts, ends[-1])
+    pad_weights = np.append(weights, 0)
+
+    aspect_codes = np.empty((n_sentence, n_aspect), dtype=np.int64)
+    for j in range(n_aspect):
+        if j % n_distinct == 0:
+            excluded = np.empty((n_sentence, 0), dtype=np.int64)
+        remaining = ends[-1] - pad_weights[excluded].sum(axis=1)
+        target = (rng.bits(rows, f"aspect/{j}") >> np.uint64(11)).astype(np.int64) % remaining
+        # Maps the draw over the remaining weight back onto the full range, skipping the excluded pairs in order.
+        for column in np.sort(np.where(excluded < 0, len(pairs), excluded), axis=1).T:
+            target += np.where(pad_starts[column] <= target, pad_weights[column], 0)
+        codes = np.searchsorted(ends, target, side="right")
+        aspect_codes[:, j] = codes
+        excluded = np.concatenate([excluded, groups[aspect_ids[codes]]], axis=1)
+
+    label_codes = np.stack([rng.integers(rows, f"label/{j}", len(label_options)) for j in range(n_aspect)], axis=1)
+    fragments = [
+        f"Dimension: {dim} -> Aspect: {asp} -> Sentiment: {label}"
+        for dim, asp in pairs for label in label_options
+    ]
+    fragment_codes = (aspect_codes * len(label_options) + label_codes).astype(np.int32)
+    style_codes = DrawUtility.draw_style_codes(rng, rows)
+    return BatchPlan(
+        concept, fragments, fragment_codes, style_codes, single_aspect=n_aspect == 1, seed=rng.seed, start=start
+    )
@@ -1,15 +1,18 @@
-import random
-from typing import Dict, Any, List, Optional
-from .schemas import Dimensions, Aspects, Text, SentimentResponse, SentimentConfig, SentimentOutput
+from typing import Callable, Dict, Any, AsyncIterator, List, Optional
+from .schemas import Dimensions, Aspects, Text, Texts, SentimentResponse, SentimentConfig, SentimentOutput
+from .composer import BatchPlan, compose_batch_plan
+from .packing import arun_packed, collect_sentences, resolve_pack_size, stream_chunks
 from ..base import NlpTask
-from ...components.standard_chain_builder import StandardChainBuilder
-from ...utility.draw import DrawUtility
+from ...components.checkpoint import RunCheckpoint
+from ...components.parsers import PackedOutputParser
+from ...components.standard_chain_builder import BatchResult
+from ...utility.join import JoinUtility
 
 
 class SentimentGeneratorAsync(NlpTask):
 
     def __init__(self, config: SentimentConfig):
-        self.config = config
+        super().__init__(config)
 
     async def generate(
             self, 
@@ -17,19 +20,67 @@ class SentimentGeneratorAsync(NlpTask):
             dimensions: Optional[List[str]]=None,
             aspects: Optional[List[str]]=None
     ) -> SentimentOutput:
-        dimensions = dimensions or await self._generate_dimensions(concept)
-        aspect_map = await self._resolve_aspects(concept, dimensions, aspects)
-        batch_defs = await self._compose_batches(concept, dimensions, aspect_map)
-        sentence_objs = await self._generate_sentences(batch_defs)
-        parsed_rows = await self._merge_and_parse_batches(batch_defs, sentence_objs)
-        return await self._convert_to_output_async(parsed_rows, SentimentResponse)
+        with self._run():
+            checkpoint = self._checkpoint()
+            with self._stage("dimensions") as stage:
+                dimensions = (checkpoint and checkpoint.load("dimensions")) or dimensions or await self._generate_dimensions(concept)
+                if checkpoint:
+                    checkpoint.save("dimensions", dimensions)
+                stage.items = len(dimensions)
+            with self._stage("aspects") as stage:
+                aspect_map = (checkpoint and checkpoint.load("aspects")) or await self._resolve_aspects(concept, dimensions, aspects)
+                if checkpoint:
+                    checkpoint.save("aspects", aspect_map)
+                stage.items = sum(len(x) for x in aspect_map.values())
+            with self._stage("sentences") as stage:
+                if checkpoint:
+                    batch_defs = await self._plan_batches(concept, dimensions, aspect_map, checkpoint)
+                    sentence_objs = await self._generate_sentences_checkpointed(batch_defs, checkpoint)
+                else:
+                    batch_defs = await self._compose_batches(concept, dimensions, aspect_map)
+                    sentence_objs = await self._generate_sentences(batch_defs)
+                stage.items = len(sentence_objs)
+            with self._stage("export") as stage:
+                parsed_rows = await self._merge_and_parse_batches(batch_defs, sentence_objs)
+                output = await self._convert_to_output_async(parsed_rows, SentimentResponse)
+                stage.items = len(parsed_rows)
+        return output
+
+    async def generate_stream(
+            self,
+            concept: str,
+            dimensions: Optional[List[str]] = None,
+            aspects: Optional[List[str]] = None,
+            chunk_size: Optional[int] = None
+    ) -> AsyncIterator[SentimentOutput]:
+        """
+        Same as `generate`, but yields the output in chunks, each as soon as the `abatch` of its
+        sentences completes. A chunk covers `chunk_size` sentence requests (the concurrency limit
+        by default) and has the type of the configured export.
+        """
+        with self._run():
+            with self._stage("dimensions") as stage:
+                dimensions = dimensions or await self._generate_dimensions(concept)
+                stage.items = len(dimensions)
+            with self._stage("aspects") as stage:
+                aspect_map = await self._resolve_aspects(concept, dimensions, aspects)
+                stage.items = sum(len(x) for x in aspect_map.values())
+            with self._stage("sentences") as stage:
+                batch_defs = await self._compose_batches(concept, dimensions, aspect_map)
+                stage.items = 0
+                for chunk in self._stream_chunks(batch_defs, chunk_size):
+                    sentence_objs = await self._generate_sentences(chunk)
+                    stage.items += len(sentence_objs)
+                    parsed_rows = await self._merge_and_parse_batches(chunk, sentence_objs)
+                    yield await self._convert_to_output_async(parsed_rows, SentimentResponse)
+
+    def _stream_chunks(self, batches: List[Dict[str, Any]], chunk_size: Optional[int]) -> List[List[Dict[str, Any]]]:
+        pack_size = self.config.pack_size if self.config.packed_sentence_prompt else None
+        chunk_size = chunk_size or self._max_concurrency() or self.config.batch_size
+        return stream_chunks(batches, chunk_size, pack_size, self.config.pack_token_budget)
 
     async def _generate_dimensions(self, concept: str) -> List[str]:
-        chain = StandardChainBuilder(
-            prompt_template=self.config.dimension_prompt,
-            llm=self.config.llm,
-            entity_model=Dimensions
-        ).build_chain()
+        chain = self._build_chain(prompt_template=self.config.dimension_prompt, entity_model=Dimensions)
 
         try:
             response = await chain.ainvoke({"concept":concept})
@@ -49,111 +100,147 @@ class SentimentGeneratorAsync(NlpTask):
         return await self._generate_aspects(concept, dimensions)
     
     async def _generate_aspects(self, concept: str, dimensions: List[str]) -> Dict[str, List[str]]:
-        chain = StandardChainBuilder(
-            prompt_template=self.config.aspect_prompt,
-            llm=self.config.llm,
-            entity_model=Aspects
-        ).build_chain()
+        chain = self._build_chain(prompt_template=self.config.aspect_prompt, entity_model=Aspects)
 
         batch_inputs = [
             {"concept": concept, "dimension": dim, "index": idx}
             for idx, dim in enumerate(dimensions)
         ]
 
-        responses = []
-        for i in range(0, len(batch_inputs), self.config.batch_size):
-            batch = batch_inputs[i:i + self.config.batch_size]
-            try:
-                batch_responses = await chain.abatch(batch)
-            except Exception as e:
-                if self.config.verbose:
-                    print(f"Warning: Failed to process batch {i} - {i + self.config.batch_size}: {e}. Continuing with next batch.")
-                continue
-            responses.extend(batch_responses)
+        try:
+            responses = await chain.abatch(
+                batch_inputs,
+                max_concurrency=self._max_concurrency(),
+                adaptive=self.config.adaptive_concurrency
+            )
+            self._record_failures("aspects", responses)
+        except Exception as e:
+            if self.config.verbose:
+                print(f"Warning: Failed to generate aspects: {e}.")
+            responses = []
         response_dicts = [resp.model_dump() for resp in responses]
 
-        aspects_by_dim = {}
-        for batch in batch_inputs:
-            idx = batch["index"]
-            dim = batch["dimension"]
-            resp = next((rd for rd in response_dicts if rd.get("index") == idx), None)
-            aspects_by_dim[dim] = [
+        pairs, stats = JoinUtility.join_by_index(batch_inputs, response_dicts)
+        self._record_join("aspects", stats)
+        aspects_by_dim = {batch["dimension"]: [] for batch in batch_inputs}
+        for batch, resp in pairs:
+            aspects_by_dim[batch["dimension"]] = [
                 x["single_derivative"] for x in resp.get("aspects", []) if isinstance(x, dict)
-            ] if resp else []
+            ]
         return aspects_by_dim
     
-    async def _compose_batches(self, concept: str, dimensions: List[str], aspects: Dict[str, List[str]]) -> List[Dict[str, Any]]:
-        batches = []
-        for i in range(self.config.n_sentence):
-            if self.config.n_aspect == 1:
-                dim = random.choice(dimensions)
-                asp = random.choice(aspects[dim])
-                label = random.choice(self.config.label_options)
-                aspect_string = f"Dimension: {dim} -> Aspect: {asp} -> Sentiment: {label} |"
-                batch = {
-                    "index": i,
-                    "concept": concept,
-                    "aspect": aspect_string,
-                    **DrawUtility.draw_style()
-                }
-                batches.append(batch)
-            else:
-                dims, asps, labels = [], [], []
-                for _ in range(self.config.n_aspect):
-                    dim = random.choice(dimensions)
-                    candidate_asp = None
-                    tries = 0
-                    while True:
-                        asp = random.choice(aspects[dim])
-                        if asp not in asps:
-                            candidate_asp = asp
-                            break
-                        tries += 1
-                        if tries > 10: 
-                            break
-                    dims.append(dim)
-                    asps.append(candidate_asp or asp)
-                    labels.append(random.choice(self.config.label_options))
-                aspect_string = " | ".join(
-                    f"Dimension: {dim} -> Aspect: {asp} -> Sentiment: {lbl}"
-                    for dim, asp, lbl in zip(dims, asps, labels)
-                )
-                batch = {
-                    "index": i,
-                    "concept": concept,
-                    "aspect": aspect_string,
-                    **DrawUtility.draw_style()
-                }
-                batches.append(batch)
-        return batches
+    async def _compose_batches(
+            self,
+            concept: str,
+            dimensions: List[str],
+            aspects: Dict[str, List[str]]
+    ) -> BatchPlan:
+        return compose_batch_plan(
+            concept,
+            dimensions,
+            aspects,
+            self.config.n_sentence,
+            self.config.n_aspect,
+            self.config.label_options,
+            seed=self.config.seed
+        )
     
-    async def _generate_sentences(self, batches: List[Dict[str, Any]]) -> List[Text]:
-        chain = StandardChainBuilder(
-            prompt_template=self.config.sentence_prompt,
-            llm=self.config.llm,
-            entity_model=Text
-        ).build_chain()
-
-        results = []
-        for i in range(0, len(batches), self.config.batch_size):
-            batch = batches[i:i + self.config.batch_size]
-            try:
-                responses = await chain.abatch(batch)
-                if self.config.verbose and i % (self.config.batch_size * 100) == 0:
-                    print(f"Processing batch {i // self.config.batch_size + 1}/{len(batches) // self.config.batch_size + 1}")
-            except Exception as e:
-                if self.config.verbose:
-                    print(f"Warning: Error processing batch {i//self.config.batch_size}: {e}. Continuing with next batch.")
-                continue
-            results.extend(responses)
-
-        return results
+    async def _plan_batches(
+            self,
+            concept: str,
+            dimensions: List[str],
+            aspects: Dict[str, List[str]],
+            checkpoint: RunCheckpoint
+    ) -> List[Dict[str, Any]]:
+        """Reloads the batch plan of a checkpointed run, or composes it (from the configured seed or a fresh one) and saves it."""
+        settings = {
+            "concept": concept,
+            "n_sentence": self.config.n_sentence,
+            "n_aspect": self.config.n_aspect,
+            "label_options": self.config.label_options,
+            "seed": self.config.seed,
+        }
+        plan = checkpoint.load_plan(settings)
+        if plan is not None:
+            return plan["batches"]
+        batches = await self._compose_batches(concept, dimensions, aspects)
+        checkpoint.save_plan(batches.seed, settings, list(batches))
+        return batches
+
+    async def _generate_sentences_checkpointed(self, batches: List[Dict[str, Any]], checkpoint: RunCheckpoint) -> List[Text]:
+        """
+        Generates only the sentences missing from the checkpoint, in one sliding window over all of
+        them, and logs every sentence as soon as it completes.
+        """
+        done = checkpoint.load_results(Text)
+        pending = [batch for batch in batches if batch["index"] not in done]
+        if self.config.verbose and done:
+            print(f"Resuming run in {checkpoint.run_dir}: {len(batches) - len(pending)}/{len(batches)} sentences already generated")
+        try:
+            for sentence in await self._generate_sentences(pending, on_sentences=checkpoint.append_results):
+                done.setdefault(sentence.index, sentence)
+        finally:
+            checkpoint.close()
+        return list(done.values())
+
+    async def _generate_sentences(
+            self,
+            batches: List[Dict[str, Any]],
+            on_sentences: Optional[Callable[[List[Text]], None]] = None
+    ) -> List[Text]:
+        """`on_sentences` gets the sentences of the requests as they complete, e.g. to checkpoint them."""
+        if self.config.pack_size and self.config.packed_sentence_prompt:
+            return await self._generate_sentences_packed(batches, on_sentences)
+
+        chain = self._build_chain(prompt_template=self.config.sentence_prompt, entity_model=Text)
+
+        sentences = []
+        try:
+            responses = await chain.abatch(
+                batches,
+                max_concurrency=self._max_concurrency(),
+                on_progress=self._report_progress if self.config.verbose else None,
+                adaptive=self.config.adaptive_concurrency,
+                on_result=collect_sentences(batches, sentences, on_sentences)
+            )
+            self._record_failures("sentences", responses)
+            return sentences
+        except Exception as e:
+            if self.config.verbose:
+                print(f"Warning: Error generating sentences: {e}.")
+            return []
+        
+    async def _generate_sentences_packed(
+            self,
+            batches: List[Dict[str, Any]],
+            on_sentences: Optional[Callable[[List[Text]], None]] = None
+    ) -> List[Text]:
+        chain = self._build_chain(
+            prompt_template=self.config.packed_sentence_prompt,
+            entity_model=Texts,
+            parser=PackedOutputParser(container_model=Texts, list_field="texts")
+        )
+        pack_size = resolve_pack_size(self.config.pack_size, batches, self.config.pack_token_budget)
+
+        async def _run(packs: List[Dict[str, str]], on_result: Callable[[int, Texts], None]) -> BatchResult:
+            return await chain.abatch(
+                packs,
+                max_concurrency=self._max_concurrency(),
+                adaptive=self.config.adaptive_concurrency,
+                on_result=on_result
+            )
+
+        texts = await arun_packed(_run, batches, pack_size, self.config.max_attempts, on_texts=on_sentences)
+        self._record_failures("sentences", texts)
+        return texts
     
     async def _merge_and_parse_batches(self, batches: List[Dict[str, Any]], sentences: List[Text]) -> List[Dict[str, Any]]:
-        for sentence in sentences:
-            sentence_dict = sentence.model_dump()
-            index = sentence_dict.get("index")
-            batch = batches[index]
+        # Joined by index, so a streamed chunk can be merged on its own. A `BatchPlan` renders a
+        # new dict on every access, so its requests are rendered once here and filled in place.
+        batches = list(batches)
+        pairs, stats = JoinUtility.join_by_index(batches, (sentence.model_dump() for sentence in sentences))
+        self._record_join("export", stats)
+        for batch, sentence_dict in pairs:
             batch["generated_text"] = sentence_dict.get("generated_text", "")
         
         rows = []
@@ -1,15 +1,19 @@
-import random
-from typing import Dict, Any, List, Optional
-from .schemas import Dimensions, Aspects, Text, SentimentResponse, SentimentConfig, SentimentOutput
+from typing import Callable, Dict, Any, Iterator, List, Optional, Union
+from .schemas import Dimensions, Aspects, Text, Texts, SentimentResponse, SentimentConfig, SentimentOutput
+from .composer import BatchPlan, compose_batch_plan
+from .packing import run_packed, collect_sentences, resolve_pack_size, stream_chunks
 from ..base import NlpTask
-from ...components.standard_chain_builder import StandardChainBuilder
-from ...utility.draw import DrawUtility
+from ...components.batch_jobs import BatchBackend, BatchJob
+from ...components.checkpoint import RunCheckpoint
+from ...components.parsers import PackedOutputParser, RepairingOutputParser
+from ...components.standard_chain_builder import BatchResult
+from ...utility.join import JoinUtility
 
 
 class SentimentGenerator(NlpTask):
 
     def __init__(self, config: SentimentConfig):
-        self.config = config
+        super().__init__(config)
 
     def generate(
             self, 
@@ -17,19 +21,96 @@ class SentimentGenerator(NlpTask):
             dimensions: Optional[List[str]]=None,
             aspects: Optional[List[str]]=None
     ) -> SentimentOutput:
+        with self._run():
+            checkpoint = self._checkpoint()
+            with self._stage("dimensions") as stage:
+                dimensions = (checkpoint and checkpoint.load("dimensions")) or dimensions or self._generate_dimensions(concept)
+                if checkpoint:
+                    checkpoint.save("dimensions", dimensions)
+                stage.items = len(dimensions)
+            with self._stage("aspects") as stage:
+                aspect_map = (checkpoint and checkpoint.load("aspects")) or self._resolve_aspects(concept, dimensions, aspects)
+                if checkpoint:
+                    checkpoint.save("aspects", aspect_map)
+                stage.items = sum(len(x) for x in aspect_map.values())
+            with self._stage("sentences") as stage:
+                if checkpoint:
+                    batch_defs = self._plan_batches(concept, dimensions, aspect_map, checkpoint)
+                    sentence_objs = self._generate_sentences_checkpointed(batch_defs, checkpoint)
+                else:
+                    batch_defs = self._compose_batches(concept, dimensions, aspect_map)
+                    sentence_objs = self._generate_sentences(batch_defs)
+                stage.items = len(sentence_objs)
+            with self._stage("export") as stage:
+                parsed_rows = self._merge_and_parse_batches(batch_defs, sentence_objs)
+                output = self._convert_to_output(parsed_rows, SentimentResponse)
+                stage.items = len(parsed_rows)
+        return output
+
+    def generate_stream(
+            self,
+            concept: str,
+            dimensions: Optional[List[str]] = None,
+            aspects: Optional[List[str]] = None,
+            chunk_size: Optional[int] = None
+    ) -> Iterator[SentimentOutput]:
+        """
+        Same as `generate`, but yields the output in chunks, each as soon as its sentences are
+        generated. A chunk covers `chunk_size` sentence requests (one batch by default) and has
+        the type of the configured export.
+        """
+        with self._run():
+            with self._stage("dimensions") as stage:
+                dimensions = dimensions or self._generate_dimensions(concept)
+                stage.items = len(dimensions)
+            with self._stage("aspects") as stage:
+                aspect_map = self._resolve_aspects(concept, dimensions, aspects)
+                stage.items = sum(len(x) for x in aspect_map.values())
+            with self._stage("sentences") as stage:
+                batch_defs = self._compose_batches(concept, dimensions, aspect_map)
+                stage.items = 0
+                for chunk in self._stream_chunks(batch_defs, chunk_size):
+                    sentence_objs = self._generate_sentences(chunk)
+                    stage.items += len(sentence_objs)
+                    parsed_rows = self._merge_and_parse_batches(chunk, sentence_objs)
+                    yield self._convert_to_output(parsed_rows, SentimentResponse)
+
+    def _stream_chunks(self, batches: List[Dict[str, Any]], chunk_size: Optional[int]) -> List[List[Dict[str, Any]]]:
+        pack_size = self.config.pack_size if self.config.packed_sentence_prompt else None
+        return stream_chunks(batches, chunk_size or self.config.batch_size, pack_size, self.config.pack_token_budget)
+
+    def submit_batch_job(
+            self,
+            concept: str,
+            job_dir: str,
+            backend: Union[str, BatchBackend] = "openai",
+            dimensions: Optional[List[str]] = None,
+            aspects: Optional[List[str]] = None
+    ) -> BatchJob:
+        """
+        Submits the sentence requests to a provider batch endpoint instead of the realtime API.
+        Dimensions and aspects are still generated in realtime. If `job_dir` already holds a
+        submitted job, that job is returned as is.
+        """
+        job = BatchJob(job_dir, backend)
+        if job.submitted:
+            return job
         dimensions = dimensions or self._generate_dimensions(concept)
         aspect_map = self._resolve_aspects(concept, dimensions, aspects)
         batch_defs = self._compose_batches(concept, dimensions, aspect_map)
-        sentence_objs = self._generate_sentences(batch_defs)
-        parsed_rows = self._merge_and_parse_batches(batch_defs, sentence_objs)
+        chain = self._build_chain(prompt_template=self.config.sentence_prompt, entity_model=Text)
+        return job.submit(chain, list(batch_defs))
+
+    def collect_batch_job(self, job_dir: str, backend: Union[str, BatchBackend] = "openai") -> SentimentOutput:
+        """Merges the results of a completed batch job into the same output `generate` returns."""
+        job = BatchJob(job_dir, backend)
+        sentence_objs = job.collect(RepairingOutputParser(pydantic_object=Text))
+        self._record_failures("sentences", sentence_objs)
+        parsed_rows = self._merge_and_parse_batches(job.inputs, sentence_objs)
         return self._convert_to_output(parsed_rows, SentimentResponse)
 
     def _generate_dimensions(self, concept: str) -> List[str]:
-        chain = StandardChainBuilder(
-            prompt_template=self.config.dimension_prompt,
-            llm=self.config.llm,
-            entity_model=Dimensions
-        ).build_chain()
+        chain = self._build_chain(prompt_template=self.config.dimension_prompt, entity_model=Dimensions)
 
         try:
             response = chain.invoke({"concept":concept})
@@ -49,11 +130,7 @@ class SentimentGenerator(NlpTask):
         return self._generate_aspects(concept, dimensions)
     
     def _generate_aspects(self, concept: str, dimensions: List[str]) -> Dict[str, List[str]]:
-        chain = StandardChainBuilder(
-            prompt_template=self.config.aspect_prompt,
-            llm=self.config.llm,
-            entity_model=Aspects
-        ).build_chain()
+        chain = self._build_chain(prompt_template=self.config.aspect_prompt, entity_model=Aspects)
 
         batch_inputs = [
             {"concept": concept, "dimension": dim, "index": idx}
@@ -65,6 +142,7 @@ class SentimentGenerator(NlpTask):
             batch = batch_inputs[i:i + self.config.batch_size]
             try:
                 batch_responses = chain.batch(batch)
+                self._record_failures("aspects", batch_responses)
             except Exception as e:
                 if self.config.verbose:
                     print(f"Warning: Failed to process batch {i} - {i + self.config.batch_size}: {e}. Continuing with next batch.")
@@ -72,88 +150,124 @@ class SentimentGenerator(NlpTask):
             responses.extend(batch_responses)
         response_dicts = [resp.model_dump() for resp in responses]
 
-        aspects_by_dim = {}
-        for batch in batch_inputs:
-            idx = batch["index"]
-            dim = batch["dimension"]
-            resp = next((rd for rd in response_dicts if rd.get("index") == idx), None)
-            aspects_by_dim[dim] = [
+        pairs, stats = JoinUtility.join_by_index(batch_inputs, response_dicts)
+        self._record_join("aspects", stats)
+        aspects_by_dim = {batch["dimension"]: [] for batch in batch_inputs}
+        for batch, resp in pairs:
+            aspects_by_dim[batch["dimension"]] = [
                 x["single_derivative"] for x in resp.get("aspects", []) if isinstance(x, dict)
-            ] if resp else []
+            ]
         return aspects_by_dim
     
-    def _compose_batches(self, concept: str, dimensions: List[str], aspects: Dict[str, List[str]]) -> List[Dict[str, Any]]:
-        batches = []
-        for i in range(self.config.n_sentence):
-            if self.config.n_aspect == 1:
-                dim = random.choice(dimensions)
-                asp = random.choice(aspects[dim])
-                label = random.choice(self.config.label_options)
-                aspect_string = f"Dimension: {dim} -> Aspect: {asp} -> Sentiment: {label} |"
-                batch = {
-                    "index": i,
-                    "concept": concept,
-                    "aspect": aspect_string,
-                    **DrawUtility.draw_style()
-                }
-                batches.append(batch)
-            else:
-                dims, asps, labels = [], [], []
-                for _ in range(self.config.n_aspect):
-                    dim = random.choice(dimensions)
-                    candidate_asp = None
-                    tries = 0
-                    while True:
-                        asp = random.choice(aspects[dim])
-                        if asp not in asps:
-                            candidate_asp = asp
-                            break
-                        tries += 1
-                        if tries > 10: 
-                            break
-                    dims.append(dim)
-                    asps.append(candidate_asp or asp)
-                    labels.append(random.choice(self.config.label_options))
-                aspect_string = " | ".join(
-                    f"Dimension: {dim} -> Aspect: {asp} -> Sentiment: {lbl}"
-                    for dim, asp, lbl in zip(dims, asps, labels)
-                )
-                batch = {
-                    "index": i,
-                    "concept": concept,
-                    "aspect": aspect_string,
-                    **DrawUtility.draw_style()
-                }
-                batches.append(batch)
-        return batches
+    def _compose_batches(
+            self,
+            concept: str,
+            dimensions: List[str],
+            aspects: Dict[str, List[str]]
+    ) -> BatchPlan:
+        return compose_batch_plan(
+            concept,
+            dimensions,
+            aspects,
+            self.config.n_sentence,
+            self.config.n_aspect,
+            self.config.label_options,
+            seed=self.config.seed
+        )
     
-    def _generate_sentences(self, batches: List[Dict[str, Any]]) -> List[Text]:
-        chain = StandardChainBuilder(
-            prompt_template=self.config.sentence_prompt,
-            llm=self.config.llm,
-            entity_model=Text
-        ).build_chain()
+    def _plan_batches(
+            self,
+            concept: str,
+            dimensions: List[str],
+            aspects: Dict[str, List[str]],
+            checkpoint: RunCheckpoint
+    ) -> List[Dict[str, Any]]:
+        """Reloads the batch plan of a checkpointed run, or composes it (from the configured seed or a fresh one) and saves it."""
+        settings = {
+            "concept": concept,
+            "n_sentence": self.config.n_sentence,
+            "n_aspect": self.config.n_aspect,
+            "label_options": self.config.label_options,
+            "seed": self.config.seed,
+        }
+        plan = checkpoint.load_plan(settings)
+        if plan is not None:
+            return plan["batches"]
+        batches = self._compose_batches(concept, dimensions, aspects)
+        checkpoint.save_plan(batches.seed, settings, list(batches))
+        return batches
+
+    def _generate_sentences_checkpointed(self, batches: List[Dict[str, Any]], checkpoint: RunCheckpoint) -> List[Text]:
+        """Generates only the sentences missing from the checkpoint and logs every sentence as soon as it completes."""
+        done = checkpoint.load_results(Text)
+        pending = [batch for batch in batches if batch["index"] not in done]
+        if self.config.verbose and done:
+            print(f"Resuming run in {checkpoint.run_dir}: {len(batches) - len(pending)}/{len(batches)} sentences already generated")
+        try:
+            for sentence in self._generate_sentences(pending, on_sentences=checkpoint.append_results):
+                done.setdefault(sentence.index, sentence)
+        finally:
+            checkpoint.close()
+        return list(done.values())
+
+    def _generate_sentences(
+            self,
+            batches: List[Dict[str, Any]],
+            on_sentences: Optional[Callable[[List[Text]], None]] = None
+    ) -> List[Text]:
+        """`on_sentences` gets the sentences of the requests as they complete, e.g. to checkpoint them."""
+        if self.config.pack_size and self.config.packed_sentence_prompt:
+            return self._generate_sentences_packed(batches, on_sentences)
+
+        chain = self._build_chain(prompt_template=self.config.sentence_prompt, entity_model=Text)
 
         results = []
         for i in range(0, len(batches), self.config.batch_size):
             batch = batches[i:i + self.config.batch_size]
             try:
-                responses = chain.batch(batch)
+                responses = chain.batch(batch, on_result=collect_sentences(batch, results, on_sentences))
+                self._record_failures("sentences", responses)
                 if self.config.verbose and i % (self.config.batch_size * 100) == 0:
                     print(f"Processing batch {i // self.config.batch_size + 1}/{len(batches) // self.config.batch_size + 1}")
             except Exception as e:
                 if self.config.verbose:
                     print(f"Warning: Error processing batch {i//self.config.batch_size}: {e}. Continuing with next batch.")
                 continue
-            results.extend(responses)
 
         return results
     
+    def _generate_sentences_packed(
+            self,
+            batches: List[Dict[str, Any]],
+            on_sentences: Optional[Callable[[List[Text]], None]] = None
+    ) -> List[Text]:
+        chain = self._build_chain(
+            prompt_template=self.config.packed_sentence_prompt,
+            entity_model=Texts,
+            parser=PackedOutputParser(container_model=Texts, list_field="texts")
+        )
+        pack_size = resolve_pack_size(self.config.pack_size, batches, self.config.pack_token_budget)
+
+        def _run(packs: List[Dict[str, str]], on_result: Callable[[int, Texts], None]) -> BatchResult:
+            return BatchResult.concat([
+                chain.batch(
+                    packs[i:i + self.config.batch_size],
+                    on_result=lambda position, response, offset=i: on_result(offset + position, response)
+                )
+                for i in range(0, len(packs), self.config.batch_size)
+            ])
+
+        texts = run_packed(_run, batches, pack_size, self.config.max_attempts, on_texts=on_sentences)
+        self._record_failures("sentences", texts)
+        return texts
+    
     def _merge_and_parse_batches(self, batches: List[Dict[str, Any]], sentences: List[Text]) -> List[Dict[str, Any]]:
-        for sentence in sentences:
-            sentence_dict = sentence.model_dump()
-            index = sentence_dict.get("index")
-            batch = batches[index]
+        # Joined by index, so a streamed chunk can be merged on its own. A `BatchPlan` renders a
+        # new dict on every access, so its requests are rendered once here and filled in place.
+        batches = list(batches)
+        pairs, stats = JoinUtility.join_by_index(batches, (sentence.model_dump() for sentence in sentences))
+        self._record_join("export", stats)
+        for batch, sentence_dict in pairs:
             batch["generated_text"] = sentence_dict.get("generated_text", "")
         
         rows = []
@@ -0,0 +1,190 @@
+import json
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+from .schemas import Text, Texts
+from ...components.standard_chain_builder import BatchFailure, BatchResult
+
+
+# Rough number of output tokens a single generated text takes, used to size packed requests.
+OUTPUT_TOKENS_PER_TEXT = 150
+MAX_PACK_SIZE = 50
+
+
+def resolve_pack_size(pack_size: Optional[Union[int, str]], batches: List[Dict[str, Any]], token_budget: int) -> int:
+    """
+    Number of requests sent in one packed LLM call.
+    With "auto", it is derived from the token budget and the average size of the requests.
+    """
+    if not pack_size:
+        return 1
+    if pack_size != "auto":
+        return max(1, int(pack_size))
+    if not batches:
+        return 1
+    sample = batches[:100]
+    input_tokens = sum(len(json.dumps(batch, ensure_ascii=False)) for batch in sample) / len(sample) / 4
+    return max(1, min(MAX_PACK_SIZE, int(token_budget // (input_tokens + OUTPUT_TOKENS_PER_TEXT))))
+
+
+def stream_chunks(
+        batches: List[Dict[str, Any]],
+        chunk_size: int,
+        pack_size: Optional[Union[int, str]],
+        token_budget: int
+    ) -> List[List[Dict[str, Any]]]:
+    """
+    Splits the requests of a streamed run into the chunks whose rows are yielded together:
+    `chunk_size` requests, or `chunk_size` packs of requests when packing.
+    """
+    size = max(1, chunk_size) * resolve_pack_size(pack_size, batches, token_budget)
+    return [batches[i:i + size] for i in range(0, len(batches), size)]
+
+
+def pack_batches(batches: List[Dict[str, Any]], pack_size: int) -> List[Dict[str, str]]:
+    return [
+        {"requests": json.dumps(batches[i:i + pack_size], ensure_ascii=False)}
+        for i in range(0, len(batches), pack_size)
+    ]
+
+
+def collect_sentences(
+        batches: List[Dict[str, Any]],
+        sentences: List[Text],
+        on_sentences: Optional[Callable[[List[Text]], None]] = None
+    ) -> Callable[[int, Text], None]:
+    """
+    The `on_result` callback of an unpacked sentence batch: appends every sentence to `sentences`
+    and hands it to `on_sentences`. The index echoed by the LLM is not trusted, so a sentence is
+    kept under the index of its own request.
+    """
+    def _on_result(position: int, sentence: Text) -> None:
+        sentence = sentence.model_copy(update={"index": batches[position]["index"]})
+        sentences.append(sentence)
+        if on_sentences:
+            on_sentences([sentence])
+    return _on_result
+
+
+class PackRound:
+    """
+    One round of packed requests. `add` takes the response of a pack as soon as it completes and
+    keeps the texts that answer a request of that very pack, so a text echoing the index of another
+    request (or a repeated one) never counts as its answer. Responses may arrive from worker threads.
+    """
+
+    def __init__(
+            self,
+            batches: List[Dict[str, Any]],
+            pack_size: int,
+            on_texts: Optional[Callable[[List[Text]], None]] = None
+        ):
+        self.batches = batches
+        self.pack_size = pack_size
+        self.packs = pack_batches(batches, pack_size)
+        self.texts: Dict[Any, Text] = {}
+        self.on_texts = on_texts
+        self._lock = threading.Lock()
+
+    def add(self, position: int, response: Texts) -> None:
+        expected = {batch["index"] for batch in self._pack(position)}
+        answered = []
+        with self._lock:
+            for text in response.texts:
+                if text.index in expected and text.index not in self.texts:
+                    self.texts[text.index] = text
+                    answered.append(text)
+        if answered and self.on_texts:
+            self.on_texts(answered)
+
+    def settle(
+            self,
+            result: Optional[BatchResult],
+            attempts: Dict[Any, int],
+            errors: Dict[Any, BaseException]
+        ) -> List[Dict[str, Any]]:
+        """
+        Adds the attempts of this round to `attempts` and the reason each unanswered request is
+        still missing to `errors`: the error of its pack, or the missing answer. Returns those requests.
+        """
+        result = result if result is not None else BatchResult()
+        failed = {failure.position: failure.error for failure in result.failures}
+        missing = []
+        for position in range(len(self.packs)):
+            tries = result.attempts[position] if position < len(result.attempts) else 1
+            for batch in self._pack(position):
+                index = batch["index"]
+                attempts[index] = attempts.get(index, 0) + tries
+                if index not in self.texts:
+                    errors[index] = failed.get(position) or ValueError("No answer in the packed response.")
+                    missing.append(batch)
+        return missing
+
+    def _pack(self, position: int) -> List[Dict[str, Any]]:
+        return self.batches[position * self.pack_size:(position + 1) * self.pack_size]
+
+
+def _packed_result(
+        batches: List[Dict[str, Any]],
+        texts: List[Text],
+        missing: List[Dict[str, Any]],
+        attempts: Dict[Any, int],
+        errors: Dict[Any, BaseException]
+    ) -> BatchResult:
+    positions = {batch["index"]: position for position, batch in enumerate(batches)}
+    return BatchResult(texts, failures=[
+        BatchFailure(position=positions[batch["index"]], index=batch["index"], error=errors[batch["index"]], attempts=attempts[batch["index"]])
+        for batch in missing
+    ])
+
+
+def run_packed(
+        run_batch: Callable[[List[Dict[str, str]], Callable[[int, Texts], None]], Optional[BatchResult]],
+        batches: List[Dict[str, Any]],
+        pack_size: int,
+        max_rounds: int,
+        on_texts: Optional[Callable[[List[Text]], None]] = None
+    ) -> BatchResult:
+    """
+    Sends the requests in packs and re-packs the requests that were missing from the
+    responses, for up to `max_rounds` rounds. Returns the texts, with the requests still missing
+    in `failures`: the last error of each (its pack's failure or the missing answer) and the
+    attempts of all the packs that carried it.
+
+    `run_batch(packs, on_result)` runs the packs, calls `on_result(position, response)` for
+    every response as it completes and returns the `BatchResult` of the packs; `on_texts` gets
+    the texts of each response as they are matched.
+    """
+    texts: List[Text] = []
+    attempts: Dict[Any, int] = {}
+    errors: Dict[Any, BaseException] = {}
+    pending = batches
+    for _ in range(max_rounds):
+        if not pending:
+            break
+        pack_round = PackRound(pending, pack_size, on_texts)
+        result = run_batch(pack_round.packs, pack_round.add)
+        texts.extend(pack_round.texts.values())
+        pending = pack_round.settle(result, attempts, errors)
+    return _packed_result(batches, texts, pending, attempts, errors)
+
+
+async def arun_packed(
+        run_batch: Callable[[List[Dict[str, str]], Callable[[int, Texts], None]], Awaitable[Optional[BatchResult]]],
+        batches: List[Dict[str, Any]],
+        pack_size: int,
+        max_rounds: int,
+        on_texts: Optional[Callable[[List[Text]], None]] = None
+    ) -> BatchResult:
+    """Async counterpart of `run_packed`."""
+    texts: List[Text] = []
+    attempts: Dict[Any, int] = {}
+    errors: Dict[Any, BaseException] = {}
+    pending = batches
+    for _ in range(max_rounds):
+        if not pending:
+            break
+        pack_round = PackRound(pending, pack_size, on_texts)
+        result = await run_batch(pack_round.packs, pack_round.add)
+        texts.extend(pack_round.texts.values())
+        pending = pack_round.settle(result, attempts, errors)
+    return _packed_result(batches, texts, pending, attempts, errors)
@@ -153,6 +153,74 @@ def get_sentence_prompt(language: str) -> str:
     return text
 
 
+def get_packed_sentence_prompt(language: str) -> str:
+    PACKED_SENTENCE_PROMPTS = {
+        "en": """
+                You are a creative writing assistant. Generate vivid, sentiment-rich texts that express the required sentiment toward the given aspect of a concept.
+
+                TASK: You will receive a JSON list of requests. For EACH request, write a short, creative snippet that clearly shows the specified sentiment about its aspect.
+
+                REQUIREMENTS:
+                - Express the sentiment toward the aspect unmistakably
+                - Use the specified writing style and medium conventions
+                - Include at least 2 rhetorical devices (metaphor, alliteration, etc.)
+                - Reference the aspect explicitly at least once
+                - Keep language natural, avoid clichés
+                - Length: approximately given sentence length sentences
+                - Write exactly one text per request and copy the request's index into it
+                - Every text stands on its own; do not reuse metaphors or imagery across requests
+                - Prioritize: 1) Medium conventions, 2) Aspect-Sentiment clarity, 3) Other parameters
+
+                RESPOND WITH VALID JSON ONLY:
+                {{
+                "texts": [
+                    {{"index": 0, "generated_text": "your creative text for the request with index 0"}}
+                ]
+                }}
+
+                ############
+                REQUESTS:
+                {requests}
+
+                OUTPUT FORMAT: {format_instructions}
+                """,
+        "tr": """
+                Yaratıcı bir yazma asistanısınız. Verilen kavramın belirli bir yönüne yönelik duygu zengin metinler üretin.
+                GÖREV: Size JSON formatında bir istek listesi verilecek. HER istek için, belirtilen yön hakkındaki duyguyu açıkça gösteren kısa, yaratıcı bir parça yazın.
+                GEREKSİNİMLER:
+                - Yön hakkında duygu açıkça ifade edilmeli
+                - Belirtilen yazım stili ve ortam kurallarına uyulmalı
+                - En az 2 retorik araç (metafor, aliterasyon vb.) kullanılmalı
+                - Yön en az bir kez açıkça referans edilmeli
+                - Dili doğal tutun, klişelerden kaçının
+                - Uzunluk: yaklaşık verilen cümle uzunluğu cümlesi
+                - Her istek için tam olarak bir metin yazın ve isteğin indeksini metne kopyalayın
+                - Her metin kendi başına olmalı; istekler arasında metafor ve imgeleri tekrar kullanmayın
+                - Öncelik: 1) Ortam kuralları, 2) Yön-Duygu netliği, 3) Diğer parametreler
+
+                YALNIZCA GEÇERLİ JSON İLE CEVAP VERİN:
+                {{
+                "texts": [
+                    {{"index": 0, "generated_text": "indeksi 0 olan istek için yaratıcı metin"}}
+                ]
+                }}
+
+                ############
+                İSTEKLER:
+                {requests}
+                ÇIKTI FORMAT: {format_instructions}
+                """
+    }
+
+    text = PACKED_SENTENCE_PROMPTS.get(language)
+
+    if not text:
+        core_text = PACKED_SENTENCE_PROMPTS["en"].split("############")[0]
+        translated_core_text = Translator.translate(core_text, target_language=language, source_language="en", vendor="deep-translator")
+        text = translated_core_text + PACKED_SENTENCE_PROMPTS["en"].split("############")[1]
+    return text
+
+
 def get_augment_sentence_prompt(language: str) -> str:
     AUGMENT_SENTENCE_PROMPTS = {
         "en": """
@@ -227,6 +295,68 @@ def get_augment_sentence_prompt(language: str) -> str:
     return text
 
 
+def get_packed_augment_sentence_prompt(language: str) -> str:
+    PACKED_AUGMENT_SENTENCE_PROMPTS = {
+        "en": """
+                You are a creative writing assistant. Generate vivid, sentiment-rich texts that express the required sentiment toward the given aspect of a concept.
+
+                TASK: You will receive a JSON list of requests. For EACH request, write a short, creative snippet that clearly shows the specified sentiment about its aspect, using the request's given text as a reference.
+
+                REQUIREMENTS:
+                - Express the sentiment toward the aspect unmistakably
+                - Use the specified writing style and medium conventions
+                - Include at least 2 rhetorical devices (metaphor, alliteration, etc.)
+                - Reference the aspect explicitly at least once
+                - Keep language natural, avoid clichés
+                - Length: approximately given sentence length sentences
+                - Write exactly one text per request and copy the request's index into it
+
+                RESPOND WITH VALID JSON ONLY:
+                {{
+                "texts": [
+                    {{"index": 0, "generated_text": "your creative text for the request with index 0"}}
+                ]
+                }}
+                ############
+                REQUESTS:
+                {requests}
+
+                OUTPUT FORMAT: {format_instructions}
+                """,
+        "tr": """
+                Yaratıcı bir yazma asistanısınız. Verilen kavramın belirli bir yönüne yönelik duygu zengin metinler üretin.
+                GÖREV: Size JSON formatında bir istek listesi verilecek. HER istek için, isteğin verilen metnini referans alarak belirtilen yön hakkındaki duyguyu açıkça gösteren kısa, yaratıcı bir parça yazın.
+                GEREKSİNİMLER:
+                - Yön hakkında duygu açıkça ifade edilmeli
+                - Belirtilen yazım stili ve ortam kurallarına uyulmalı
+                - En az 2 retorik araç (metafor, aliterasyon vb.) kullanılmalı
+                - Yön en az bir kez açıkça referans edilmeli
+                - Dili doğal tutun, klişelerden kaçının
+                - Uzunluk: yaklaşık verilen cümle uzunluğu cümlesi
+                - Her istek için tam olarak bir metin yazın ve isteğin indeksini metne kopyalayın
+                YALNIZCA GEÇERLİ JSON İLE CEVAP VERİN:
+                {{
+                "texts": [
+                    {{"index": 0, "generated_text": "indeksi 0 olan istek için yaratıcı metin"}}
+                ]
+                }}
+                ############
+                İSTEKLER:
+                {requests}
+
+                ÇIKTI FORMAT: {format_instructions}
+                """
+    }
+
+    text = PACKED_AUGMENT_SENTENCE_PROMPTS.get(language)
+
+    if not text:
+        core_text = PACKED_AUGMENT_SENTENCE_PROMPTS["en"].split("############")[0]
+        translated_core_text = Translator.translate(core_text, target_language=language, source_language="en", vendor="deep-translator")
+        text = translated_core_text + PACKED_AUGMENT_SENTENCE_PROMPTS["en"].split("############")[1]
+    return text
+
+
 def get_structure_prompt(language: str) -> str:
     STRUCTURE_PROMPTS = {
         "en": """
@@ -14,10 +14,24 @@ class SentimentConfig(BaseModel):
     n_aspect: Optional[int] = Field(default=1, description="Number of aspects to generate")
     n_sentence: Optional[int] = Field(default=100, description="Number of sentences to generate in total")
     batch_size: int = Field(default=10, description="Number of sentences to generate in each batch")
+    max_concurrency: Optional[int] = Field(default=None, description="Maximum number of requests kept in flight at once by the async tasks. Defaults to batch_size.")
+    adaptive_concurrency: bool = Field(default=False, description="Whether the async tasks adapt the number of requests in flight to the vendor's latency and throttling (AIMD)")
     label_options: List[str] = Field(default_factory=lambda: ["positive", "negative"], description="List of sentiment labels to choose from")
     export_type: str = Field(default="default", description="Output format of the generated data, e.g., 'dataframe' or 'dataset'")
     aspect_based_generation: bool = Field(default=False, description="Whether to generate data based on aspects. If False, all sentiments for all aspects are same.")
     verbose: bool = Field(default=False, description="Whether to print verbose output during processing")
+    cache: Optional[object] = Field(default=None, description="Optional ResponseCache used to skip LLM calls for prompts that were already answered")
+    max_attempts: int = Field(default=3, description="Maximum number of attempts per item before it is reported as failed")
+    structured_output: bool = Field(default=False, description="Whether to use the vendor's native structured output instead of embedding the JSON schema in the prompts")
+    on_report: Optional[object] = Field(default=None, description="Optional callback that receives the RunReport of the run once it finishes")
+    hooks: Optional[object] = Field(default=None, description="Optional PipelineHooks (or a list of them) called at the start and end of the run, of every stage and of every LLM request")
+    hedging: Optional[object] = Field(default=None, description="Optional HedgingPolicy that duplicates slow requests of the async tasks to a backup LLM")
+    pack_size: Optional[Union[int, str]] = Field(default=None, description="Number of sentences generated per LLM request, or 'auto' to derive it from pack_token_budget. None sends one request per sentence.")
+    pack_token_budget: int = Field(default=4000, description="Approximate token budget of a packed request, used when pack_size is 'auto'")
+    packed_sentence_prompt: Optional[str] = Field(None, description="Prompt template for generating several sentences in one request")
+    run_dir: Optional[str] = Field(default=None, description="Directory in which a generation run checkpoints its dimensions, aspects, batch plan and completed sentences")
+    resume: bool = Field(default=False, description="Whether to resume the run checkpointed in run_dir, generating only the sentences it is missing")
+    seed: Optional[int] = Field(default=None, description="Seed of the sentence request plan. Request i gets the same dimension, aspects, labels and style for the same seed, whatever the batch size or shard; a fresh seed is drawn when not set")
 
 
 class DimensionDerivative(BaseModel):
@@ -54,6 +68,10 @@ class Text(BaseModel):
     generated_text: str = Field(description="The generated text")
 
 
+class Texts(BaseModel):
+    texts: List[Text] = Field(title="Texts", description="One generated text for each request, carrying the index of its request")
+
+
 class SentimentResponse(BaseModel):
     concept: str = Field(title="Concept", description="The concept for which the sentiment is generated")
     aspect: str = Field(title="Aspect", description="The aspect related to the concept")
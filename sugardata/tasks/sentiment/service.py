@@ -1,16 +1,65 @@
 import asyncio
-from typing import Optional, Dict, List
+from typing import AsyncIterator, Callable, Iterator, Optional, Dict, List, Union
 from .schemas import SentimentConfig, SentimentOutput
 from .generate_sync import SentimentGenerator
 from .generate_async import SentimentGeneratorAsync
 from .augment_sync import SentimentAugmenter
 from .augment_async import SentimentAugmenterAsync
-from .prompts import get_dimension_prompt, get_aspect_prompt, get_sentence_prompt, get_structure_prompt, get_augment_sentence_prompt
+from .prompts import (
+    get_dimension_prompt, get_aspect_prompt, get_sentence_prompt, get_structure_prompt, get_augment_sentence_prompt,
+    get_packed_sentence_prompt, get_packed_augment_sentence_prompt
+)
+from ...components.batch_jobs import BatchBackend, BatchJob
+from ...components.cache import ResponseCache, resolve_cache
 from ...components.factory import create_llm_object
+from ...components.hedging import HedgingPolicy
+from ...components.hooks import PipelineHooks
+from ...components.telemetry import RunReport
 from ...utility.translate import TranslationUtility
 from ...utility.config import DEFAULT_VENDORS
 
 
+def _build_sentiment_config(
+        language: str,
+        vendor: str,
+        model: str,
+        model_params: Optional[Dict] = None,
+        augment: bool = False,
+        pack_size: Optional[Union[int, str]] = None,
+        cache: Optional[Union[str, ResponseCache]] = None,
+        **options
+) -> SentimentConfig:
+    """
+    The config of every sentiment entry point: the LLM (at temperature 0.95 unless `model_params`
+    sets one), the prompts of generation or, with `augment`, of augmentation, and `options`.
+    """
+    model_params = {"temperature": 0.95, **(model_params or {})}
+    llm = create_llm_object(vendor=vendor, model=model, **model_params)
+
+    if augment:
+        prompts = {
+            "sentence_prompt": get_augment_sentence_prompt(language=language),
+            "packed_sentence_prompt": get_packed_augment_sentence_prompt(language=language) if pack_size else None,
+            "structure_prompt": get_structure_prompt(language=language),
+        }
+    else:
+        prompts = {
+            "dimension_prompt": get_dimension_prompt(language=language),
+            "aspect_prompt": get_aspect_prompt(language=language),
+            "sentence_prompt": get_sentence_prompt(language=language),
+            "packed_sentence_prompt": get_packed_sentence_prompt(language=language) if pack_size else None,
+        }
+
+    return SentimentConfig(
+        language=language,
+        llm=llm,
+        pack_size=pack_size,
+        cache=resolve_cache(cache),
+        **prompts,
+        **options
+    )
+
+
 def augment_sentiment_data(
         examples: List[str],
         language: Optional[str] = None,
@@ -22,32 +71,81 @@ def augment_sentiment_data(
         export_type: str = "default",
         aspect_based_generation: bool = False,
         verbose: bool = False,
+        pack_size: Optional[Union[int, str]] = None,
+        cache: Optional[Union[str, ResponseCache]] = None,
+        structured_output: bool = False,
+        on_report: Optional[Callable[[RunReport], None]] = None,
+        hooks: Optional[Union[PipelineHooks, List[PipelineHooks]]] = None,
         **kwargs
 ) -> SentimentOutput:
 
     if not language:
         language = TranslationUtility.detect_language(examples[0])
 
-    if not model_params:
-        model_params = {"temperature": 0.95}
-    if "temperature" not in model_params:
-        model_params["temperature"] = 0.95
+    config = _build_sentiment_config(
+        language,
+        vendor,
+        model,
+        model_params,
+        augment=True,
+        batch_size=batch_size,
+        label_options=label_options,
+        export_type=export_type,
+        aspect_based_generation=aspect_based_generation,
+        verbose=verbose,
+        cache=cache,
+        structured_output=structured_output,
+        on_report=on_report,
+        hooks=hooks,
+        pack_size=pack_size
+    )
 
-    llm = create_llm_object(vendor=vendor, model=model, **model_params)
+    return SentimentAugmenter(config=config).generate(examples=examples)
 
-    config = SentimentConfig(
-        language=language,
-        sentence_prompt=get_augment_sentence_prompt(language=language),
-        structure_prompt=get_structure_prompt(language=language),
-        llm=llm,
+
+def augment_sentiment_data_stream(
+        examples: List[str],
+        language: Optional[str] = None,
+        vendor: str = "openai",
+        model: str = "gpt-4o-mini",
+        model_params: Optional[Dict] = None,
+        batch_size: int = 10,
+        chunk_size: Optional[int] = None,
+        label_options: Optional[List] = ["positive", "negative"],
+        export_type: str = "default",
+        aspect_based_generation: bool = False,
+        verbose: bool = False,
+        pack_size: Optional[Union[int, str]] = None,
+        cache: Optional[Union[str, ResponseCache]] = None,
+        structured_output: bool = False,
+        on_report: Optional[Callable[[RunReport], None]] = None,
+        hooks: Optional[Union[PipelineHooks, List[PipelineHooks]]] = None,
+        **kwargs
+) -> Iterator[SentimentOutput]:
+    """Streaming variant of `augment_sentiment_data`: yields the output in chunks of `chunk_size` sentence requests."""
+
+    if not language:
+        language = TranslationUtility.detect_language(examples[0])
+
+    config = _build_sentiment_config(
+        language,
+        vendor,
+        model,
+        model_params,
+        augment=True,
         batch_size=batch_size,
         label_options=label_options,
         export_type=export_type,
         aspect_based_generation=aspect_based_generation,
-        verbose=verbose
+        verbose=verbose,
+        cache=cache,
+        structured_output=structured_output,
+        on_report=on_report,
+        hooks=hooks,
+        pack_size=pack_size
     )
 
-    return SentimentAugmenter(config=config).generate(examples=examples)
+    yield from SentimentAugmenter(config=config).generate_stream(examples=examples, chunk_size=chunk_size)
 
 
 async def augment_sentiment_data_async(
@@ -57,36 +155,98 @@ async def augment_sentiment_data_async(
         model: str = "gpt-4o-mini",
         model_params: Optional[Dict] = None,
         batch_size: int = 10,
+        max_concurrency: Optional[int] = None,
+        adaptive_concurrency: bool = False,
         label_options: Optional[List] = ["positive", "negative"],
         export_type: str = "default",
         aspect_based_generation: bool = False,
         verbose: bool = False,
+        pack_size: Optional[Union[int, str]] = None,
+        cache: Optional[Union[str, ResponseCache]] = None,
+        structured_output: bool = False,
+        on_report: Optional[Callable[[RunReport], None]] = None,
+        hooks: Optional[Union[PipelineHooks, List[PipelineHooks]]] = None,
+        hedging: Optional[HedgingPolicy] = None,
         **kwargs
 ) -> SentimentOutput:
 
     if not language:
         language = await TranslationUtility.detect_language_async(examples[0])
 
-    if not model_params:
-        model_params = {"temperature": 0.95}
-    if "temperature" not in model_params:
-        model_params["temperature"] = 0.95
+    config = _build_sentiment_config(
+        language,
+        vendor,
+        model,
+        model_params,
+        augment=True,
+        batch_size=batch_size,
+        max_concurrency=max_concurrency,
+        adaptive_concurrency=adaptive_concurrency,
+        label_options=label_options,
+        export_type=export_type,
+        aspect_based_generation=aspect_based_generation,
+        verbose=verbose,
+        cache=cache,
+        structured_output=structured_output,
+        on_report=on_report,
+        hooks=hooks,
+        pack_size=pack_size,
+        hedging=hedging
+    )
+
+    return await SentimentAugmenterAsync(config=config).generate(examples=examples)
 
-    llm = create_llm_object(vendor=vendor, model=model, **model_params)
 
-    config = SentimentConfig(
-        language=language,
-        sentence_prompt=get_augment_sentence_prompt(language=language),
-        structure_prompt=get_structure_prompt(language=language),
-        llm=llm,
+async def augment_sentiment_data_stream_async(
+        examples: List[str],
+        language: Optional[str] = None,
+        vendor: str = "openai",
+        model: str = "gpt-4o-mini",
+        model_params: Optional[Dict] = None,
+        batch_size: int = 10,
+        chunk_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        adaptive_concurrency: bool = False,
+        label_options: Optional[List] = ["positive", "negative"],
+        export_type: str = "default",
+        aspect_based_generation: bool = False,
+        verbose: bool = False,
+        pack_size: Optional[Union[int, str]] = None,
+        cache: Optional[Union[str, ResponseCache]] = None,
+        structured_output: bool = False,
+        on_report: Optional[Callable[[RunReport], None]] = None,
+        hooks: Optional[Union[PipelineHooks, List[PipelineHooks]]] = None,
+        hedging: Optional[HedgingPolicy] = None,
+        **kwargs
+) -> AsyncIterator[SentimentOutput]:
+    """Streaming variant of `augment_sentiment_data_async`: yields the output in chunks of `chunk_size` sentence requests."""
+
+    if not language:
+        language = await TranslationUtility.detect_language_async(examples[0])
+
+    config = _build_sentiment_config(
+        language,
+        vendor,
+        model,
+        model_params,
+        augment=True,
         batch_size=batch_size,
+        max_concurrency=max_concurrency,
+        adaptive_concurrency=adaptive_concurrency,
         label_options=label_options,
         export_type=export_type,
         aspect_based_generation=aspect_based_generation,
-        verbose=verbose
+        verbose=verbose,
+        cache=cache,
+        structured_output=structured_output,
+        on_report=on_report,
+        hooks=hooks,
+        pack_size=pack_size,
+        hedging=hedging
     )
 
-    return await SentimentAugmenterAsync(config=config).generate(examples=examples)
+    async for chunk in SentimentAugmenterAsync(config=config).generate_stream(examples=examples, chunk_size=chunk_size):
+        yield chunk
 
 
 async def augment_sentiment_multi_vendor_async(
@@ -94,6 +254,8 @@ async def augment_sentiment_multi_vendor_async(
         language: Optional[str] = None,
         vendors: Optional[Dict[str, str]] = None,
         batch_size: int = 10,
+        max_concurrency: Optional[int] = None,
+        adaptive_concurrency: bool = False,
         label_options: Optional[List] = ["positive", "negative"],
         export_type: str = "default",
         aspect_based_generation: bool = False,
@@ -111,6 +273,8 @@ async def augment_sentiment_multi_vendor_async(
                 vendor=vendor,
                 model=model,
                 batch_size=batch_size,
+                max_concurrency=max_concurrency,
+                adaptive_concurrency=adaptive_concurrency,
                 label_options=label_options,
                 export_type=export_type,
                 aspect_based_generation=aspect_based_generation,
@@ -140,34 +304,94 @@ def generate_sentiment_data(
     dimensions: Optional[List[str]] = None,
     aspects: Optional[List[str]] = None,
     verbose: bool = False,
+    pack_size: Optional[Union[int, str]] = None,
+    cache: Optional[Union[str, ResponseCache]] = None,
+    structured_output: bool = False,
+    on_report: Optional[Callable[[RunReport], None]] = None,
+    hooks: Optional[Union[PipelineHooks, List[PipelineHooks]]] = None,
+    run_dir: Optional[str] = None,
+    resume: bool = False,
+    seed: Optional[int] = None,
     **kwargs
 ) -> SentimentOutput:
 
     if not language:
         language = TranslationUtility.detect_language(concept)
 
-    if not model_params:
-        model_params = {"temperature": 0.95}
-    if "temperature" not in model_params:
-        model_params["temperature"] = 0.95
+    config = _build_sentiment_config(
+        language,
+        vendor,
+        model,
+        model_params,
+        n_aspect=n_aspect,
+        n_sentence=n_sentence,
+        batch_size=batch_size,
+        label_options=label_options,
+        export_type=export_type,
+        verbose=verbose,
+        cache=cache,
+        structured_output=structured_output,
+        on_report=on_report,
+        hooks=hooks,
+        pack_size=pack_size,
+        run_dir=run_dir,
+        resume=resume,
+        seed=seed
+    )
 
-    llm = create_llm_object(vendor=vendor, model=model, **model_params)
+    return SentimentGenerator(config=config).generate(concept=concept, dimensions=dimensions, aspects=aspects)
 
-    config = SentimentConfig(
-        language=language,
-        dimension_prompt=get_dimension_prompt(language=language),
-        aspect_prompt=get_aspect_prompt(language=language),
-        sentence_prompt=get_sentence_prompt(language=language),
-        llm=llm,
+
+def generate_sentiment_data_stream(
+    concept: str = None,
+    language: Optional[str] = None,
+    vendor: str = "openai",
+    model: str = "gpt-4o-mini",
+    model_params: Optional[Dict] = None,
+    n_aspect: int = 1,
+    n_sentence: int = 100,
+    batch_size: int = 10,
+    chunk_size: Optional[int] = None,
+    label_options: Optional[List] = ["positive", "negative"],
+    export_type: str = "default",
+    dimensions: Optional[List[str]] = None,
+    aspects: Optional[List[str]] = None,
+    verbose: bool = False,
+    pack_size: Optional[Union[int, str]] = None,
+    cache: Optional[Union[str, ResponseCache]] = None,
+    structured_output: bool = False,
+    on_report: Optional[Callable[[RunReport], None]] = None,
+    hooks: Optional[Union[PipelineHooks, List[PipelineHooks]]] = None,
+    seed: Optional[int] = None,
+    **kwargs
+) -> Iterator[SentimentOutput]:
+    """Streaming variant of `generate_sentiment_data`: yields the output in chunks of `chunk_size` sentence requests."""
+
+    if not language:
+        language = TranslationUtility.detect_language(concept)
+
+    config = _build_sentiment_config(
+        language,
+        vendor,
+        model,
+        model_params,
         n_aspect=n_aspect,
         n_sentence=n_sentence,
         batch_size=batch_size,
         label_options=label_options,
         export_type=export_type,
-        verbose=verbose
+        verbose=verbose,
+        cache=cache,
+        structured_output=structured_output,
+        on_report=on_report,
+        hooks=hooks,
+        pack_size=pack_size,
+        seed=seed
     )
 
-    return SentimentGenerator(config=config).generate(concept=concept, dimensions=dimensions, aspects=aspects)
+    yield from SentimentGenerator(config=config).generate_stream(
+        concept=concept, dimensions=dimensions, aspects=aspects, chunk_size=chunk_size
+    )
 
 
 async def generate_sentiment_data_async(
@@ -179,39 +403,171 @@ async def generate_sentiment_data_async(
         n_aspect: int = 1,
         n_sentence: int = 100,
         batch_size: int = 10,
+        max_concurrency: Optional[int] = None,
+        adaptive_concurrency: bool = False,
         label_options: Optional[List] = ["positive", "negative"],
         export_type: str = "default",
         dimensions: Optional[List[str]] = None,
         aspects: Optional[List[str]] = None,
         verbose: bool = False,
+        pack_size: Optional[Union[int, str]] = None,
+        cache: Optional[Union[str, ResponseCache]] = None,
+        structured_output: bool = False,
+        on_report: Optional[Callable[[RunReport], None]] = None,
+        hooks: Optional[Union[PipelineHooks, List[PipelineHooks]]] = None,
+        hedging: Optional[HedgingPolicy] = None,
+        run_dir: Optional[str] = None,
+        resume: bool = False,
+        seed: Optional[int] = None,
         **kwargs
 ) -> SentimentOutput:
 
     if not language:
         language = TranslationUtility.detect_language(concept)
 
-    if not model_params:
-        model_params = {"temperature": 0.95}
-    if "temperature" not in model_params:
-        model_params["temperature"] = 0.95
+    config = _build_sentiment_config(
+        language,
+        vendor,
+        model,
+        model_params,
+        n_aspect=n_aspect,
+        n_sentence=n_sentence,
+        batch_size=batch_size,
+        max_concurrency=max_concurrency,
+        adaptive_concurrency=adaptive_concurrency,
+        label_options=label_options,
+        export_type=export_type,
+        verbose=verbose,
+        cache=cache,
+        structured_output=structured_output,
+        on_report=on_report,
+        hooks=hooks,
+        pack_size=pack_size,
+        hedging=hedging,
+        run_dir=run_dir,
+        resume=resume,
+        seed=seed
+    )
 
-    llm = create_llm_object(vendor=vendor, model=model, **model_params)
+    return await SentimentGeneratorAsync(config=config).generate(concept=concept, dimensions=dimensions, aspects=aspects)
 
-    config = SentimentConfig(
-        language=language,
-        dimension_prompt=get_dimension_prompt(language=language),
-        aspect_prompt=get_aspect_prompt(language=language),
-        sentence_prompt=get_sentence_prompt(language=language),
-        llm=llm,
+
+async def generate_sentiment_data_stream_async(
+        concept: str = None,
+        language: Optional[str] = None,
+        vendor: str = "openai",
+        model: str = "gpt-4o-mini",
+        model_params: Optional[Dict] = None,
+        n_aspect: int = 1,
+        n_sentence: int = 100,
+        batch_size: int = 10,
+        chunk_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        adaptive_concurrency: bool = False,
+        label_options: Optional[List] = ["positive", "negative"],
+        export_type: str = "default",
+        dimensions: Optional[List[str]] = None,
+        aspects: Optional[List[str]] = None,
+        verbose: bool = False,
+        pack_size: Optional[Union[int, str]] = None,
+        cache: Optional[Union[str, ResponseCache]] = None,
+        structured_output: bool = False,
+        on_report: Optional[Callable[[RunReport], None]] = None,
+        hooks: Optional[Union[PipelineHooks, List[PipelineHooks]]] = None,
+        hedging: Optional[HedgingPolicy] = None,
+        seed: Optional[int] = None,
+        **kwargs
+) -> AsyncIterator[SentimentOutput]:
+    """Streaming variant of `generate_sentiment_data_async`: yields the output in chunks of `chunk_size` sentence requests."""
+
+    if not language:
+        language = TranslationUtility.detect_language(concept)
+
+    config = _build_sentiment_config(
+        language,
+        vendor,
+        model,
+        model_params,
         n_aspect=n_aspect,
         n_sentence=n_sentence,
         batch_size=batch_size,
+        max_concurrency=max_concurrency,
+        adaptive_concurrency=adaptive_concurrency,
         label_options=label_options,
         export_type=export_type,
+        verbose=verbose,
+        cache=cache,
+        structured_output=structured_output,
+        on_report=on_report,
+        hooks=hooks,
+        pack_size=pack_size,
+        hedging=hedging,
+        seed=seed
+    )
+
+    generator = SentimentGeneratorAsync(config=config)
+    async for chunk in generator.generate_stream(concept=concept, dimensions=dimensions, aspects=aspects, chunk_size=chunk_size):
+        yield chunk
+
+
+def submit_sentiment_batch_job(
+        concept: str,
+        job_dir: str,
+        backend: Union[str, BatchBackend] = "openai",
+        language: Optional[str] = None,
+        vendor: str = "openai",
+        model: str = "gpt-4o-mini",
+        model_params: Optional[Dict] = None,
+        n_aspect: int = 1,
+        n_sentence: int = 100,
+        batch_size: int = 10,
+        label_options: Optional[List] = ["positive", "negative"],
+        dimensions: Optional[List[str]] = None,
+        aspects: Optional[List[str]] = None,
+        verbose: bool = False,
+        seed: Optional[int] = None,
+        **kwargs
+) -> BatchJob:
+
+    if not language:
+        language = TranslationUtility.detect_language(concept)
+
+    config = _build_sentiment_config(
+        language,
+        vendor,
+        model,
+        model_params,
+        n_aspect=n_aspect,
+        n_sentence=n_sentence,
+        batch_size=batch_size,
+        label_options=label_options,
+        verbose=verbose,
+        seed=seed
+    )
+
+    return SentimentGenerator(config=config).submit_batch_job(
+        concept=concept, job_dir=job_dir, backend=backend, dimensions=dimensions, aspects=aspects
+    )
+
+
+def collect_sentiment_batch_job(
+        job_dir: str,
+        backend: Union[str, BatchBackend] = "openai",
+        export_type: str = "default",
+        verbose: bool = False,
+        **kwargs
+) -> SentimentOutput:
+
+    # Collecting only parses the downloaded results, so no prompt or LLM is needed.
+    config = SentimentConfig(
+        language="en",
+        sentence_prompt="",
+        llm=None,
+        export_type=export_type,
         verbose=verbose
     )
 
-    return await SentimentGeneratorAsync(config=config).generate(concept=concept, dimensions=dimensions, aspects=aspects)
+    return SentimentGenerator(config=config).collect_batch_job(job_dir=job_dir, backend=backend)
 
 
 async def generate_sentiment_multi_vendor_async(
@@ -222,6 +578,8 @@ async def generate_sentiment_multi_vendor_async(
         n_aspect: int = 1,
         n_sentence: int = 100,
         batch_size: int = 10,
+        max_concurrency: Optional[int] = None,
+        adaptive_concurrency: bool = False,
         label_options: Optional[List] = ["positive", "negative"],
         export_type: str = "default",
         dimensions: Optional[List[str]] = None,
@@ -244,6 +602,8 @@ async def generate_sentiment_multi_vendor_async(
                 n_aspect=n_aspect,
                 n_sentence=n_sentence,
                 batch_size=batch_size,
+                max_concurrency=max_concurrency,
+                adaptive_concurrency=adaptive_concurrency,
                 label_options=label_options,
                 export_type=export_type,
                 dimensions=dimensions,
@@ -3,4 +3,26 @@ DEFAULT_VENDORS = {
     "ollama": "gemma3:27b",
     "gemini": "gemini-1.5-flash",
     "groq": "llama-3.3-70b-versatile",
-}
\ No newline at end of file
+}
+
+ADAPTIVE_CONCURRENCY_DEFAULTS = {
+    "openai": {"initial_limit": 8, "max_limit": 128},
+    "ollama": {"initial_limit": 1, "max_limit": 8},
+    "gemini": {"initial_limit": 4, "max_limit": 64},
+    "groq": {"initial_limit": 8, "max_limit": 128},
+    "together": {"initial_limit": 4, "max_limit": 64},
+}
+
+# Estimated USD price per 1M (input, output) tokens, used by RunReport.cost().
+# Local models are free; unknown models are reported without a cost.
+MODEL_PRICES = {
+    ("openai", "gpt-4o-mini"): (0.15, 0.60),
+    ("openai", "gpt-4o"): (2.50, 10.00),
+    ("openai", "gpt-4.1-mini"): (0.40, 1.60),
+    ("openai", "gpt-4.1-nano"): (0.10, 0.40),
+    ("gemini", "gemini-1.5-flash"): (0.075, 0.30),
+    ("gemini", "gemini-2.0-flash"): (0.10, 0.40),
+    ("groq", "llama-3.3-70b-versatile"): (0.59, 0.79),
+    ("groq", "llama-3.1-8b-instant"): (0.05, 0.08),
+    ("ollama", "*"): (0.0, 0.0),
+}
@@ -1,10 +1,22 @@
 import random
+import numpy as np
 from typing import Dict, List, Tuple
+from .rng import RowRNG
 from .concepts import (
     WRITING_STYLES, MEDIUMS, PERSONAS, INTENTIONS, SENTENCE_LENGTH_OPTIONS
 )
 
 
+# Style fields of a generated sentence and the options they are drawn from, in prompt order.
+STYLE_OPTIONS: Dict[str, List[str]] = {
+    "writing_style": WRITING_STYLES,
+    "medium": MEDIUMS,
+    "persona": PERSONAS,
+    "intention": INTENTIONS,
+    "sentence_length": SENTENCE_LENGTH_OPTIONS,
+}
+
+
 class DrawUtility:
 
     @staticmethod
@@ -17,6 +29,14 @@ class DrawUtility:
             "sentence_length": random.choice(SENTENCE_LENGTH_OPTIONS),
         }
     
+    @staticmethod
+    def draw_style_codes(rng: RowRNG, rows: np.ndarray) -> np.ndarray:
+        """Vectorized `draw_style`: an array of option positions per row, one column per field of `STYLE_OPTIONS`."""
+        return np.stack(
+            [rng.integers(rows, f"style/{field}", len(options)) for field, options in STYLE_OPTIONS.items()],
+            axis=1
+        ).astype(np.uint16)
+
     @staticmethod
     def weighted_random_sample(aspects: List[str], labels: List[str]) -> Tuple[str, str]:
         n = len(aspects)
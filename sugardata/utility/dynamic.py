@@ -1,11 +1,20 @@
-from typing import Dict, Any, Type, Optional
+from typing import Dict, Any, Tuple, Type, Optional
 from pydantic import BaseModel, Field, create_model
 
 
 class DynamicUtility:
 
+    # Models built so far, keyed by title and field definitions. `create_model` is costly and
+    # the same model must be reused so that parsers and format instructions can be cached too.
+    _models: Dict[Tuple, Type[BaseModel]] = {}
+
     @staticmethod
     def create_pydantic_base_model(title: str, entities: Dict[str, Dict[str, Any]]) -> Type[BaseModel]:
+        key = (title, tuple((name, config.get("type"), config.get("description", "")) for name, config in entities.items()))
+        model = DynamicUtility._models.get(key)
+        if model is not None:
+            return model
+
         supported_types = {int, str, float, list}
         model_fields = {}
 
@@ -19,4 +28,6 @@ class DynamicUtility:
             optional_type = Optional[field_type]
             model_fields[field_name] = (optional_type, Field(default=None, description=description))
 
-        return create_model(title, **model_fields)
\ No newline at end of file
+        model = create_model(title, **model_fields)
+        DynamicUtility._models[key] = model
+        return model
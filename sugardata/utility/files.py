@@ -0,0 +1,16 @@
+import os
+from contextlib import contextmanager
+from typing import Iterator, TextIO
+
+
+@contextmanager
+def atomic_write(path: str) -> Iterator[TextIO]:
+    """Writes `path` through a temporary file renamed over it on success, so readers never see a partial file."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            yield f
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -0,0 +1,45 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Tuple
+
+
+@dataclass
+class JoinStats:
+    """Results dropped by a join: repeated indices (`duplicates`) and indices no request has (`unknown`)."""
+    duplicates: int = 0
+    unknown: int = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.duplicates or self.unknown)
+
+
+class JoinUtility:
+
+    @staticmethod
+    def join_by_index(
+            requests: Iterable[Dict[str, Any]],
+            results: Iterable[Dict[str, Any]],
+            key: str = "index"
+    ) -> Tuple[List[Tuple[Dict[str, Any], Dict[str, Any]]], JoinStats]:
+        """
+        Pairs every result with the request of the same index, in result order and in O(n + m).
+
+        Indices echoed by an LLM cannot be trusted: the first result of an index wins, later
+        results with the same index are dropped as duplicates, and results whose index matches
+        no request (hallucinated, or missing) are dropped as unknown.
+        """
+        requests_by_index = {request[key]: request for request in requests}
+        stats = JoinStats()
+        seen = set()
+        pairs = []
+        for result in results:
+            index = result.get(key)
+            request = requests_by_index.get(index)
+            if request is None:
+                stats.unknown += 1
+                continue
+            if index in seen:
+                stats.duplicates += 1
+                continue
+            seen.add(index)
+            pairs.append((request, result))
+        return pairs, stats
@@ -0,0 +1,65 @@
+import hashlib
+import secrets
+from typing import Optional, Union
+import numpy as np
+
+
+GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+_MUL1 = np.uint64(0xBF58476D1CE4E5B9)
+_MUL2 = np.uint64(0x94D049BB133111EB)
+_MASK = (1 << 64) - 1
+
+
+def splitmix64(x: Union[int, np.ndarray]) -> np.ndarray:
+    """The splitmix64 mixing function, elementwise on uint64 (arithmetic wraps around)."""
+    with np.errstate(over="ignore"):
+        z = np.asarray(x, dtype=np.uint64) + GOLDEN_GAMMA
+        # In place, so that large batches of rows do not allocate a temporary per step.
+        z ^= z >> np.uint64(30)
+        z *= _MUL1
+        z ^= z >> np.uint64(27)
+        z *= _MUL2
+        z ^= z >> np.uint64(31)
+        return z
+
+
+def new_seed() -> int:
+    """A fresh 64-bit seed from the OS, for runs that were not given one."""
+    return secrets.randbits(64)
+
+
+class RowRNG:
+    """
+    Counter-based random numbers: the draws of a row depend only on the seed, the row index and
+    the name of the stream (e.g. "label/0"), never on how many rows were drawn before it or in
+    which order. Row i therefore gets the same values whether the rows are drawn all at once,
+    in batches, concurrently or on another machine.
+
+    The value of row i in a stream is the (i + 1)-th output of a splitmix64 generator keyed by
+    the seed and the stream name, computed directly instead of stepping through the sequence.
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        self.seed = new_seed() if seed is None else int(seed)
+        self._key = splitmix64(self.seed & _MASK)
+
+    def bits(self, rows: np.ndarray, stream: str) -> np.ndarray:
+        """64 random bits per row."""
+        rows = np.asarray(rows, dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            z = rows * GOLDEN_GAMMA
+            z += self._stream_key(stream)
+            return splitmix64(z)
+
+    def uniform(self, rows: np.ndarray, stream: str) -> np.ndarray:
+        """A float in [0, 1) per row."""
+        return (self.bits(rows, stream) >> np.uint64(11)) * (1.0 / (1 << 53))
+
+    def integers(self, rows: np.ndarray, stream: str, high: Union[int, np.ndarray]) -> np.ndarray:
+        """An integer in [0, high) per row; `high` can differ per row."""
+        return (self.uniform(rows, stream) * high).astype(np.int64)
+
+    def _stream_key(self, stream: str) -> np.ndarray:
+        # blake2b rather than hash(), which is salted per process.
+        digest = int.from_bytes(hashlib.blake2b(stream.encode("utf-8"), digest_size=8).digest(), "little")
+        return splitmix64(self._key ^ np.uint64(digest))
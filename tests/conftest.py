@@ -0,0 +1,24 @@
+import pytest
+from sugardata.components.factory import create_llm_object
+from sugardata.components.standard_chain_builder import StandardChainBuilder
+from sugardata.tasks.sentiment.schemas import Text
+
+
+SENTENCE_PROMPT = "Write one sentence about {concept} for request {index}.\n{format_instructions}"
+
+
+@pytest.fixture
+def fake_llm():
+    return create_llm_object(vendor="fake", model="fake", seed=0)
+
+
+@pytest.fixture
+def sentence_chain(fake_llm):
+    def _build(**kwargs):
+        return StandardChainBuilder(
+            prompt_template=SENTENCE_PROMPT,
+            llm=kwargs.pop("llm", fake_llm),
+            entity_model=Text,
+            **kwargs
+        ).build_chain()
+    return _build
@@ -0,0 +1,41 @@
+from sugardata.components.cache import ResponseCache, request_key
+from sugardata.components.factory import create_llm_object, describe_llm
+
+
+def test_request_key_depends_on_prompt_and_identity(fake_llm):
+    identity = describe_llm(fake_llm)
+    other = describe_llm(create_llm_object(vendor="fake", model="fake", seed=1))
+    assert request_key("a", identity) == request_key("a", identity)
+    assert request_key("a", identity) != request_key("b", identity)
+    assert request_key("a", identity) != request_key("a", other)
+
+
+def test_cache_hit_and_miss(tmp_path, fake_llm):
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite"))
+    key = cache.make_key("prompt", fake_llm)
+    assert cache.get(key) is None
+    cache.set(key, "response")
+    assert cache.get(key) == "response"
+    assert cache.get(cache.make_key("other prompt", fake_llm)) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+    cache.close()
+
+
+def test_sampled_requests_bypass_the_cache(tmp_path):
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite"))
+    sampled = create_llm_object(vendor="fake", model="fake", temperature=0.9)
+    assert cache.make_key("prompt", sampled) is None
+    assert cache.bypassed == 1
+    cache.close()
+
+
+def test_chain_answers_a_repeated_request_from_the_cache(tmp_path, sentence_chain):
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite"))
+    chain = sentence_chain(cache=cache)
+    first = chain.invoke({"concept": "coffee", "index": 3})
+    second = chain.invoke({"concept": "coffee", "index": 3})
+    assert first == second
+    assert (cache.hits, cache.misses) == (1, 1)
+    chain.invoke({"concept": "tea", "index": 3})
+    assert cache.misses == 2
+    cache.close()
@@ -0,0 +1,40 @@
+import pytest
+from sugardata.components.checkpoint import RunCheckpoint
+from sugardata.tasks.sentiment.schemas import Text
+
+
+def _texts(*indices):
+    return [Text(index=i, generated_text=f"text {i}") for i in indices]
+
+
+def test_resume_drops_a_torn_last_line(tmp_path):
+    checkpoint = RunCheckpoint(str(tmp_path))
+    checkpoint.append_results(_texts(0, 1))
+    checkpoint.close()
+    with open(tmp_path / RunCheckpoint.RESULTS, "a", encoding="utf-8") as f:
+        f.write('{"index": 2, "generated_text": "te')
+
+    resumed = RunCheckpoint(str(tmp_path), resume=True)
+    assert sorted(resumed.load_results(Text)) == [0, 1]
+    resumed.append_results(_texts(2))
+    resumed.close()
+    assert sorted(resumed.load_results(Text)) == [0, 1, 2]
+
+
+def test_first_result_of_an_index_wins(tmp_path):
+    checkpoint = RunCheckpoint(str(tmp_path))
+    checkpoint.append_results(_texts(0))
+    checkpoint.append_results([Text(index=0, generated_text="again")])
+    checkpoint.close()
+    assert checkpoint.load_results(Text)[0].generated_text == "text 0"
+
+
+def test_run_dir_with_a_plan_needs_resume(tmp_path):
+    checkpoint = RunCheckpoint(str(tmp_path))
+    checkpoint.save_plan(1, {"n_sentence": 2}, [{"index": 0}, {"index": 1}])
+    with pytest.raises(ValueError):
+        RunCheckpoint(str(tmp_path))
+    resumed = RunCheckpoint(str(tmp_path), resume=True)
+    assert resumed.load_plan({"n_sentence": 2})["batches"] == [{"index": 0}, {"index": 1}]
+    with pytest.raises(ValueError):
+        resumed.load_plan({"n_sentence": 3})
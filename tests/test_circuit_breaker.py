@@ -0,0 +1,59 @@
+import time
+from sugardata.components.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+class ServerError(Exception):
+    status_code = 500
+
+
+class BadRequest(Exception):
+    status_code = 400
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3)
+    assert breaker.record_failure(ServerError()) is None
+    assert breaker.record_failure(ServerError()) is None
+    assert breaker.record_failure(ServerError()) == (CLOSED, OPEN)
+    allowed, _ = breaker.allow_request()
+    assert not allowed
+    assert breaker.rejected == 1
+
+
+def test_client_errors_do_not_count():
+    breaker = CircuitBreaker(failure_threshold=1)
+    breaker.record_failure(BadRequest())
+    assert breaker.state == CLOSED
+
+
+def test_success_resets_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure(ServerError())
+    breaker.record_success()
+    breaker.record_failure(ServerError())
+    assert breaker.state == CLOSED
+
+
+def test_opens_on_failure_rate():
+    breaker = CircuitBreaker(failure_threshold=100, failure_rate=0.5, window=4)
+    breaker.record_success()
+    breaker.record_failure(ServerError())
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.record_failure(ServerError()) == (CLOSED, OPEN)
+
+
+def test_half_open_probe_closes_or_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01, half_open_max_calls=1)
+    breaker.record_failure(ServerError())
+    time.sleep(0.02)
+    allowed, transition = breaker.allow_request()
+    assert allowed and transition == (OPEN, HALF_OPEN)
+    # Only one probe at a time.
+    assert breaker.allow_request() == (False, None)
+    assert breaker.record_failure(ServerError()) == (HALF_OPEN, OPEN)
+
+    time.sleep(0.02)
+    assert breaker.allow_request()[0]
+    assert breaker.record_success() == (HALF_OPEN, CLOSED)
+    assert breaker.opened == 2
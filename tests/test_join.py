@@ -0,0 +1,23 @@
+from sugardata.utility.join import JoinStats, JoinUtility
+
+
+def test_join_pairs_results_with_their_requests():
+    requests = [{"index": i, "aspect": f"a{i}"} for i in range(3)]
+    results = [{"index": 2, "text": "c"}, {"index": 0, "text": "a"}]
+    pairs, stats = JoinUtility.join_by_index(requests, results)
+    assert [(request["aspect"], result["text"]) for request, result in pairs] == [("a2", "c"), ("a0", "a")]
+    assert not stats
+
+
+def test_join_drops_duplicate_and_unknown_indices():
+    requests = [{"index": 0}, {"index": 1}]
+    results = [
+        {"index": 0, "text": "first"},
+        {"index": 0, "text": "second"},
+        {"index": 5, "text": "hallucinated"},
+        {"text": "no index"},
+        {"index": 1, "text": "b"},
+    ]
+    pairs, stats = JoinUtility.join_by_index(requests, results)
+    assert [result["text"] for _, result in pairs] == ["first", "b"]
+    assert stats == JoinStats(duplicates=1, unknown=2)
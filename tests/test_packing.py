@@ -0,0 +1,57 @@
+import json
+from sugardata.components.standard_chain_builder import BatchFailure, BatchResult
+from sugardata.tasks.sentiment.packing import PackRound, run_packed
+from sugardata.tasks.sentiment.schemas import Text, Texts
+
+
+def _answer(pack, skip=()):
+    return Texts(texts=[
+        Text(index=request["index"], generated_text=f"text {request['index']}")
+        for request in json.loads(pack["requests"]) if request["index"] not in skip
+    ])
+
+
+def test_pack_round_ignores_indices_of_other_packs():
+    pack_round = PackRound([{"index": i} for i in range(4)], pack_size=2)
+    pack_round.add(0, Texts(texts=[Text(index=0, generated_text="a"), Text(index=3, generated_text="wrong pack")]))
+    pack_round.add(0, Texts(texts=[Text(index=0, generated_text="repeated")]))
+    assert {index: text.generated_text for index, text in pack_round.texts.items()} == {0: "a"}
+
+
+def test_run_packed_repacks_missing_requests():
+    rounds = []
+
+    def run_batch(packs, on_result):
+        rounds.append(len(packs))
+        for position, pack in enumerate(packs):
+            # The first round leaves out request 1.
+            on_result(position, _answer(pack, skip=(1,) if len(rounds) == 1 else ()))
+        return BatchResult(attempts=[1] * len(packs))
+
+    texts = run_packed(run_batch, [{"index": i} for i in range(4)], pack_size=2, max_rounds=2)
+    assert sorted(text.index for text in texts) == [0, 1, 2, 3]
+    assert rounds == [2, 1]
+    assert not texts.failures
+
+
+def test_run_packed_reports_the_last_error_and_attempts():
+    class Throttled(Exception):
+        status_code = 429
+
+    def run_batch(packs, on_result):
+        # The pack holding request 0 is throttled on every attempt; request 3 is never answered.
+        result = BatchResult()
+        for position, pack in enumerate(packs):
+            if json.loads(pack["requests"])[0]["index"] == 0:
+                result.failures.append(BatchFailure(position=position, index=None, error=Throttled(), attempts=3))
+                result.attempts.append(3)
+            else:
+                on_result(position, _answer(pack, skip=(3,)))
+                result.attempts.append(1)
+        return result
+
+    texts = run_packed(run_batch, [{"index": i} for i in range(4)], pack_size=2, max_rounds=2)
+    assert [text.index for text in texts] == [2]
+    failures = {failure.index: failure for failure in texts.failures}
+    assert isinstance(failures[0].error, Throttled) and failures[0].attempts == 6
+    assert isinstance(failures[3].error, ValueError) and failures[3].attempts == 2
@@ -0,0 +1,51 @@
+import json
+import pytest
+from langchain_core.exceptions import OutputParserException
+from sugardata.components.parsers import PackedOutputParser, RepairingOutputParser, repair_json
+from sugardata.tasks.sentiment.schemas import Text, Texts
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('```json\n{"index": 1, "generated_text": "hi"}\n```', {"index": 1, "generated_text": "hi"}),
+    ('Sure! {"index": 1, "generated_text": "hi"} Hope it helps.', {"index": 1, "generated_text": "hi"}),
+    ('{"index": 1, "generated_text": "hi",}', {"index": 1, "generated_text": "hi"}),
+    ('{"texts": [{"index": 1}, {"index": 2},]}', {"texts": [{"index": 1}, {"index": 2}]}),
+    ('{"index": 1, "aspects": ["a", "b"', {"index": 1, "aspects": ["a", "b"]}),
+    ('{"index": 1, "label":', {"index": 1, "label": None}),
+])
+def test_repair_json(text, expected):
+    assert json.loads(repair_json(text)) == expected
+
+
+def test_repair_json_keeps_brackets_inside_strings():
+    text = '{"generated_text": "a } b ] c", "index": 2'
+    assert json.loads(repair_json(text)) == {"generated_text": "a } b ] c", "index": 2}
+
+
+def test_repair_json_does_not_complete_a_truncated_string():
+    with pytest.raises(ValueError):
+        json.loads(repair_json('{"index": 1, "generated_text": "cut sho'))
+
+
+def test_repairing_parser_restores_the_request_index():
+    parser = RepairingOutputParser(pydantic_object=Text)
+    parsed = parser.parse_with_context('{"index": "index", "generated_text": "hi"}', {"index": 7})
+    assert parsed == Text(index=7, generated_text="hi")
+
+
+def test_packed_parser_drops_invalid_items():
+    parser = PackedOutputParser(container_model=Texts, list_field="texts")
+    text = '{"texts": [{"index": 1, "generated_text": "a"}, {"index": 2}, {"index": 3, "generated_text": "c"}]}'
+    assert [item.index for item in parser.parse(text).texts] == [1, 3]
+
+
+def test_packed_parser_salvages_a_truncated_response():
+    parser = PackedOutputParser(container_model=Texts, list_field="texts")
+    text = '{"texts": [{"index": 1, "generated_text": "a"}, {"index": 2, "generated_text": "b"}, {"index": 3, "generated_text": "cut'
+    assert [item.index for item in parser.parse(text).texts] == [1, 2]
+
+
+def test_packed_parser_raises_without_any_valid_item():
+    parser = PackedOutputParser(container_model=Texts, list_field="texts")
+    with pytest.raises(OutputParserException):
+        parser.parse('{"texts": [{"index": 1}]}')
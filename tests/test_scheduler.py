@@ -0,0 +1,118 @@
+import asyncio
+from sugardata.components.scheduler import ResultCallbackError, RetryPolicy, SlidingWindowScheduler, run_threaded
+
+
+class Flaky:
+    """Fails the first `failures` calls of every item with a retryable error."""
+
+    def __init__(self, failures: int = 1):
+        self.failures = failures
+        self.calls = {}
+
+    def __call__(self, item):
+        self.calls[item] = self.calls.get(item, 0) + 1
+        if self.calls[item] <= self.failures:
+            raise TimeoutError(f"item {item}")
+        return item * 10
+
+
+def test_sliding_window_keeps_input_order():
+    async def fn(item):
+        # Later items finish first.
+        await asyncio.sleep(0.001 * (10 - item))
+        return item * 10
+
+    results, attempts = asyncio.run(SlidingWindowScheduler(3).run(fn, list(range(10))))
+    assert results == [item * 10 for item in range(10)]
+    assert attempts == [1] * 10
+
+
+def test_sliding_window_bounds_concurrency():
+    running, peak = 0, 0
+
+    async def fn(item):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.001)
+        running -= 1
+        return item
+
+    asyncio.run(SlidingWindowScheduler(4).run(fn, list(range(20))))
+    assert peak == 4
+
+
+def test_sliding_window_retries_failed_items():
+    flaky = Flaky(failures=2)
+
+    async def fn(item):
+        return flaky(item)
+
+    scheduler = SlidingWindowScheduler(2, retry_policy=RetryPolicy(max_attempts=3, base_delay=0))
+    results, attempts = asyncio.run(scheduler.run(fn, [1, 2, 3]))
+    assert results == [10, 20, 30]
+    assert attempts == [3, 3, 3]
+
+
+def test_sliding_window_returns_error_after_last_attempt():
+    flaky = Flaky(failures=5)
+
+    async def fn(item):
+        return flaky(item)
+
+    scheduler = SlidingWindowScheduler(2, retry_policy=RetryPolicy(max_attempts=2, base_delay=0))
+    results, attempts = asyncio.run(scheduler.run(fn, [1]))
+    assert isinstance(results[0], TimeoutError)
+    assert attempts == [2]
+
+
+def test_client_errors_are_not_retried():
+    class BadRequest(Exception):
+        status_code = 400
+
+    calls = []
+
+    async def fn(item):
+        calls.append(item)
+        raise BadRequest()
+
+    scheduler = SlidingWindowScheduler(1, retry_policy=RetryPolicy(max_attempts=3, base_delay=0))
+    results, attempts = asyncio.run(scheduler.run(fn, [1]))
+    assert isinstance(results[0], BadRequest)
+    assert calls == [1]
+
+
+def test_on_result_error_fails_only_its_item():
+    def on_result(position, result):
+        if position == 1:
+            raise OSError("disk full")
+
+    async def fn(item):
+        return item
+
+    results, attempts = asyncio.run(SlidingWindowScheduler(2).run(fn, [0, 1, 2], on_result=on_result))
+    assert results[0] == 0 and results[2] == 2
+    assert isinstance(results[1], ResultCallbackError)
+    assert isinstance(results[1].__cause__, OSError)
+
+
+def test_run_threaded_keeps_order_and_retries():
+    flaky = Flaky(failures=1)
+    results, attempts = run_threaded(flaky, [1, 2, 3], max_concurrency=2, retry_policy=RetryPolicy(base_delay=0))
+    assert results == [10, 20, 30]
+    assert attempts == [2, 2, 2]
+
+
+def test_run_threaded_on_result_error_fails_only_its_item():
+    seen = []
+
+    def on_result(position, result):
+        if position == 0:
+            raise ValueError("cannot encode")
+        seen.append(position)
+
+    results, attempts = run_threaded(lambda item: item, [0, 1, 2], on_result=on_result)
+    assert isinstance(results[0], ResultCallbackError)
+    assert results[1:] == [1, 2]
+    assert sorted(seen) == [1, 2]
+    assert attempts == [1, 1, 1]